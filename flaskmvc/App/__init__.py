@@ -1,4 +1,16 @@
-from .models import *
-from .views import *
-from .controllers import *
-from .main import *
\ No newline at end of file
+import importlib
+
+# The subpackages are imported on first use rather than here, so that
+# importing App.database or App.models (as the CLI does) does not also
+# load the views, Flask-Admin and the other web-only extensions.
+_SUBMODULES = ('models', 'views', 'controllers', 'main')
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f'.{name}', __name__)
+    for submodule in _SUBMODULES:
+        module = importlib.import_module(f'.{submodule}', __name__)
+        if hasattr(module, name):
+            return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
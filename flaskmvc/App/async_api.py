@@ -0,0 +1,252 @@
+import asyncio, datetime, http.cookies, json, logging, urllib.parse
+
+import jwt
+from flask_jwt_extended import decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+
+from App.database import POOL_SETTINGS
+from App.models.user import User
+from App.controllers.auth import identity_cache, setup_jwt
+from App.controllers.roster import get_current_week
+from App.controllers.rollup import rollup_fresh_query
+from App.controllers.my_week import (
+    my_roster_json,
+    my_roster_query,
+    my_summary_json,
+    my_summary_query,
+    my_week_json,
+    open_shift_json,
+    open_shift_query
+)
+from App.controllers.shift_template import expand_templates, materialized_query, merge_shifts, templates_query
+
+logger = logging.getLogger(__name__)
+
+# backend -> async driver used for the app's database
+ASYNC_DRIVERS = {'sqlite': 'aiosqlite', 'postgresql': 'asyncpg', 'mysql': 'aiomysql'}
+
+
+def async_database_url(config):
+    """
+    The URL the async engine connects to: ASYNC_DATABASE_URI when set,
+    otherwise SQLALCHEMY_DATABASE_URI with its driver swapped for the
+    backend's async driver (see ASYNC_DRIVERS).
+    """
+    if config.get('ASYNC_DATABASE_URI'):
+        return make_url(config['ASYNC_DATABASE_URI'])
+    url = make_url(config.get('SQLALCHEMY_DATABASE_URI') or 'sqlite://')
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver is known for {backend}; set ASYNC_DATABASE_URI.")
+    if backend == 'sqlite' and url.database in (None, '', ':memory:'):
+        raise RuntimeError("The async read API cannot share an in-memory SQLite database; use a database file.")
+    url = url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    if backend == 'postgresql' and 'sslmode' in url.query:
+        # asyncpg takes libpq's sslmode values as ssl
+        url = url.difference_update_query(['sslmode']).update_query_dict({'ssl': url.query['sslmode']})
+    return url
+
+
+def create_read_engine(config):
+    """An async engine for the app's database with the same DB_POOL_* settings as the sync one."""
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = async_database_url(config)
+    options = {option: config.get(key, default) for key, (option, default) in POOL_SETTINGS.items()}
+    try:
+        return create_async_engine(url, **options)
+    except ImportError:
+        raise RuntimeError(f"The async read API needs the {url.get_driver_name()} package installed.") from None
+
+
+async def _send_json(send, status, body, headers=()):
+    payload = json.dumps(body).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(payload)).encode()), *headers]
+    })
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+class AsyncReadAPI:
+    """
+    ASGI app serving the hottest per-user reads (a user's roster, open
+    shift and weekly totals) under ASYNC_API_PREFIX, on an async engine.
+    Statements and JSON come from App.controllers.my_week, so answers match
+    the Flask views. /api/me/week runs its reads (roster, recurring
+    shifts, open shift and totals) concurrently, each on its own pooled
+    connection. Requests are authenticated with the
+    app's JWT access tokens (Authorization header or access_token cookie),
+    decoded by Flask-JWT-Extended with the app's settings, for users that
+    still exist.
+    Other paths go to wsgi_app when given (see create_asgi_app).
+    """
+
+    def __init__(self, app, wsgi_app=None):
+        self.app = app
+        self.config = app.config
+        self.prefix = app.config.get('ASYNC_API_PREFIX', '/async').rstrip('/')
+        self.wsgi_app = wsgi_app
+        self.engine = None
+        self.routes = {
+            '/api/me/roster': self.roster,
+            '/api/me/open-shift': self.open_shift,
+            '/api/me/summary': self.summary,
+            '/api/me/week': self.week
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        path = scope.get('path', '')
+        handler = None
+        if scope['type'] == 'http' and path.startswith(self.prefix):
+            handler = self.routes.get(path[len(self.prefix):])
+        if handler is None:
+            if self.wsgi_app is not None:
+                return await self.wsgi_app(scope, receive, send)
+            return await _send_json(send, 404, {'message': 'Not found.'})
+        if scope['method'] != 'GET':
+            return await _send_json(send, 405, {'message': 'Method not allowed.'}, [(b'allow', b'GET')])
+        if self.engine is None:
+            self.engine = create_read_engine(self.config)
+        user_id = await self.identity(scope)
+        if user_id is None:
+            return await _send_json(send, 401, {'message': 'Missing or invalid access token.'})
+        params = {key: values[-1] for key, values in urllib.parse.parse_qs(scope['query_string'].decode()).items()}
+        try:
+            week_start, week_end = get_current_week()
+            if params.get('week_start'):
+                week_start = datetime.datetime.strptime(params['week_start'], "%Y-%m-%d").date()
+                week_end = week_start + datetime.timedelta(days=6)
+        except ValueError:
+            return await _send_json(send, 400, {'message': 'Invalid date format. Use YYYY-MM-DD.'})
+        try:
+            body = await handler(user_id, week_start, week_end)
+        except Exception:
+            logger.exception("Async read %s failed", path)
+            return await _send_json(send, 500, {'message': 'Internal server error.'})
+        await _send_json(send, 200, body)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    # in the worker process, so pools are never shared across a fork
+                    self.engine = self.engine or create_read_engine(self.config)
+                except RuntimeError as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.engine is not None:
+                    await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def identity(self, scope):
+        """
+        The id of the user the request's access token is for, or None when it
+        has no valid one or the user no longer exists. Users found in the
+        identity cache (see load_user) are not looked up again.
+        """
+        user_id = self.token_user_id(scope)
+        if user_id is None or identity_cache.get(user_id) is not None:
+            return user_id
+        async with self.engine.connect() as connection:
+            return await connection.scalar(select(User.user_id).filter(User.user_id == user_id))
+
+    def token_user_id(self, scope):
+        """The user id in the request's access token, or None when it has no valid one."""
+        headers = dict(scope['headers'])
+        scheme, _, token = headers.get(b'authorization', b'').decode('latin-1').partition(' ')
+        if scheme != 'Bearer':
+            cookie = http.cookies.SimpleCookie(headers.get(b'cookie', b'').decode('latin-1'))
+            morsel = cookie.get(self.config.get('JWT_ACCESS_COOKIE_NAME', 'access_token'))
+            token = morsel.value if morsel else ''
+        if not token.strip():
+            return None
+        try:
+            # the same checks (key, algorithms, audience, issuer, leeway) as the Flask views
+            with self.app.app_context():
+                claims = decode_token(token.strip())
+            if claims.get('type') != 'access':
+                return None
+            return int(claims[self.config.get('JWT_IDENTITY_CLAIM', 'sub')])
+        except (jwt.InvalidTokenError, JWTExtendedException, KeyError, TypeError, ValueError):
+            return None
+
+    async def _rows(self, query):
+        async with self.engine.connect() as connection:
+            return (await connection.execute(query)).all()
+
+    async def _open_shift(self, user_id):
+        async with self.engine.connect() as connection:
+            return (await connection.execute(open_shift_query(user_id))).first()
+
+    async def _summary(self, user_id, week_start, week_end):
+        async with self.engine.connect() as connection:
+            fresh = rollup_fresh_query(week_start, week_end)
+            from_rollup = fresh is not None and await connection.scalar(fresh) is not None
+            return (await connection.execute(my_summary_query(user_id, week_start, week_end, from_rollup))).one()
+
+    async def _template_shifts(self, user_id, week_start, week_end):
+        async with self.engine.connect() as connection:
+            templates = (await connection.execute(templates_query(week_start, week_end, [user_id]))).all()
+            if not templates:
+                return []
+            materialized = (await connection.execute(materialized_query(week_start, week_end, [user_id]))).all()
+        return list(expand_templates(templates, materialized, week_start, week_end))
+
+    async def roster(self, user_id, week_start, week_end):
+        rows, occurrences = await asyncio.gather(
+            self._rows(my_roster_query(user_id, week_start, week_end)),
+            self._template_shifts(user_id, week_start, week_end)
+        )
+        roster = my_roster_json(merge_shifts(rows, occurrences))
+        return {'week_start': week_start.isoformat(), 'week_end': week_end.isoformat(), 'roster': roster}
+
+    async def open_shift(self, user_id, week_start, week_end):
+        return {'open_shift': open_shift_json(await self._open_shift(user_id))}
+
+    async def summary(self, user_id, week_start, week_end):
+        row, occurrences = await asyncio.gather(
+            self._summary(user_id, week_start, week_end),
+            self._template_shifts(user_id, week_start, week_end)
+        )
+        summary = my_summary_json(row, len(occurrences))
+        return {'week_start': week_start.isoformat(), 'week_end': week_end.isoformat(), **summary}
+
+    async def week(self, user_id, week_start, week_end):
+        roster, open_shift, summary, occurrences = await asyncio.gather(
+            self._rows(my_roster_query(user_id, week_start, week_end)),
+            self._open_shift(user_id),
+            self._summary(user_id, week_start, week_end),
+            self._template_shifts(user_id, week_start, week_end)
+        )
+        return my_week_json(user_id, week_start, week_end, roster, open_shift, summary, occurrences)
+
+
+def create_asgi_app(app, mount_wsgi=None):
+    """
+    The async read API for a Flask app. With mount_wsgi (default
+    ASYNC_API_MOUNT_WSGI) every other path is served by the Flask app
+    itself, in a thread, so one ASGI server can replace gunicorn's gevent
+    workers; otherwise the API is served on its own.
+    """
+    if mount_wsgi is None:
+        mount_wsgi = app.config.get('ASYNC_API_MOUNT_WSGI', False)
+    # a lite app has no web layer yet, but tokens are decoded with its JWT setup
+    setup_jwt(app)
+    wsgi_app = None
+    if mount_wsgi:
+        try:
+            from asgiref.wsgi import WsgiToAsgi
+        except ImportError:
+            raise RuntimeError("Mounting the Flask app needs the asgiref package installed.") from None
+        wsgi_app = WsgiToAsgi(app)
+    return AsyncReadAPI(app, wsgi_app)
@@ -0,0 +1,232 @@
+import datetime, json, time
+from collections import namedtuple
+
+from flask_jwt_extended import create_access_token
+
+from App.database import db
+from App.hashing import hash_password
+from App.models.user import User
+from App.models.admin import Admin
+from App.models.staff import Staff
+from App.models.Shift import Shift
+from App.models.Roster import Roster
+from App.models.attendance_record import AttendanceRecord
+from App.controllers.rollup import rebuild_rollups, week_of
+
+BENCH_PASSWORD = "benchpass"
+ADMIN_COUNT = 2
+INSERT_CHUNK = 20000
+# staff scheduled per /api/roster/bulk request
+SCHEDULE_GROUP = 25
+
+# Sample data made by generate_bench_data: the user ids and emails to act
+# as, and the span of weeks with shifts. Every staff member has Monday to
+# Friday shifts in each week, attended in all but the last week, whose
+# Monday shifts are left for the clock-in burst.
+BenchData = namedtuple('BenchData', 'admins staff first_week weeks burst_shifts')
+
+
+def generate_bench_data(staff_count, weeks, first_week=None):
+    """
+    Replace the database contents with init's sample data scaled up:
+    ADMIN_COUNT admins and staff_count staff (password BENCH_PASSWORD),
+    weekday shifts with roster entries for weeks weeks and an attendance
+    record for each shift but those of the last week. Rows are written
+    with executemany inserts and every user shares one password hash.
+    :param first_week: Monday of the first week; defaults to weeks - 1 weeks
+        before the current one, so the last week is this week
+    :return: BenchData
+    """
+    first_week = week_of(first_week or datetime.date.today() - datetime.timedelta(weeks=weeks - 1))
+    db.drop_all()
+    db.create_all()
+    password = hash_password(BENCH_PASSWORD)
+    users = [
+        {'user_id': i, 'name': f"Admin {i}", 'email': f"admin{i}@example.com", 'password': password, 'type': 'admin'}
+        for i in range(1, ADMIN_COUNT + 1)
+    ] + [
+        {'user_id': ADMIN_COUNT + i, 'name': f"Staff {i}", 'email': f"staff{i}@example.com", 'password': password,
+         'type': 'staff'}
+        for i in range(1, staff_count + 1)
+    ]
+    db.session.execute(db.insert(User), users)
+    db.session.execute(db.insert(Admin.__table__), [
+        {'user_id': user['user_id'], 'role': 'admin'} for user in users[:ADMIN_COUNT]
+    ])
+    db.session.execute(db.insert(Staff.__table__), [
+        {'user_id': user['user_id'], 'role': 'staff'} for user in users[ADMIN_COUNT:]
+    ])
+    staff = [(user['user_id'], user['email']) for user in users[ADMIN_COUNT:]]
+
+    shifts, rosters, records, burst_shifts = [], [], [], {}
+    days = [first_week + datetime.timedelta(weeks=week, days=day) for week in range(weeks) for day in range(5)]
+    last_week = first_week + datetime.timedelta(weeks=weeks - 1)
+
+    def flush():
+        db.session.execute(db.insert(Shift.__table__), shifts)
+        db.session.execute(db.insert(Roster.__table__), rosters)
+        if records:
+            db.session.execute(db.insert(AttendanceRecord.__table__), records)
+        shifts.clear()
+        rosters.clear()
+        records.clear()
+
+    shift_id = 0
+    for day in days:
+        for user_id, _ in staff:
+            shift_id += 1
+            shifts.append({'id': shift_id, 'user_id': user_id, 'weekStart': day, 'weekEnd': day})
+            rosters.append({'shiftID': shift_id, 'userID': user_id})
+            if day >= last_week:
+                if day == last_week:
+                    burst_shifts[user_id] = shift_id
+                continue
+            # clock-ins spread over 07:50 to 08:09, eight hours each
+            time_in = datetime.datetime.combine(day, datetime.time(7, 50)) + datetime.timedelta(minutes=shift_id % 20)
+            records.append({'shiftID': shift_id, 'userID': user_id, 'timeIn': time_in,
+                            'timeout': time_in + datetime.timedelta(hours=8)})
+        if len(shifts) >= INSERT_CHUNK:
+            flush()
+    if shifts:
+        flush()
+    db.session.commit()
+    # the inserts above bypass the rollup's mapper events
+    rebuild_rollups()
+    return BenchData([user['user_id'] for user in users[:ADMIN_COUNT]], staff, first_week, weeks, burst_shifts)
+
+
+def _token(user_id):
+    return {'Authorization': f"Bearer {create_access_token(identity=str(user_id))}"}
+
+
+def _login(data, index):
+    _, email = data.staff[index % len(data.staff)]
+    return 'POST', '/api/login', {'json': {'username': email, 'password': BENCH_PASSWORD}}
+
+
+def _roster(data, index):
+    week = data.first_week + datetime.timedelta(weeks=index % data.weeks)
+    pages = max(1, -(-len(data.staff) * 5 // 50))
+    return 'GET', f"/api/roster?week_start={week.isoformat()}&page={index // data.weeks % pages + 1}", \
+        {'headers': _token(data.admins[index % len(data.admins)])}
+
+
+def _clock_in_burst(data, index):
+    # the whole staff clocks in for the last week's Monday shift; further
+    # rounds alternate clocking out and back in
+    user_id, email = data.staff[index % len(data.staff)]
+    shift_id = data.burst_shifts[user_id]
+    round_number = index // len(data.staff)
+    time = datetime.datetime.combine(data.first_week + datetime.timedelta(weeks=data.weeks - 1), datetime.time(8)) \
+        + datetime.timedelta(minutes=round_number)
+    event = {'type': 'out' if round_number % 2 else 'in', 'staff': email, 'shift_id': shift_id,
+             'time': time.isoformat()}
+    return 'POST', '/api/attendance/events', {'json': {'events': [event]}, 'headers': _token(user_id)}
+
+
+def _schedule_bulk(data, index):
+    # a week of shifts for SCHEDULE_GROUP staff, in weeks after the generated ones
+    groups = max(1, -(-len(data.staff) // SCHEDULE_GROUP))
+    week = data.first_week + datetime.timedelta(weeks=data.weeks + index // groups)
+    group = data.staff[index % groups * SCHEDULE_GROUP:][:SCHEDULE_GROUP]
+    entries = [
+        {'staff': email, 'start': week.isoformat(), 'end': (week + datetime.timedelta(days=6)).isoformat(),
+         'pattern': 'weekdays'}
+        for _, email in group
+    ]
+    return 'POST', '/api/roster/bulk', {'json': {'entries': entries}, 'headers': _token(data.admins[0])}
+
+
+def _report(data, index):
+    week = data.first_week + datetime.timedelta(weeks=index % data.weeks)
+    end = week + datetime.timedelta(days=6)
+    return 'GET', f"/api/reports/shifts?week_start={week.isoformat()}&week_end={end.isoformat()}", \
+        {'headers': _token(data.admins[index % len(data.admins)])}
+
+
+Scenario = namedtuple('Scenario', 'request requests description')
+
+# name -> builds one request of the scenario as (method, path, test client
+# keyword arguments) from BenchData and the request's index; how many
+# requests to time by default; and what it does
+SCENARIOS = {
+    'login': Scenario(_login, 50, "POST /api/login as a staff member (one KDF run each)"),
+    'roster': Scenario(_roster, 200, "GET /api/roster for each generated week and page"),
+    'clock-in-burst': Scenario(_clock_in_burst, 500, "POST /api/attendance/events, every staff member clocking in at once"),
+    'schedule-bulk': Scenario(_schedule_bulk, 50, f"POST /api/roster/bulk, a week of shifts for {SCHEDULE_GROUP} staff"),
+    'report': Scenario(_report, 200, "GET /api/reports/shifts for each generated week")
+}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of values."""
+    values = sorted(values)
+    return values[min(int(len(values) * pct / 100), len(values) - 1)]
+
+
+def run_scenario(client, data, name, requests=None, warmup=5):
+    """
+    Send a scenario's requests one after another through client and time
+    each one. The first warmup requests are sent untimed.
+    :return: Dict of requests, errors (responses with status 400 or above),
+        seconds, throughput (requests per second) and p50/p95/p99/max in ms
+    """
+    scenario = SCENARIOS[name]
+    requests = requests or scenario.requests
+    for index in range(warmup):
+        method, path, kwargs = scenario.request(data, index)
+        client.open(path, method=method, **kwargs)
+    # built up front so only the requests themselves are timed
+    prepared = [scenario.request(data, index) for index in range(warmup, warmup + requests)]
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for method, path, kwargs in prepared:
+        sent = time.perf_counter()
+        response = client.open(path, method=method, **kwargs)
+        latencies.append(time.perf_counter() - sent)
+        errors += response.status_code >= 400
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': requests,
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'throughput': round(requests / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'max_ms': round(max(latencies) * 1000, 2)
+    }
+
+
+def compare_to_baseline(results, baseline, tolerance=0.2):
+    """
+    Scenarios in both results and baseline whose p95 latency grew, or whose
+    throughput fell, by more than tolerance (a fraction).
+    :return: List of (scenario, metric, baseline value, current value)
+    """
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if current['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append((name, 'p95_ms', before['p95_ms'], current['p95_ms']))
+        if current['throughput'] < before['throughput'] * (1 - tolerance):
+            regressions.append((name, 'throughput', before['throughput'], current['throughput']))
+    return regressions
+
+
+def load_baseline(path):
+    """Scenario results saved by save_baseline."""
+    with open(path) as baseline:
+        return json.load(baseline)['scenarios']
+
+
+def save_baseline(path, results, staff_count, weeks):
+    with open(path, 'w') as baseline:
+        json.dump({
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'staff': staff_count,
+            'weeks': weeks,
+            'scenarios': results
+        }, baseline, indent=2)
@@ -0,0 +1,151 @@
+import contextlib, io, json, logging, os, socket, socketserver, subprocess, sys
+
+logger = logging.getLogger(__name__)
+
+# commands the server runs; everything else goes through `flask` as usual
+SERVED_COMMANDS = ('clock-in', 'clock-out', 'schedule-shift', 'manual-schedule-shift')
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the app's instance folder, found without importing Flask
+DEFAULT_SOCKET = os.path.join(PROJECT_DIR, 'instance', 'commands.sock')
+SOCKET_ENV = 'FLASK_COMMAND_SOCKET'
+REPLY_TIMEOUT = 60
+# seconds a client has to send its request line; the server runs one
+# connection at a time, so a silent client would hold up everyone else
+REQUEST_TIMEOUT = 5
+
+
+def socket_path(path=None):
+    return path or os.environ.get(SOCKET_ENV) or DEFAULT_SOCKET
+
+
+class _CommandHandler(socketserver.StreamRequestHandler):
+    timeout = REQUEST_TIMEOUT
+
+    def handle(self):
+        try:
+            line = self.rfile.readline()
+        except TimeoutError:
+            line = None
+        try:
+            if line is None:
+                reply = {'stdout': '', 'stderr': "Error: Timed out waiting for the command request.\n", 'exit_code': 2}
+            else:
+                request = json.loads(line)
+                reply = self.server.run_command(request['command'], [str(arg) for arg in request.get('args', [])])
+        except (ValueError, KeyError, TypeError):
+            reply = {'stdout': '', 'stderr': "Error: Malformed command request.\n", 'exit_code': 2}
+        try:
+            self.wfile.write(json.dumps(reply).encode() + b'\n')
+        except OSError:
+            pass  # client went away
+
+
+class CommandServer(socketserver.UnixStreamServer):
+    """
+    Runs the app's click commands named in commands for clients on a Unix
+    socket (see send_command), one at a time, each in its own app context.
+    The app, its connection pool and its per-process caches stay warm
+    between commands. Replies carry the command's stdout, stderr and exit
+    code, so a client can reproduce the command's output exactly.
+    """
+
+    def __init__(self, app, path=None, commands=SERVED_COMMANDS):
+        self.app = app
+        self.commands = commands
+        path = socket_path(path)
+        _remove_stale_socket(path)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # owner-only from the moment it exists; run terminals as the same user
+        previous = os.umask(0o177)
+        try:
+            super().__init__(path, _CommandHandler)
+        finally:
+            os.umask(previous)
+
+    def run_command(self, name, args):
+        import click
+
+        command = self.app.cli.get_command(None, name) if name in self.commands else None
+        if command is None:
+            return {'stdout': '', 'stderr': f"Error: The command server does not run '{name}'.\n", 'exit_code': 2}
+        stdout, stderr = io.StringIO(), io.StringIO()
+        exit_code, failure = 0, None
+        # messages go straight to the reply; logging keeps the real stderr
+        with self.app.app_context(), contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                result = command.main(args=args, prog_name=f"flask {name}", standalone_mode=False)
+                # --help and other early exits return their exit code
+                exit_code = result if isinstance(result, int) else 0
+            except click.ClickException as e:
+                e.show(file=stderr)
+                exit_code = e.exit_code
+            except click.Abort:
+                stderr.write("Aborted!\n")
+                exit_code = 1
+            except SystemExit as e:
+                if e.code is not None and not isinstance(e.code, int):
+                    stderr.write(f"{e.code}\n")
+                exit_code = e.code if isinstance(e.code, int) else int(e.code is not None)
+            except Exception as e:
+                failure = e
+                stderr.write(f"Error: {e}\n")
+                exit_code = 1
+        if failure is not None:
+            logger.error("Command %s %s failed", name, args, exc_info=failure)
+        return {'stdout': stdout.getvalue(), 'stderr': stderr.getvalue(), 'exit_code': exit_code}
+
+    def server_close(self):
+        super().server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.server_address)
+
+
+def _remove_stale_socket(path):
+    if not os.path.exists(path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            os.unlink(path)  # left behind by a server that did not shut down
+            return
+    raise RuntimeError(f"A command server is already listening on {path}.")
+
+
+def send_command(args, path=None, timeout=REPLY_TIMEOUT):
+    """
+    Run a command (argument list, starting with its name) on the command
+    server and return its reply dict (stdout, stderr, exit_code).
+    :raises OSError: when no server is listening on path
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(socket_path(path))
+        client.sendall(json.dumps({'command': args[0], 'args': list(args[1:])}).encode() + b'\n')
+        with client.makefile('rb') as reply:
+            return json.loads(reply.readline())
+
+
+def main(argv=None):
+    """
+    Thin client: `python -m App.command_server clock-in <email> <shift_id> <time>`.
+    Imports nothing beyond the standard library, so a punch costs one
+    interpreter start and a round trip. Runs the command through wsgi.py
+    when no server is listening.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in SERVED_COMMANDS:
+        print(f"Usage: python -m App.command_server {{{'|'.join(SERVED_COMMANDS)}}} [ARGS]...", file=sys.stderr)
+        return 2
+    try:
+        reply = send_command(argv)
+    except (FileNotFoundError, ConnectionRefusedError):
+        # no server; run it the slow way with the same output
+        return subprocess.call([sys.executable, os.path.join(PROJECT_DIR, 'wsgi.py')] + argv, cwd=PROJECT_DIR)
+    sys.stdout.write(reply['stdout'])
+    sys.stderr.write(reply['stderr'])
+    return reply['exit_code']
+
+
+if __name__ == '__main__':
+    sys.exit(main())
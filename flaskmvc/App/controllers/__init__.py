@@ -1,3 +1,14 @@
 from .user import *
 from .auth import *
 from .initialize import *
+from .roster import *
+from .rollup import *
+from .report import *
+from .my_week import *
+from .hours import *
+from .schedule import *
+from .shift_template import *
+from .change_request import *
+from .attendance import *
+from .export import *
+from .punch_queue import *
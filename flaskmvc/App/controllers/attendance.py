@@ -0,0 +1,255 @@
+import datetime
+from collections import defaultdict
+
+from flask import current_app
+
+from App.cache import TTLCache
+from App.database import db, bulk_insert
+from App.models.staff import Staff
+from App.models.Shift import Shift
+from App.models.attendance_record import AttendanceRecord
+from .rollup import add_record, apply_rollup_deltas, new_deltas
+from .shift_template import materialize_template_shifts, parse_shift_id, shift_ref
+
+CLOCK_IN = 'in'
+CLOCK_OUT = 'out'
+
+# Staff and shift ownership change rarely compared to how often punches
+# arrive, so validation reads go through short-lived per-process caches.
+staff_cache = TTLCache(maxsize=20000, ttl=300)    # email -> (user_id, name)
+shift_cache = TTLCache(maxsize=100000, ttl=300)   # shift id -> owner user_id
+
+
+def _parse_time(value):
+    if isinstance(value, datetime.datetime):
+        return value
+    return datetime.datetime.fromisoformat(value)
+
+
+def _lookup_staff(emails):
+    staff = staff_cache.get_many(emails)
+    missing = set(emails) - set(staff)
+    if missing:
+        rows = db.session.execute(
+            db.select(Staff.email, Staff.user_id, Staff.name).filter(Staff.email.in_(missing))
+        ).all()
+        for row in rows:
+            staff[row.email] = (row.user_id, row.name)
+            staff_cache.set(row.email, (row.user_id, row.name))
+    return staff
+
+
+def _lookup_shift_owners(shift_ids):
+    owners = shift_cache.get_many(shift_ids)
+    missing = set(shift_ids) - set(owners)
+    if missing:
+        rows = db.session.execute(db.select(Shift.id, Shift.user_id).filter(Shift.id.in_(missing))).all()
+        for row in rows:
+            owners[row.id] = row.user_id
+            shift_cache.set(row.id, row.user_id)
+    return owners
+
+
+def _open_records(pairs):
+    """Open attendance records keyed by (shift id, user id), fetched in one query."""
+    if not pairs:
+        return {}
+    shift_ids = {shift_id for shift_id, _ in pairs}
+    rows = db.session.execute(
+        db.select(AttendanceRecord.attendanceID, AttendanceRecord.shiftID, AttendanceRecord.userID, AttendanceRecord.timeIn)
+        .filter(AttendanceRecord.shiftID.in_(shift_ids), AttendanceRecord.timeout.is_(None))
+        .order_by(AttendanceRecord.attendanceID)
+    ).all()
+    records = {}
+    for row in rows:
+        records.setdefault((row.shiftID, row.userID), {'attendanceID': row.attendanceID, 'timeIn': row.timeIn})
+    return records
+
+
+def _recorded_punches(events):
+    """(type, shift id, user id, time) of the events already on an attendance record."""
+    shift_ids = {event['shift_id'] for event in events}
+    times = {event['time'] for event in events}
+    if not shift_ids:
+        return set()
+    rows = db.session.execute(
+        db.select(AttendanceRecord.shiftID, AttendanceRecord.userID, AttendanceRecord.timeIn, AttendanceRecord.timeout)
+        .filter(
+            AttendanceRecord.shiftID.in_(shift_ids),
+            db.or_(AttendanceRecord.timeIn.in_(times), AttendanceRecord.timeout.in_(times))
+        )
+    ).all()
+    recorded = set()
+    for row in rows:
+        recorded.add((CLOCK_IN, row.shiftID, row.userID, row.timeIn))
+        if row.timeout is not None:
+            recorded.add((CLOCK_OUT, row.shiftID, row.userID, row.timeout))
+    return recorded
+
+
+def _parse_events(events):
+    parsed = []
+    for index, event in enumerate(events):
+        try:
+            kind = event['type']
+            if kind not in (CLOCK_IN, CLOCK_OUT) or not isinstance(event['staff'], str):
+                raise ValueError
+            parsed.append({
+                'index': index,
+                'type': kind,
+                'staff': event['staff'],
+                'shift_id': parse_shift_id(event['shift_id']),
+                'time': _parse_time(event['time'])
+            })
+            if parsed[-1]['time'].tzinfo is not None:
+                # stored times are naive local times, as the rest of the app uses
+                parsed[-1] = {'index': index, 'error': "Event times must be local times without a UTC offset."}
+        except (KeyError, TypeError, ValueError):
+            parsed.append({
+                'index': index,
+                'error': "Events need type ('in' or 'out'), staff, shift_id and an ISO time."
+            })
+    return parsed
+
+
+def _resolve_template_shifts(events, staff):
+    """
+    Replace the shift references (see shift_ref) in parsed events with shift
+    ids. A clock-in materialises its template occurrence for the template's
+    own staff member; a clock-out only finds one that was clocked in. Refs
+    left unresolved stay as strings and fail the owner check.
+    """
+    claims, lookups = defaultdict(set), set()
+    for event in events:
+        if isinstance(event['shift_id'], tuple) and event['staff'] in staff:
+            if event['type'] == CLOCK_IN:
+                claims[event['shift_id']].add(staff[event['staff']][0])
+            else:
+                lookups.add(event['shift_id'])
+    if not claims and not lookups:
+        return
+    ids = materialize_template_shifts(claims, owners=claims)
+    ids.update(materialize_template_shifts(lookups - set(ids), create=False))
+    for event in events:
+        if isinstance(event['shift_id'], tuple):
+            event['shift_id'] = ids.get(event['shift_id'], shift_ref(*event['shift_id']))
+
+
+def record_punch_events(events, skip_recorded=False):
+    """
+    Validate and write a batch of clock-in/clock-out events in one transaction.
+    Staff and shift data are read through per-process caches and open
+    attendance records are fetched with one query for the whole batch. New
+    records are written with a single executemany insert and close-outs with
+    a single executemany update by primary key. Events are applied in order,
+    so a batch may clock someone in and back out.
+    :param events: List of dicts with 'type' ('in' or 'out'), 'staff' (email),
+        'shift_id' (a shift id, or a template occurrence's reference, which a
+        clock-in gives its Shift row) and 'time' (ISO datetime string or datetime)
+    :param skip_recorded: Leave out events whose time is already on a record
+        for the same staff member and shift, for replaying events that may have
+        been committed before (see PunchQueue.recover); they are reported as
+        'ok' with 'duplicate' set
+    :return: One result dict per event, in the same order, with a 'status' of
+        'ok' (plus 'attendance_id') or 'error' (plus 'error')
+    """
+    parsed = _parse_events(events)
+    valid = [event for event in parsed if 'error' not in event]
+    staff = _lookup_staff({event['staff'] for event in valid})
+    _resolve_template_shifts(valid, staff)
+    shift_ids = {event['shift_id'] for event in valid if isinstance(event['shift_id'], int)}
+    owners = _lookup_shift_owners(shift_ids)
+    open_records = _open_records({
+        (event['shift_id'], staff[event['staff']][0]) for event in valid
+        if event['staff'] in staff and event['shift_id'] in shift_ids
+    })
+    recorded = _recorded_punches([event for event in valid if event['shift_id'] in shift_ids]) if skip_recorded else set()
+
+    results, inserts, updates, deltas = [], [], {}, new_deltas()
+    for event in parsed:
+        result = {'index': event['index']}
+        results.append(result)
+        if 'error' in event:
+            result.update(status='error', error=event['error'])
+            continue
+        if event['staff'] not in staff:
+            result.update(status='error', error=f"Staff with email '{event['staff']}' not found.")
+            continue
+        user_id, name = staff[event['staff']]
+        if owners.get(event['shift_id']) != user_id:
+            result.update(status='error', error=f"Shift with ID '{event['shift_id']}' for staff '{event['staff']}' not found.")
+            continue
+        result.update(type=event['type'], user_id=user_id, name=name, shift_id=event['shift_id'])
+        if (event['type'], event['shift_id'], user_id, event['time']) in recorded:
+            result.update(status='ok', duplicate=True)
+            continue
+        key = (event['shift_id'], user_id)
+        record = open_records.get(key)
+        if event['type'] == CLOCK_IN:
+            if record is not None:
+                result.update(status='error', error=f"Staff '{event['staff']}' is already clocked in for shift {event['shift_id']}.")
+                continue
+            record = {'shiftID': event['shift_id'], 'userID': user_id, 'timeIn': event['time'], 'timeout': None, 'result': result}
+            inserts.append(record)
+            open_records[key] = record
+        else:
+            if record is None:
+                result.update(status='error', error=f"No active attendance record found for shift {event['shift_id']} and staff {event['staff']}.")
+                continue
+            if event['time'] < record['timeIn']:
+                result.update(status='error', error="Clock-out time is before the clock-in time.")
+                continue
+            if 'result' in record:
+                # clocked in earlier in this batch; close the pending insert
+                record['timeout'] = event['time']
+                record.setdefault('closed_by', []).append(result)
+            else:
+                updates[record['attendanceID']] = {'attendanceID': record['attendanceID'], 'timeout': event['time']}
+                result['attendance_id'] = record['attendanceID']
+            add_record(deltas, user_id, record['timeIn'], event['time'])
+            del open_records[key]
+        result['status'] = 'ok'
+
+    if inserts or updates:
+        try:
+            if inserts:
+                ids = bulk_insert(AttendanceRecord, [
+                    {key: record[key] for key in ('shiftID', 'userID', 'timeIn', 'timeout')} for record in inserts
+                ], AttendanceRecord.attendanceID, execution_options={'rollup_maintained': True})
+                for record, attendance_id in zip(inserts, ids):
+                    for result in [record['result']] + record.get('closed_by', []):
+                        result['attendance_id'] = attendance_id
+            if updates:
+                db.session.execute(
+                    db.update(AttendanceRecord), list(updates.values()),
+                    execution_options={'rollup_maintained': True}
+                )
+            apply_rollup_deltas(deltas)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    return results
+
+
+def submit_punch_events(events):
+    """
+    Write punch events through the app's punch queue (see punch_queue.py), or
+    synchronously with record_punch_events when the queue is disabled.
+    Returns one result per event.
+    """
+    queue = current_app.extensions.get('punch_queue')
+    if queue is None:
+        return record_punch_events(events)
+    results = queue.submit(events)
+    return [dict(result, index=index) for index, result in enumerate(results)]
+
+
+def clock_in(staff_email, shift_id, time_in):
+    """Clock a staff member in for one of their shifts; returns the event result dict."""
+    return submit_punch_events([{'type': CLOCK_IN, 'staff': staff_email, 'shift_id': shift_id, 'time': time_in}])[0]
+
+
+def clock_out(staff_email, shift_id, time_out):
+    """Clock a staff member out of their open record for a shift; returns the event result dict."""
+    return submit_punch_events([{'type': CLOCK_OUT, 'staff': staff_email, 'shift_id': shift_id, 'time': time_out}])[0]
@@ -1,25 +1,92 @@
-from flask_jwt_extended import create_access_token, jwt_required, JWTManager, get_jwt_identity, verify_jwt_in_request
+from flask import g
+from flask_jwt_extended import create_access_token, jwt_required, JWTManager, get_jwt_identity, get_current_user, verify_jwt_in_request
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import make_transient_to_detached
 
+from App.cache import TTLCache
+from App.hashing import needs_rehash
 from App.models import User
 from App.database import db
 
+# Per-process cache of detached User snapshots keyed by user id, shared by
+# the JWT user lookup and the template context processor. Entries are
+# dropped when the user row is updated or deleted through the ORM, and
+# expire after IDENTITY_CACHE_TTL seconds to bound staleness across workers.
+identity_cache = TTLCache(maxsize=10000, ttl=60)
+
 def login(username, password):
-  result = db.session.execute(db.select(User).filter_by(username=username))
+  # users sign in with their email address
+  result = db.session.execute(db.select(User).filter_by(email=username))
   user = result.scalar_one_or_none()
   if user and user.check_password(password):
+    if needs_rehash(user.password):
+      # KDF parameters changed since this hash was made; upgrade it now
+      # that the plain password is at hand
+      user.set_password(password)
+      db.session.commit()
     # Store ONLY the user id as a string in JWT 'sub'
-    return create_access_token(identity=str(user.id))
+    return create_access_token(identity=str(user.user_id))
   return None
 
 
+def _snapshot(user):
+  mapper = inspect(user).mapper
+  copy = mapper.class_manager.new_instance()
+  for attr in mapper.column_attrs:
+    setattr(copy, attr.key, getattr(user, attr.key))
+  make_transient_to_detached(copy)
+  return copy
+
+
+def load_user(user_id):
+  """
+  Get a User by id through the identity cache.
+  On a hit the cached snapshot is merged into the current session without
+  emitting any SQL; on a miss the user is loaded and a snapshot is cached.
+  """
+  cached = identity_cache.get(user_id)
+  if cached is not None:
+    return db.session.merge(cached, load=False)
+  # load subclass columns (e.g. Staff.role) in the same query
+  user = db.session.scalar(
+    db.select(db.with_polymorphic(User, '*')).filter(User.user_id == user_id)
+  )
+  if user is not None:
+    identity_cache.set(user_id, _snapshot(user))
+  return user
+
+
+def get_identity_cache_stats():
+  return identity_cache.stats()
+
+
+@event.listens_for(User, 'after_update', propagate=True)
+@event.listens_for(User, 'after_delete', propagate=True)
+def _invalidate_identity(mapper, connection, target):
+  identity_cache.pop(target.user_id)
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _invalidate_identities_on_bulk_write(orm_execute_state):
+  # bulk UPDATE/DELETE statements skip the mapper events above
+  if (orm_execute_state.is_update or orm_execute_state.is_delete) and orm_execute_state.bind_mapper is not None \
+      and orm_execute_state.bind_mapper.isa(inspect(User)):
+    identity_cache.clear()
+
+
 def setup_jwt(app):
+  # also called by the async API before a lite app's web layer is added
+  if 'flask-jwt-extended' in app.extensions:
+    return app.extensions['flask-jwt-extended']
   jwt = JWTManager(app)
+  identity_cache.ttl = app.config.get('IDENTITY_CACHE_TTL', 60)
+  identity_cache.maxsize = app.config.get('IDENTITY_CACHE_SIZE', 10000)
 
   # Always store a string user id in the JWT identity (sub),
   # whether a User object or a raw id is passed.
   @jwt.user_identity_loader
   def user_identity_lookup(identity):
-    user_id = getattr(identity, "id", identity)
+    user_id = getattr(identity, "user_id", identity)
     return str(user_id) if user_id is not None else None
 
   @jwt.user_lookup_loader
@@ -30,7 +97,7 @@ def setup_jwt(app):
       user_id = int(identity)
     except (TypeError, ValueError):
       return None
-    return db.session.get(User, user_id)
+    return load_user(user_id)
 
   return jwt
 
@@ -40,13 +107,14 @@ def add_auth_context(app):
   @app.context_processor
   def inject_user():
       try:
-          verify_jwt_in_request()
-          identity = get_jwt_identity()
-          user_id = int(identity) if identity is not None else None
-          current_user = db.session.get(User, user_id) if user_id is not None else None
+          # Reuse the user loaded by @jwt_required when the view already
+          # verified the token; otherwise verify once here.
+          if getattr(g, '_jwt_extended_jwt_user', None) is None:
+              verify_jwt_in_request(optional=True)
+          current_user = get_current_user()
           is_authenticated = current_user is not None
       except Exception as e:
           print(e)
           is_authenticated = False
           current_user = None
-      return dict(is_authenticated=is_authenticated, current_user=current_user)
\ No newline at end of file
+      return dict(is_authenticated=is_authenticated, current_user=current_user)
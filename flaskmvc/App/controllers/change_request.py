@@ -0,0 +1,103 @@
+import datetime
+
+from App.database import db
+from App.models.user import User
+from App.models.Shift import Shift
+from App.models.shift_change_request import RequestStatus, ShiftChangeRequest
+
+MAX_DECISIONS = 1000
+
+
+def _encode_cursor(row):
+    return f"{row.created.isoformat()}~{row.id}"
+
+
+def _decode_cursor(cursor):
+    created, _, request_id = cursor.rpartition('~')
+    return datetime.datetime.fromisoformat(created), int(request_id)
+
+
+def list_pending_requests(after=None, limit=50):
+    """
+    One keyset page of the pending queue, oldest first, read through
+    ix_change_requests_status_created.
+    :param after: cursor returned with the previous page
+    :param limit: page size (at most 1000)
+    :return: (list of request dicts, cursor for the next page or None)
+    :raises ValueError: if after is not a cursor from this function
+    """
+    limit = max(min(limit, 1000), 1)
+    query = (
+        db.select(
+            ShiftChangeRequest.id, ShiftChangeRequest.shiftID, ShiftChangeRequest.userID,
+            ShiftChangeRequest.details, ShiftChangeRequest.created,
+            Shift.weekStart, Shift.weekEnd, User.name, User.email
+        )
+        .join(Shift, Shift.id == ShiftChangeRequest.shiftID)
+        .join(User, User.user_id == ShiftChangeRequest.userID)
+        .filter(ShiftChangeRequest.status == RequestStatus.PENDING)
+        .order_by(ShiftChangeRequest.created, ShiftChangeRequest.id)
+    )
+    if after:
+        created, request_id = _decode_cursor(after)
+        query = query.filter(db.or_(
+            ShiftChangeRequest.created > created,
+            db.and_(ShiftChangeRequest.created == created, ShiftChangeRequest.id > request_id)
+        ))
+    rows = db.session.execute(query.limit(limit + 1)).all()
+    requests = [
+        {
+            'id': row.id,
+            'shift_id': row.shiftID,
+            'user_id': row.userID,
+            'name': row.name,
+            'email': row.email,
+            'details': row.details,
+            'created': row.created.isoformat(),
+            'week_start': row.weekStart.isoformat(),
+            'week_end': row.weekEnd.isoformat()
+        }
+        for row in rows[:limit]
+    ]
+    next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return requests, next_cursor
+
+
+def decide_change_requests(admin_id, approve=(), deny=()):
+    """
+    Approve and deny many pending requests in one transaction. The pending
+    rows are locked first (where the database supports it), so two admins
+    deciding the same request cannot both succeed.
+    :param admin_id: user id recorded as the decider
+    :param approve: request ids to approve
+    :param deny: request ids to deny
+    :return: Dict with the 'approved' and 'denied' ids, and the 'skipped'
+        ids that were not pending (already decided or unknown)
+    :raises ValueError: if an id is in both lists or more than MAX_DECISIONS are given
+    """
+    approve, deny = {int(i) for i in approve}, {int(i) for i in deny}
+    if approve & deny:
+        raise ValueError(f"Requests {sorted(approve & deny)} are both approved and denied.")
+    if len(approve) + len(deny) > MAX_DECISIONS:
+        raise ValueError(f"At most {MAX_DECISIONS} requests may be decided at once.")
+    now = datetime.datetime.now()
+    decided = {}
+    try:
+        pending = set(db.session.scalars(
+            db.select(ShiftChangeRequest.id)
+            .filter(ShiftChangeRequest.id.in_(approve | deny), ShiftChangeRequest.status == RequestStatus.PENDING)
+            .with_for_update()
+        ))
+        for status, ids in ((RequestStatus.APPROVED, approve & pending), (RequestStatus.DENIED, deny & pending)):
+            if ids:
+                db.session.execute(
+                    db.update(ShiftChangeRequest)
+                    .filter(ShiftChangeRequest.id.in_(ids), ShiftChangeRequest.status == RequestStatus.PENDING)
+                    .values(status=status, decided=now, decidedBy=admin_id)
+                )
+            decided[status.value] = sorted(ids)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return {**decided, 'skipped': sorted((approve | deny) - pending)}
@@ -0,0 +1,197 @@
+import csv, datetime, io
+
+from App.database import db
+from App.models.user import User
+from App.models.Shift import Shift
+from App.models.attendance_record import AttendanceRecord
+
+EXPORT_FIELDS = [
+    'attendance_id',
+    'shift_id',
+    'user_id',
+    'name',
+    'email',
+    'shift_date',
+    'time_in',
+    'time_out',
+    'seconds'
+]
+EXPORT_FORMATS = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet'}
+EXPORT_CHUNK_SIZE = 5000
+
+
+def export_cursor(row):
+    """Token that resumes an export after row (the last row received)."""
+    return f"{row.timeIn.isoformat()}~{row.attendanceID}"
+
+
+def _decode_export_cursor(cursor):
+    time_in, _, attendance_id = cursor.rpartition('~')
+    try:
+        return datetime.datetime.fromisoformat(time_in), int(attendance_id)
+    except ValueError:
+        raise ValueError(f"Invalid export cursor '{cursor}'.") from None
+
+
+def _export_query(start, end, staff=None, after=None):
+    # ordered by (timeIn, attendanceID) so ix_attendance_timein serves
+    # both the range and the order, and the pair is a stable resume point
+    query = (
+        db.select(
+            AttendanceRecord.attendanceID, AttendanceRecord.shiftID, AttendanceRecord.userID,
+            User.name, User.email, Shift.weekStart, AttendanceRecord.timeIn, AttendanceRecord.timeout
+        )
+        .join(User, User.user_id == AttendanceRecord.userID)
+        .join(Shift, Shift.id == AttendanceRecord.shiftID)
+        .filter(
+            AttendanceRecord.timeIn >= datetime.datetime.combine(start, datetime.time.min),
+            AttendanceRecord.timeIn <= datetime.datetime.combine(end, datetime.time.max)
+        )
+        .order_by(AttendanceRecord.timeIn, AttendanceRecord.attendanceID)
+        .execution_options(use_replica=True)
+    )
+    if staff:
+        ids = [int(member) for member in staff if str(member).isdigit()]
+        emails = [member for member in staff if not str(member).isdigit()]
+        query = query.filter(db.or_(User.user_id.in_(ids), User.email.in_(emails)))
+    if after:
+        time_in, attendance_id = _decode_export_cursor(after)
+        query = query.filter(db.or_(
+            AttendanceRecord.timeIn > time_in,
+            db.and_(AttendanceRecord.timeIn == time_in, AttendanceRecord.attendanceID > attendance_id)
+        ))
+    return query
+
+
+def iter_attendance_chunks(start, end, staff=None, after=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield the matching attendance rows in lists of at most chunk_size,
+    read through a server-side cursor where the driver supports one, so
+    memory stays flat however many rows match.
+    """
+    query = _export_query(start, end, staff, after).execution_options(yield_per=chunk_size)
+    for partition in db.session.execute(query).partitions():
+        yield partition
+
+
+def _tracked(chunks, progress):
+    # resumes only once the consumer asks for more, i.e. after it has
+    # written everything made from the previous chunk
+    done = 0
+    for chunk in chunks:
+        yield chunk
+        done += len(chunk)
+        progress(done, export_cursor(chunk[-1]))
+
+
+def _export_values(row):
+    # unpacked rather than read by name; this runs once per exported row
+    attendance_id, shift_id, user_id, name, email, shift_date, time_in, time_out = row
+    seconds = int((time_out - time_in).total_seconds()) if time_out else None
+    return attendance_id, shift_id, user_id, name, email, shift_date, time_in, time_out, seconds
+
+
+def _csv_values(row):
+    attendance_id, shift_id, user_id, name, email, shift_date, time_in, time_out, seconds = _export_values(row)
+    return (attendance_id, shift_id, user_id, name, email, shift_date.isoformat(), time_in.isoformat(),
+            time_out.isoformat() if time_out else None, seconds)
+
+
+def _csv_chunks(chunks, header=True):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    for chunk in chunks:
+        writer.writerows(map(_csv_values, chunk))
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _ChunkSink:
+    """Write-only file object that hands back what was written since the last drain."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def _parquet_modules():
+    try:
+        import pyarrow, pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet export needs the pyarrow package installed.") from None
+    return pyarrow, pyarrow.parquet
+
+
+def _parquet_chunks(chunks):
+    pa, pq = _parquet_modules()
+    schema = pa.schema([
+        ('attendance_id', pa.int64()), ('shift_id', pa.int64()), ('user_id', pa.int64()),
+        ('name', pa.string()), ('email', pa.string()), ('shift_date', pa.date32()),
+        ('time_in', pa.timestamp('us')), ('time_out', pa.timestamp('us')), ('seconds', pa.int64())
+    ])
+    sink = _ChunkSink()
+    # one row group per chunk; only the footer is held until the end
+    writer = pq.ParquetWriter(sink, schema)
+    for chunk in chunks:
+        columns = list(zip(*(_export_values(row) for row in chunk)))
+        writer.write_table(pa.Table.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema
+        ))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def export_attendance(start, end, format='csv', staff=None, after=None, chunk_size=EXPORT_CHUNK_SIZE, progress=None):
+    """
+    Stream attendance records with timeIn from start to end (dates,
+    inclusive) as CSV or Parquet. Arguments are checked before anything
+    is read, so errors can still be reported before a response starts.
+    A resumed CSV export has no header row, so it can be appended to the
+    interrupted one.
+    :param format: 'csv' or 'parquet' (needs pyarrow)
+    :param staff: optional list of staff emails or user ids
+    :param after: export_cursor() of the last row already received, to resume
+    :param progress: optional callable given the rows written so far and the
+        cursor to resume from, once the output of each chunk has been consumed
+    :return: Generator of bytes
+    :raises ValueError: for an unknown format, a reversed range or a bad cursor
+    :raises RuntimeError: for parquet without pyarrow
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{format}'; use one of {', '.join(EXPORT_FORMATS)}.")
+    if end < start:
+        raise ValueError("The export range must run forwards.")
+    if after:
+        _decode_export_cursor(after)
+    if format == 'parquet':
+        _parquet_modules()
+    chunks = iter_attendance_chunks(start, end, staff, after, chunk_size)
+    if progress:
+        chunks = _tracked(chunks, progress)
+    return _parquet_chunks(chunks) if format == 'parquet' else _csv_chunks(chunks, header=not after)
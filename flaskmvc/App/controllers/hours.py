@@ -0,0 +1,184 @@
+import datetime, itertools, sys
+from array import array
+from collections import namedtuple
+
+from flask import current_app
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+
+from App.database import db
+from App.models.Shift import Shift
+from App.models.shift_template import ShiftTemplate
+from App.models.attendance_record import AttendanceRecord
+from .report import seconds_between
+from .rollup import week_of
+
+WEEK_SECONDS = 7 * 24 * 3600
+HOURS_FIELDS = ['worked_seconds', 'overtime_seconds', 'late_records', 'late_seconds', 'open_records']
+
+# Attendance in column form: one array per field, one position per record.
+# Times are whole seconds from the Monday before the range starts, so week
+# and day boundaries are plain integer divisions. time_out equals time_in
+# for open records, which therefore add no worked time. start_time is the
+# seconds into the shift's date its template starts, or -1 for shifts not
+# made from a template.
+HoursColumns = namedtuple('HoursColumns', 'origin user_id time_in time_out shift_date start_time open')
+
+
+class seconds_of_day(FunctionElement):
+    """SQL expression for the number of seconds from midnight to a time of day."""
+    type = db.Integer()
+    name = 'seconds_of_day'
+    inherit_cache = True
+
+
+@compiles(seconds_of_day)
+def _seconds_of_day_default(element, compiler, **kw):
+    return "EXTRACT(EPOCH FROM %s)" % compiler.process(list(element.clauses)[0], **kw)
+
+
+@compiles(seconds_of_day, 'sqlite')
+def _seconds_of_day_sqlite(element, compiler, **kw):
+    return "CAST(strftime('%%s', '1970-01-01 ' || %s) AS INTEGER)" % compiler.process(list(element.clauses)[0], **kw)
+
+
+@compiles(seconds_of_day, 'mysql')
+def _seconds_of_day_mysql(element, compiler, **kw):
+    return "TIME_TO_SEC(%s)" % compiler.process(list(element.clauses)[0], **kw)
+
+
+def numpy_module():
+    """
+    NumPy, or None when it is not installed. Imported on first use rather
+    than with this module, as it adds a noticeable delay to every CLI
+    command and worker start.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def load_hours_columns(start, end, user_ids=None, use_numpy=None):
+    """
+    Fetch the attendance records with timeIn from start to end (dates,
+    inclusive) in one query, already reduced to integers by the database,
+    into NumPy arrays (or array.array columns when NumPy is unavailable).
+    """
+    numpy = numpy_module() if use_numpy is not False else None
+    use_numpy = numpy is not None if use_numpy is None else use_numpy
+    origin = datetime.datetime.combine(week_of(start), datetime.time.min)
+    origin_param = db.literal(origin, db.DateTime)
+
+    def seconds(column):
+        return db.cast(seconds_between(origin_param, column), db.BigInteger)
+
+    time_in = seconds(AttendanceRecord.timeIn)
+    query = (
+        db.select(
+            AttendanceRecord.userID,
+            time_in,
+            db.func.coalesce(seconds(AttendanceRecord.timeout), time_in),
+            seconds(Shift.weekStart),
+            db.cast(db.func.coalesce(seconds_of_day(ShiftTemplate.start_time), -1), db.BigInteger),
+            db.case((AttendanceRecord.timeout.is_(None), 1), else_=0)
+        )
+        .join(Shift, Shift.id == AttendanceRecord.shiftID)
+        .outerjoin(ShiftTemplate, ShiftTemplate.id == Shift.template_id)
+        .filter(
+            AttendanceRecord.timeIn >= datetime.datetime.combine(start, datetime.time.min),
+            AttendanceRecord.timeIn <= datetime.datetime.combine(end, datetime.time.max)
+        )
+        .execution_options(use_replica=True)
+    )
+    if user_ids is not None:
+        query = query.filter(AttendanceRecord.userID.in_(user_ids))
+    rows = db.session.execute(query).tuples().all()
+    if use_numpy:
+        # flattened first: numpy.array() over Row objects probes each one
+        # for array attributes, which costs more than the arithmetic saves
+        flat = itertools.chain.from_iterable(rows)
+        table = numpy.fromiter(flat, dtype=numpy.int64, count=6 * len(rows)).reshape(len(rows), 6)
+        return HoursColumns(origin, *table.T)
+    columns = [array('q') for _ in range(6)]
+    for row in rows:
+        for column, value in zip(columns, row):
+            column.append(value)
+    return HoursColumns(origin, *columns)
+
+
+def _compute_numpy(columns, overtime_threshold, shift_start, late_grace):
+    numpy = numpy_module()
+    users, position = numpy.unique(columns.user_id, return_inverse=True)
+    worked = columns.time_out - columns.time_in
+    starts = numpy.where(columns.start_time < 0, shift_start, columns.start_time)
+    late = columns.time_in - (columns.shift_date + starts)
+    is_late = late > late_grace
+    # worked time per (user, week of clock-in), then the excess of each week
+    week = columns.time_in // WEEK_SECONDS
+    weeks = int(week.max()) + 1
+    weekly = numpy.bincount(position * weeks + week, weights=worked, minlength=len(users) * weeks)
+    overtime = numpy.clip(weekly - overtime_threshold, 0, None).reshape(len(users), weeks).sum(axis=1)
+    totals = numpy.stack([
+        numpy.bincount(position, weights=worked, minlength=len(users)),
+        overtime,
+        numpy.bincount(position, weights=is_late, minlength=len(users)),
+        numpy.bincount(position, weights=numpy.where(is_late, late, 0), minlength=len(users)),
+        numpy.bincount(position, weights=columns.open, minlength=len(users)),
+    ], axis=1).astype(numpy.int64)
+    return {int(user_id): dict(zip(HOURS_FIELDS, row.tolist())) for user_id, row in zip(users, totals)}
+
+
+def _compute_python(columns, overtime_threshold, shift_start, late_grace):
+    totals, weekly = {}, {}
+    for user_id, time_in, time_out, shift_date, start_time, is_open in zip(
+            columns.user_id, columns.time_in, columns.time_out, columns.shift_date, columns.start_time, columns.open):
+        row = totals.setdefault(user_id, [0, 0, 0, 0, 0])
+        row[0] += time_out - time_in
+        late = time_in - (shift_date + (shift_start if start_time < 0 else start_time))
+        if late > late_grace:
+            row[2] += 1
+            row[3] += late
+        row[4] += is_open
+        key = (user_id, time_in // WEEK_SECONDS)
+        weekly[key] = weekly.get(key, 0) + time_out - time_in
+    for (user_id, _), worked in weekly.items():
+        totals[user_id][1] += max(worked - overtime_threshold, 0)
+    return {user_id: dict(zip(HOURS_FIELDS, row)) for user_id, row in totals.items()}
+
+
+def compute_hours(columns, overtime_threshold=40 * 3600, shift_start=8 * 3600, late_grace=0, use_numpy=None):
+    """
+    Per-staff totals from load_hours_columns: worked seconds, overtime
+    (worked seconds beyond overtime_threshold in each week, by clock-in),
+    clock-ins more than late_grace seconds after the shift started (its
+    template's start time, or shift_start seconds into the shift's date for
+    shifts without a template) with the seconds they were late, and open
+    records.
+    :return: Dict of user id to a dict keyed by HOURS_FIELDS; staff without
+        records in the range are left out
+    """
+    if use_numpy is None:
+        # arrays can only have come from NumPy if something already imported it
+        numpy = sys.modules.get('numpy')
+        use_numpy = numpy is not None and isinstance(columns.user_id, numpy.ndarray)
+    if not len(columns.user_id):
+        return {}
+    compute = _compute_numpy if use_numpy else _compute_python
+    return compute(columns, overtime_threshold, shift_start, late_grace)
+
+
+def hours_settings():
+    """Overtime and lateness rules from config, as compute_hours keyword arguments."""
+    start = datetime.datetime.strptime(current_app.config.get('SHIFT_START_TIME', '08:00'), "%H:%M")
+    return {
+        'overtime_threshold': int(float(current_app.config.get('OVERTIME_THRESHOLD_HOURS', 40)) * 3600),
+        'shift_start': start.hour * 3600 + start.minute * 60,
+        'late_grace': int(float(current_app.config.get('LATE_GRACE_MINUTES', 5)) * 60)
+    }
+
+
+def staff_hours(start, end, user_ids=None):
+    """Per-staff hours from start to end (dates, inclusive) under the configured rules; see compute_hours."""
+    return compute_hours(load_hours_columns(start, end, user_ids), **hours_settings())
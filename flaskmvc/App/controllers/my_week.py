@@ -0,0 +1,138 @@
+import datetime
+
+from App.database import db
+from App.models.Shift import Shift
+from App.models.attendance_record import AttendanceRecord
+from App.models.weekly_attendance_summary import WeeklyAttendanceSummary
+from .report import seconds_between
+from .roster import _roster_row_json, _weekly_roster_query
+from .rollup import rollup_covers
+from .shift_template import merge_shifts, template_shifts
+
+# The statements here are shared with the async read API (App.async_api),
+# which runs them on its own connections; keep them free of session state.
+
+
+def my_roster_query(user_id, week_start, week_end):
+    """A user's shifts in the week with their roster entries, in one joined SELECT."""
+    return _weekly_roster_query(week_start, week_end).filter(Shift.user_id == user_id)
+
+
+def open_shift_query(user_id):
+    """The user's latest attendance record that has not been clocked out, with its shift."""
+    return (
+        db.select(
+            AttendanceRecord.attendanceID,
+            AttendanceRecord.shiftID,
+            AttendanceRecord.timeIn,
+            Shift.weekStart,
+            Shift.weekEnd
+        )
+        .join(Shift, Shift.id == AttendanceRecord.shiftID)
+        .filter(AttendanceRecord.userID == user_id, AttendanceRecord.timeout.is_(None))
+        .order_by(AttendanceRecord.timeIn.desc())
+        .limit(1)
+        .execution_options(use_replica=True)
+    )
+
+
+def my_summary_query(user_id, week_start, week_end, from_rollup=False):
+    """
+    One row of the user's scheduled_shifts, attendance_records and
+    total_seconds for the range, with the same totals as the shift report.
+    With from_rollup they are read from the weekly summary, which the caller
+    must have checked covers the range (see rollup_covers).
+    """
+    range_start = datetime.datetime.combine(week_start, datetime.time.min)
+    range_end = datetime.datetime.combine(week_end, datetime.time.max)
+    in_range = (AttendanceRecord.userID == user_id, AttendanceRecord.timeIn >= range_start,
+                AttendanceRecord.timeIn <= range_end)
+    if from_rollup:
+        # the summary only counts closed records
+        open_records = (
+            db.select(db.func.count(AttendanceRecord.attendanceID))
+            .filter(*in_range, AttendanceRecord.timeout.is_(None))
+            .scalar_subquery()
+        )
+        query = (
+            db.select(
+                db.func.coalesce(db.func.sum(WeeklyAttendanceSummary.scheduled_shifts), 0).label('scheduled_shifts'),
+                (db.func.coalesce(db.func.sum(WeeklyAttendanceSummary.completed_records), 0) + open_records)
+                .label('attendance_records'),
+                db.func.coalesce(db.func.sum(WeeklyAttendanceSummary.total_seconds), 0).label('total_seconds')
+            )
+            .filter(WeeklyAttendanceSummary.user_id == user_id,
+                    WeeklyAttendanceSummary.week_start.between(week_start, week_end))
+        )
+    else:
+        scheduled = (
+            db.select(db.func.count(Shift.id))
+            .filter(Shift.user_id == user_id, Shift.weekStart >= week_start, Shift.weekEnd <= week_end)
+            .scalar_subquery()
+        )
+        records = db.select(db.func.count(AttendanceRecord.attendanceID)).filter(*in_range).scalar_subquery()
+        seconds = (
+            db.select(db.func.coalesce(db.func.sum(seconds_between(AttendanceRecord.timeIn, AttendanceRecord.timeout)), 0))
+            .filter(*in_range)
+            .scalar_subquery()
+        )
+        query = db.select(
+            scheduled.label('scheduled_shifts'), records.label('attendance_records'), seconds.label('total_seconds')
+        )
+    return query.execution_options(use_replica=True)
+
+
+def my_roster_json(rows):
+    return [_roster_row_json(row) for row in rows]
+
+
+def open_shift_json(row):
+    if row is None:
+        return None
+    return {
+        'attendance_id': row.attendanceID,
+        'shift_id': row.shiftID,
+        'time_in': row.timeIn.isoformat(),
+        'start': row.weekStart.isoformat(),
+        'end': row.weekEnd.isoformat()
+    }
+
+
+def my_summary_json(row, template_shift_count=0):
+    # EXTRACT(EPOCH ...) comes back as NUMERIC on Postgres
+    return {
+        'scheduled_shifts': row.scheduled_shifts + template_shift_count,
+        'attendance_records': row.attendance_records,
+        'total_seconds': int(row.total_seconds),
+        'total_hours': round(float(row.total_seconds) / 3600.0, 2)
+    }
+
+
+def my_week_json(user_id, week_start, week_end, roster, open_shift, summary, occurrences=()):
+    """:param occurrences: the user's TemplateShift rows for the week, merged into roster and counted in summary"""
+    occurrences = list(occurrences)
+    return {
+        'user_id': user_id,
+        'week_start': week_start.isoformat(),
+        'week_end': week_end.isoformat(),
+        'roster': my_roster_json(merge_shifts(roster, occurrences)),
+        'open_shift': open_shift_json(open_shift),
+        'summary': my_summary_json(summary, len(occurrences))
+    }
+
+
+def get_my_week_json(user_id, week_start, week_end):
+    """
+    A user's roster, open shift and attendance totals for one week, as a
+    JSON-ready dict.
+    :param user_id: ID of the user
+    :param week_start: Start date of the week (inclusive)
+    :param week_end: End date of the week (inclusive)
+    """
+    roster = db.session.execute(my_roster_query(user_id, week_start, week_end)).all()
+    open_shift = db.session.execute(open_shift_query(user_id)).first()
+    summary = db.session.execute(
+        my_summary_query(user_id, week_start, week_end, rollup_covers(week_start, week_end))
+    ).one()
+    occurrences = template_shifts(week_start, week_end, [user_id])
+    return my_week_json(user_id, week_start, week_end, roster, open_shift, summary, occurrences)
@@ -0,0 +1,232 @@
+import atexit, datetime, fcntl, glob, json, logging, os, threading, time, uuid
+from collections import deque
+
+from .attendance import record_punch_events
+
+logger = logging.getLogger(__name__)
+
+
+class PunchQueue:
+    """
+    In-process write-behind queue for punch events with group commit.
+
+    Requests hand their events to submit(), which blocks until the flusher
+    thread has written them, so a punch is only acknowledged once it is
+    committed. The flusher drains up to batch_size events at a time (waiting
+    at most flush_interval seconds for a batch to fill) and writes them with
+    one record_punch_events() call, so events from many concurrent requests
+    share a single transaction and commit. If that commit fails, the batch
+    is written again one event per transaction, so only the events that fail
+    on their own are reported as failed.
+
+    With a journal_dir, every event is appended to a journal file owned by
+    this process when it is queued, and fsynced before submit() waits for
+    it. Each process holds an exclusive lock on a lockfile taken before its
+    journal is created; on start, journals whose lockfile is no longer held
+    are replayed and removed. Replay skips events already on an attendance
+    record, so a crash between a commit and its journal marker does not
+    write them twice.
+    """
+
+    def __init__(self, app, flush_interval=0.05, batch_size=500, journal_dir=None, timeout=30):
+        self.app = app
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.journal_dir = journal_dir
+        self.timeout = timeout
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._seq = 0
+        self._committed_seq = 0
+        self._journal = None
+        self._lockfile = None
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self.journal_dir:
+            os.makedirs(self.journal_dir, exist_ok=True)
+            self.recover()
+            path = os.path.join(self.journal_dir, f"punches-{os.getpid()}-{uuid.uuid4().hex[:8]}")
+            # recover() only looks for journals, so the lock is held before
+            # one exists for it to find
+            self._lockfile = open(path + '.lock', 'w')
+            fcntl.flock(self._lockfile, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self._journal = open(path + '.journal', 'a+')
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='punch-queue', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Flush whatever is buffered and stop the flusher thread."""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            self._ready.notify()
+        self._thread.join(self.timeout)
+        if self._journal:
+            self._journal.close()
+            if not self._pending:
+                os.remove(self._journal.name)
+                os.remove(self._lockfile.name)
+            self._lockfile.close()
+            self._journal = self._lockfile = None
+
+    def submit(self, events):
+        """Queue events and wait for their group commit; returns one result per event."""
+        items = [_PendingEvent(event) for event in events]
+        with self._lock:
+            if not self._running:
+                raise RuntimeError("Punch queue is not running.")
+            for item in items:
+                self._seq += 1
+                item.seq = self._seq
+            if self._journal:
+                self._journal.write(''.join(
+                    json.dumps({'seq': item.seq, 'event': item.event}, default=_json_default) + '\n' for item in items
+                ))
+                self._journal.flush()
+            self._pending.extend(items)
+            if len(self._pending) >= self.batch_size:
+                self._ready.notify()
+            journal = self._journal
+        if journal:
+            # outside the lock, so concurrent submitters share the disk wait
+            os.fsync(journal.fileno())
+        deadline = time.monotonic() + self.timeout
+        for item in items:
+            if not item.done.wait(max(deadline - time.monotonic(), 0)):
+                raise TimeoutError("Timed out waiting for the punch queue to commit.")
+            if item.error:
+                raise item.error
+        return [item.result for item in items]
+
+    def _take_batch(self):
+        with self._lock:
+            if len(self._pending) < self.batch_size and self._running:
+                self._ready.wait(self.flush_interval)
+            return [self._pending.popleft() for _ in range(min(len(self._pending), self.batch_size))]
+
+    def _run(self):
+        while self._running or self._pending:
+            batch = self._take_batch()
+            if batch:
+                self._flush(batch)
+
+    def _flush(self, batch):
+        try:
+            with self.app.app_context():
+                results = record_punch_events([item.event for item in batch])
+            for item, result in zip(batch, results):
+                item.result = dict(result, index=0)
+        except Exception:
+            logger.exception("Punch queue flush of %d events failed; retrying them one at a time", len(batch))
+            self._flush_each(batch)
+        # Failed events were reported to their callers, so they are not
+        # kept for replay either.
+        self._mark_committed(batch[-1].seq)
+        for item in batch:
+            item.done.set()
+
+    def _flush_each(self, batch):
+        # in queue order, so a clock-out still follows the clock-in it closes
+        with self.app.app_context():
+            for item in batch:
+                try:
+                    item.result = dict(record_punch_events([item.event])[0], index=0)
+                except Exception as e:
+                    logger.exception("Punch event %r failed", item.event)
+                    item.error = e
+
+    def _mark_committed(self, seq):
+        with self._lock:
+            self._committed_seq = seq
+            if not self._journal:
+                return
+            if self._pending:
+                self._journal.write(json.dumps({'committed': seq}) + '\n')
+            else:
+                self._journal.truncate(0)
+            self._journal.flush()
+            journal = self._journal
+        os.fsync(journal.fileno())
+
+    def recover(self):
+        """Replay journals left behind by dead processes; returns the number of events replayed."""
+        replayed = 0
+        for path in sorted(glob.glob(os.path.join(self.journal_dir, 'punches-*.journal'))):
+            lock_path = path[:-len('.journal')] + '.lock'
+            try:
+                lockfile = open(lock_path, 'r+')
+            except FileNotFoundError:
+                continue  # recovered by another process
+            with lockfile:
+                try:
+                    fcntl.flock(lockfile, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    if os.fstat(lockfile.fileno()).st_ino != os.stat(lock_path).st_ino:
+                        continue
+                    with open(path) as journal:
+                        events = read_journal(journal)
+                except OSError:
+                    continue  # owned by a live process, or already recovered
+                if events:
+                    with self.app.app_context():
+                        for start in range(0, len(events), self.batch_size):
+                            record_punch_events(events[start:start + self.batch_size], skip_recorded=True)
+                    logger.warning("Replayed %d punch events from %s", len(events), path)
+                    replayed += len(events)
+                os.remove(path)
+                os.remove(lock_path)
+        return replayed
+
+
+class _PendingEvent:
+    __slots__ = ('event', 'seq', 'result', 'error', 'done')
+
+    def __init__(self, event):
+        self.event = event
+        self.seq = None
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot journal {type(value).__name__}")
+
+
+def read_journal(journal):
+    """Events in a journal file that were queued after its last commit marker."""
+    committed, events = 0, []
+    for line in journal:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            break  # torn final write; nothing after it was acknowledged
+        if 'committed' in entry:
+            committed = entry['committed']
+        else:
+            events.append(entry)
+    return [entry['event'] for entry in events if entry['seq'] > committed]
+
+
+def init_punch_queue(app):
+    """Start a punch queue for app when PUNCH_QUEUE_ENABLED is set."""
+    if not app.config.get('PUNCH_QUEUE_ENABLED'):
+        return None
+    queue = PunchQueue(
+        app,
+        flush_interval=app.config.get('PUNCH_QUEUE_FLUSH_INTERVAL', 0.05),
+        batch_size=app.config.get('PUNCH_QUEUE_BATCH_SIZE', 500),
+        journal_dir=app.config.get('PUNCH_QUEUE_JOURNAL_DIR'),
+        timeout=app.config.get('PUNCH_QUEUE_TIMEOUT', 30)
+    )
+    queue.start()
+    app.extensions['punch_queue'] = queue
+    return queue
+
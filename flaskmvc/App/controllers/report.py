@@ -0,0 +1,191 @@
+import csv, datetime, io
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+
+from App.database import db
+from App.models.staff import Staff
+from App.models.Shift import Shift
+from App.models.attendance_record import AttendanceRecord
+from App.models.weekly_attendance_summary import WeeklyAttendanceSummary
+from .rollup import rollup_covers
+from .shift_template import template_shift_counts
+
+REPORT_FIELDS = [
+    'user_id',
+    'name',
+    'email',
+    'scheduled_shifts',
+    'attendance_records',
+    'total_seconds',
+    'total_hours'
+]
+HOURS_REPORT_FIELDS = [
+    'overtime_hours',
+    'late_records',
+    'late_minutes',
+    'open_records'
+]
+
+
+class seconds_between(FunctionElement):
+    """SQL expression for the number of seconds from the first to the second datetime."""
+    type = db.Float()
+    name = 'seconds_between'
+    inherit_cache = True
+
+
+@compiles(seconds_between)
+def _seconds_between_default(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return "EXTRACT(EPOCH FROM (%s - %s))" % (compiler.process(end, **kw), compiler.process(start, **kw))
+
+
+@compiles(seconds_between, 'sqlite')
+def _seconds_between_sqlite(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return "(CAST(strftime('%%s', %s) AS INTEGER) - CAST(strftime('%%s', %s) AS INTEGER))" % (
+        compiler.process(end, **kw), compiler.process(start, **kw))
+
+
+@compiles(seconds_between, 'mysql')
+def _seconds_between_mysql(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return "TIMESTAMPDIFF(SECOND, %s, %s)" % (compiler.process(start, **kw), compiler.process(end, **kw))
+
+
+def _shift_report_query(week_start, week_end):
+    range_start = datetime.datetime.combine(week_start, datetime.time.min)
+    range_end = datetime.datetime.combine(week_end, datetime.time.max)
+
+    scheduled = (
+        db.select(Shift.user_id, db.func.count(Shift.id).label('scheduled_shifts'))
+        .filter(Shift.weekStart >= week_start, Shift.weekEnd <= week_end)
+        .group_by(Shift.user_id)
+        .subquery()
+    )
+    # Open records have a NULL timeout, so they add to the record count
+    # but SUM() skips them when totalling clocked seconds.
+    attendance = (
+        db.select(
+            AttendanceRecord.userID.label('user_id'),
+            db.func.count(AttendanceRecord.attendanceID).label('attendance_records'),
+            db.func.sum(seconds_between(AttendanceRecord.timeIn, AttendanceRecord.timeout)).label('total_seconds')
+        )
+        .filter(AttendanceRecord.timeIn >= range_start, AttendanceRecord.timeIn <= range_end)
+        .group_by(AttendanceRecord.userID)
+        .subquery()
+    )
+    return (
+        db.select(
+            Staff.user_id,
+            Staff.name,
+            Staff.email,
+            db.func.coalesce(scheduled.c.scheduled_shifts, 0).label('scheduled_shifts'),
+            db.func.coalesce(attendance.c.attendance_records, 0).label('attendance_records'),
+            db.func.coalesce(attendance.c.total_seconds, 0).label('total_seconds')
+        )
+        .outerjoin(scheduled, scheduled.c.user_id == Staff.user_id)
+        .outerjoin(attendance, attendance.c.user_id == Staff.user_id)
+        .order_by(Staff.user_id)
+        .execution_options(use_replica=True)
+    )
+
+
+def _rollup_report_query(week_start, week_end):
+    # Same columns as _shift_report_query, read from the weekly summary.
+    # The summary only counts closed records, so the few records still open
+    # in the range are counted from the partial open-record index.
+    summary = (
+        db.select(
+            WeeklyAttendanceSummary.user_id,
+            db.func.sum(WeeklyAttendanceSummary.scheduled_shifts).label('scheduled_shifts'),
+            db.func.sum(WeeklyAttendanceSummary.completed_records).label('completed_records'),
+            db.func.sum(WeeklyAttendanceSummary.total_seconds).label('total_seconds')
+        )
+        .filter(WeeklyAttendanceSummary.week_start.between(week_start, week_end))
+        .group_by(WeeklyAttendanceSummary.user_id)
+        .subquery()
+    )
+    open_records = (
+        db.select(AttendanceRecord.userID.label('user_id'), db.func.count(AttendanceRecord.attendanceID).label('open_records'))
+        .filter(
+            AttendanceRecord.timeout.is_(None),
+            AttendanceRecord.timeIn >= datetime.datetime.combine(week_start, datetime.time.min),
+            AttendanceRecord.timeIn <= datetime.datetime.combine(week_end, datetime.time.max)
+        )
+        .group_by(AttendanceRecord.userID)
+        .subquery()
+    )
+    return (
+        db.select(
+            Staff.user_id,
+            Staff.name,
+            Staff.email,
+            db.func.coalesce(summary.c.scheduled_shifts, 0).label('scheduled_shifts'),
+            (db.func.coalesce(summary.c.completed_records, 0) + db.func.coalesce(open_records.c.open_records, 0))
+            .label('attendance_records'),
+            db.func.coalesce(summary.c.total_seconds, 0).label('total_seconds')
+        )
+        .outerjoin(summary, summary.c.user_id == Staff.user_id)
+        .outerjoin(open_records, open_records.c.user_id == Staff.user_id)
+        .order_by(Staff.user_id)
+        .execution_options(use_replica=True)
+    )
+
+
+def generate_shift_report(week_start, week_end, with_hours=False):
+    """
+    Scheduled shifts, attendance records and clocked hours for every staff member.
+    All totals are computed by the database in a single grouped query, read
+    from the weekly attendance summary when it covers the range (see
+    rollup_covers) and from shifts and attendance_records otherwise.
+    Occurrences of recurring shift templates that have no Shift row yet are
+    expanded and added to scheduled_shifts.
+    :param week_start: Start date of the report (inclusive)
+    :param week_end: End date of the report (inclusive)
+    :param with_hours: Add overtime, lateness and open-record counts, computed
+        from the range's attendance columns by App.controllers.hours
+    :return: List of dicts keyed by REPORT_FIELDS (and HOURS_REPORT_FIELDS)
+    """
+    if rollup_covers(week_start, week_end):
+        query = _rollup_report_query(week_start, week_end)
+    else:
+        query = _shift_report_query(week_start, week_end)
+    rows = db.session.execute(query).all()
+    template_shifts = template_shift_counts(week_start, week_end)
+    # EXTRACT(EPOCH ...) comes back as NUMERIC on Postgres
+    report = [
+        {
+            'user_id': row.user_id,
+            'name': row.name,
+            'email': row.email,
+            'scheduled_shifts': row.scheduled_shifts + template_shifts[row.user_id],
+            'attendance_records': row.attendance_records,
+            'total_seconds': int(row.total_seconds),
+            'total_hours': round(float(row.total_seconds) / 3600.0, 2)
+        }
+        for row in rows
+    ]
+    if with_hours:
+        from .hours import staff_hours
+        hours = staff_hours(week_start, week_end)
+        for row in report:
+            totals = hours.get(row['user_id'])
+            row.update({
+                'overtime_hours': round(totals['overtime_seconds'] / 3600.0, 2) if totals else 0.0,
+                'late_records': totals['late_records'] if totals else 0,
+                'late_minutes': round(totals['late_seconds'] / 60.0, 1) if totals else 0.0,
+                'open_records': totals['open_records'] if totals else 0
+            })
+    return report
+
+
+def shift_report_csv(report):
+    """Render rows from generate_shift_report as CSV text."""
+    output = io.StringIO()
+    fields = REPORT_FIELDS + HOURS_REPORT_FIELDS if report and 'overtime_hours' in report[0] else REPORT_FIELDS
+    writer = csv.DictWriter(output, fieldnames=fields)
+    writer.writeheader()
+    writer.writerows(report)
+    return output.getvalue()
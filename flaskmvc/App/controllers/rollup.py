@@ -0,0 +1,271 @@
+import datetime
+from collections import defaultdict
+
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from App.database import db
+from App.models.user import User
+from App.models.Shift import Shift
+from App.models.attendance_record import AttendanceRecord
+from App.models.weekly_attendance_summary import WeeklyAttendanceSummary, RollupStatus
+
+ROLLUP_NAME = 'weekly_attendance'
+COUNTERS = ('scheduled_shifts', 'completed_records', 'total_seconds')
+_summary = WeeklyAttendanceSummary.__table__
+
+
+def week_of(day):
+    """Monday of the ISO week containing day (a date or datetime)."""
+    if isinstance(day, datetime.datetime):
+        day = day.date()
+    return day - datetime.timedelta(days=day.weekday())
+
+
+def new_deltas():
+    """Counter changes keyed by (user_id, week_start); see add_shift/add_record."""
+    return defaultdict(lambda: [0, 0, 0])
+
+
+def add_shift(deltas, user_id, week_start, sign=1):
+    if week_start is None:
+        return
+    deltas[(user_id, week_of(week_start))][0] += sign
+
+
+def add_record(deltas, user_id, time_in, time_out, sign=1):
+    # open records only count once they are closed
+    if time_in is None or time_out is None:
+        return
+    counters = deltas[(user_id, week_of(time_in))]
+    counters[1] += sign
+    counters[2] += sign * int((time_out - time_in).total_seconds())
+
+
+def _upsert(dialect_name):
+    if dialect_name == 'mysql':
+        statement = mysql.insert(_summary)
+        return statement.on_duplicate_key_update({
+            name: _summary.c[name] + statement.inserted[name] for name in COUNTERS
+        })
+    module = postgresql if dialect_name == 'postgresql' else sqlite
+    statement = module.insert(_summary)
+    return statement.on_conflict_do_update(
+        index_elements=['user_id', 'week_start'],
+        set_={name: _summary.c[name] + statement.excluded[name] for name in COUNTERS}
+    )
+
+
+def _apply(connection, deltas):
+    rows = [
+        {'user_id': user_id, 'week_start': week_start, **dict(zip(COUNTERS, counters))}
+        for (user_id, week_start), counters in deltas.items()
+        if any(counters)
+    ]
+    if rows:
+        connection.execute(_upsert(connection.dialect.name), rows)
+
+
+def apply_rollup_deltas(deltas):
+    """
+    Add deltas to the weekly summary in the current transaction, with one
+    executemany upsert. Code that writes shifts or attendance records with
+    bulk statements (which skip the mapper events below) must call this and
+    mark its statements with execution_options(rollup_maintained=True).
+    """
+    _apply(db.session.connection(), deltas)
+
+
+def _old_value(state, key):
+    history = state.attrs[key].history
+    return history.deleted[0] if history.deleted else getattr(state.obj(), key)
+
+
+# Keep the previous value of the columns the rollup depends on, so updates
+# can move their contribution from the old week to the new one.
+for _attribute in (Shift.user_id, Shift.weekStart, AttendanceRecord.userID,
+                   AttendanceRecord.timeIn, AttendanceRecord.timeout):
+    event.listen(_attribute, 'set', lambda *args: None, active_history=True)
+
+
+def _moved(connection, target, keys, add):
+    # after_update fires for every dirty object; only changes to the
+    # columns the rollup depends on move its contribution
+    state = inspect(target)
+    if not any(state.attrs[key].history.has_changes() for key in keys):
+        return
+    deltas = new_deltas()
+    add(deltas, *[_old_value(state, key) for key in keys], sign=-1)
+    add(deltas, *[getattr(target, key) for key in keys])
+    _apply(connection, deltas)
+
+
+def _added(connection, target, keys, add, sign):
+    deltas = new_deltas()
+    add(deltas, *[getattr(target, key) for key in keys], sign=sign)
+    _apply(connection, deltas)
+
+
+@event.listens_for(Shift, 'after_insert')
+def _shift_inserted(mapper, connection, target):
+    _added(connection, target, ('user_id', 'weekStart'), add_shift, 1)
+
+
+@event.listens_for(Shift, 'after_update')
+def _shift_updated(mapper, connection, target):
+    _moved(connection, target, ('user_id', 'weekStart'), add_shift)
+
+
+# Deletions are rolled up before the row goes, while its values can
+# still be loaded.
+@event.listens_for(Shift, 'before_delete')
+def _shift_deleted(mapper, connection, target):
+    _added(connection, target, ('user_id', 'weekStart'), add_shift, -1)
+
+
+@event.listens_for(AttendanceRecord, 'after_insert')
+def _record_inserted(mapper, connection, target):
+    _added(connection, target, ('userID', 'timeIn', 'timeout'), add_record, 1)
+
+
+@event.listens_for(AttendanceRecord, 'after_update')
+def _record_updated(mapper, connection, target):
+    _moved(connection, target, ('userID', 'timeIn', 'timeout'), add_record)
+
+
+@event.listens_for(AttendanceRecord, 'before_delete')
+def _record_deleted(mapper, connection, target):
+    _added(connection, target, ('userID', 'timeIn', 'timeout'), add_record, -1)
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _mark_stale_on_bulk_write(orm_execute_state):
+    # Bulk statements bypass the mapper events; unless the caller applied
+    # its own deltas the rollup can no longer be trusted.
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    if orm_execute_state.execution_options.get('rollup_maintained'):
+        return
+    table = getattr(orm_execute_state.statement, 'table', None)
+    if table is not None and table.name in (Shift.__tablename__, AttendanceRecord.__tablename__):
+        orm_execute_state.session.execute(
+            db.update(RollupStatus).filter(RollupStatus.name == ROLLUP_NAME).values(stale=True)
+        )
+
+
+def _status():
+    status = db.session.get(RollupStatus, ROLLUP_NAME)
+    if status is None:
+        status = RollupStatus(name=ROLLUP_NAME, stale=True)
+        db.session.add(status)
+    return status
+
+
+# attempts per chunk when a concurrent write breaks its snapshot
+REBUILD_ATTEMPTS = 5
+
+
+def _serialization_failure(error):
+    return getattr(error.orig, 'pgcode', None) == '40001'
+
+
+def _rebuild_chunk(after, chunk_size):
+    """
+    Replace the summary rows of the chunk_size users after user id 'after'
+    in one transaction. Returns the chunk's user ids and the rows written.
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        # one snapshot for the totals and the rows they replace; a delta
+        # committed in between makes the delete or upsert fail instead
+        db.session.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+    user_ids = db.session.scalars(
+        db.select(User.user_id).filter(User.user_id > after).order_by(User.user_id).limit(chunk_size)
+    ).all()
+    if not user_ids:
+        return user_ids, 0
+    first, last = user_ids[0], user_ids[-1]
+    deltas = new_deltas()
+    for row in db.session.execute(
+        db.select(Shift.user_id, Shift.weekStart).filter(Shift.user_id.between(first, last))
+    ):
+        add_shift(deltas, row.user_id, row.weekStart)
+    for row in db.session.execute(
+        db.select(AttendanceRecord.userID, AttendanceRecord.timeIn, AttendanceRecord.timeout)
+        .filter(AttendanceRecord.userID.between(first, last), AttendanceRecord.timeout.is_not(None))
+    ):
+        add_record(deltas, row.userID, row.timeIn, row.timeout)
+    db.session.execute(db.delete(WeeklyAttendanceSummary).filter(
+        WeeklyAttendanceSummary.user_id > after,
+        WeeklyAttendanceSummary.user_id <= last
+    ))
+    apply_rollup_deltas(deltas)
+    db.session.commit()
+    return user_ids, sum(1 for counters in deltas.values() if any(counters))
+
+
+def rebuild_rollups(chunk_size=500, progress=None):
+    """
+    Recompute the weekly summary from shifts and attendance_records, chunk_size
+    users per transaction, and mark it fresh. Writes made while the rebuild
+    runs are kept: each chunk reads its totals and replaces its users' rows
+    from one snapshot (REPEATABLE READ on Postgres, where a delta committed
+    in between fails the chunk and it is retried; SQLite serialises writers),
+    and later writes add their deltas on top.
+    :param progress: optional callable given the number of users done so far
+    :return: Number of summary rows written
+    """
+    _status().stale = True
+    db.session.commit()
+    written, done, last = 0, 0, 0
+    while True:
+        for attempt in range(1, REBUILD_ATTEMPTS + 1):
+            try:
+                user_ids, rows = _rebuild_chunk(last, chunk_size)
+                break
+            except OperationalError as e:
+                db.session.rollback()
+                if not _serialization_failure(e) or attempt == REBUILD_ATTEMPTS:
+                    raise
+        if not user_ids:
+            break
+        last = user_ids[-1]
+        written += rows
+        done += len(user_ids)
+        if progress:
+            progress(done)
+    # rows left over from users that no longer exist
+    db.session.execute(db.delete(WeeklyAttendanceSummary).filter(WeeklyAttendanceSummary.user_id > last))
+    status = _status()
+    status.stale = False
+    status.built_at = datetime.datetime.now()
+    db.session.commit()
+    return written
+
+
+def rollup_fresh_query(week_start, week_end):
+    """
+    SELECT returning a row when the weekly summary covers week_start to
+    week_end (see rollup_covers), or None when the range is not whole ISO
+    weeks. Lets callers with their own connection make the same check.
+    """
+    if week_start.weekday() != 0 or week_end.weekday() != 6 or week_end < week_start:
+        return None
+    straddling = db.select(Shift.id).filter(
+        Shift.weekStart >= week_start, Shift.weekStart <= week_end, Shift.weekEnd > week_end
+    )
+    return (
+        db.select(RollupStatus.name)
+        .filter(RollupStatus.name == ROLLUP_NAME, RollupStatus.stale.is_(False), ~straddling.exists())
+    )
+
+
+def rollup_covers(week_start, week_end):
+    """
+    True when a report from week_start to week_end can be read from the
+    weekly summary: the range is whole ISO weeks, the summary has been
+    built and not invalidated since, and no shift starting in the range
+    ends after it (the live report leaves such shifts out).
+    """
+    query = rollup_fresh_query(week_start, week_end)
+    return query is not None and db.session.scalar(query) is not None
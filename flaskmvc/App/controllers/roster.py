@@ -0,0 +1,123 @@
+import datetime, itertools
+
+from App.database import db
+from App.models.user import User
+from App.models.Shift import Shift
+from App.models.Roster import Roster
+from .shift_template import merge_shifts, parse_shift_id, shift_ref, template_shifts
+
+
+def get_current_week(today=None):
+    """Return the (monday, sunday) date range of the week containing today."""
+    today = today or datetime.date.today()
+    week_start = today - datetime.timedelta(days=today.weekday())
+    week_end = week_start + datetime.timedelta(days=6)
+    return week_start, week_end
+
+
+def _weekly_roster_query(week_start, week_end):
+    # Shift, roster entry and assigned user are fetched together in one
+    # joined SELECT so the cost of a roster read does not grow with the
+    # number of shifts in the week.
+    return (
+        db.select(
+            Shift.id,
+            Shift.weekStart,
+            Shift.weekEnd,
+            Shift.user_id,
+            Roster.userID.label('roster_user_id'),
+            User.name,
+            User.email
+        )
+        .outerjoin(Roster, Roster.shiftID == Shift.id)
+        .outerjoin(User, User.user_id == Shift.user_id)
+        .filter(Shift.weekStart >= week_start, Shift.weekEnd <= week_end)
+        .order_by(Shift.weekStart, Shift.id)
+        .execution_options(use_replica=True)
+    )
+
+
+def _roster_row_json(row):
+    return {
+        'shift_id': row.id,
+        'start': row.weekStart.isoformat(),
+        'end': row.weekEnd.isoformat(),
+        'user_id': row.user_id,
+        'name': row.name,
+        'email': row.email,
+        'rostered': row.roster_user_id is not None
+    }
+
+
+def get_weekly_roster(week_start, week_end):
+    """
+    Get every shift in a week together with its roster entry and user,
+    including the occurrences of recurring shift templates that have no
+    Shift row yet (as TemplateShift rows whose id is a shift reference).
+    :param week_start: Start date of the week (inclusive)
+    :param week_end: End date of the week (inclusive)
+    :return: List of roster rows (shift id, dates, user id, name, email), by date
+    """
+    rows = db.session.execute(_weekly_roster_query(week_start, week_end)).all()
+    return list(merge_shifts(rows, template_shifts(week_start, week_end)))
+
+
+def get_weekly_roster_json(week_start, week_end, page=1, per_page=50):
+    """
+    Get one page of the weekly roster as a JSON-ready dict.
+    :param page: 1-based page number
+    :param per_page: Number of shifts per page
+    """
+    page = max(page, 1)
+    per_page = max(min(per_page, 500), 1)
+    offset = (page - 1) * per_page
+    # template occurrences interleave with the rows, so the page is cut
+    # from the merged stream; only the rows up to its end are read
+    query = _weekly_roster_query(week_start, week_end).limit(offset + per_page + 1)
+    merged = merge_shifts(db.session.execute(query), template_shifts(week_start, week_end))
+    rows = list(itertools.islice(merged, offset, offset + per_page + 1))
+    has_next = len(rows) > per_page
+    return {
+        'week_start': week_start.isoformat(),
+        'week_end': week_end.isoformat(),
+        'page': page,
+        'per_page': per_page,
+        'next_page': page + 1 if has_next else None,
+        'shifts': [_roster_row_json(row) for row in rows[:per_page]]
+    }
+
+
+def roster_cursor(entry):
+    """Opaque page cursor for a RosterEntry; see parse_roster_cursor."""
+    return f"{entry.start.isoformat()}_{entry.shift_id}"
+
+
+def parse_roster_cursor(cursor):
+    """
+    The (start date, shift id) pair in a roster_cursor, where the id is a
+    shift reference for a template occurrence; raises ValueError when malformed.
+    """
+    day, _, shift_id = cursor.partition('_')
+    shift_id = parse_shift_id(shift_id)
+    return datetime.date.fromisoformat(day), shift_id if isinstance(shift_id, int) else shift_ref(*shift_id)
+
+
+def list_user_roster(user, start=None, end=None, after=None, limit=50):
+    """
+    One keyset page of a user's roster entries, earliest shift first.
+    :param user: User whose shifts are listed
+    :param start: Optional first date (inclusive)
+    :param end: Optional last date (inclusive)
+    :param after: cursor of the last entry of the previous page
+    :param limit: page size (at most 500)
+    :return: (list of entry dicts, cursor for the next page or None)
+    """
+    limit = max(min(limit, 500), 1)
+    entries = user.viewRoster(db.session, start, end, limit + 1, parse_roster_cursor(after) if after else None)
+    roster = [
+        {'shift_id': entry.shift_id, 'user_id': entry.user_id, 'start': entry.start.isoformat(),
+         'end': entry.end.isoformat()}
+        for entry in entries[:limit]
+    ]
+    next_cursor = roster_cursor(entries[limit - 1]) if len(entries) > limit else None
+    return roster, next_cursor
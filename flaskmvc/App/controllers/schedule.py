@@ -0,0 +1,306 @@
+import bisect, csv, datetime, json
+from collections import defaultdict
+
+from App.database import db, bulk_insert
+from App.models.staff import Staff
+from App.models.Shift import Shift
+from App.models.Roster import Roster
+from App.models.shift_change_request import RequestStatus, ShiftChangeRequest
+from .rollup import add_shift, apply_rollup_deltas, new_deltas
+
+WEEKDAY_NAMES = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+WEEKDAY_FULL_NAMES = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+NAMED_PATTERNS = {
+    'weekdays': {0, 1, 2, 3, 4},
+    'weekends': {5, 6},
+    'daily': {0, 1, 2, 3, 4, 5, 6}
+}
+MAX_ENTRY_DAYS = 366
+# staff ids per existing-shift lookup, to keep IN lists within driver limits
+CONFLICT_LOOKUP_CHUNK = 500
+
+
+class ScheduleError(ValueError):
+    """Raised when a bulk schedule is rejected; carries one error per bad entry."""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} schedule entries rejected")
+        self.errors = errors
+
+
+def parse_pattern(pattern):
+    """
+    Turn a weekday pattern into a set of weekday numbers (Monday is 0).
+    Accepts 'weekdays', 'weekends', 'daily', a comma separated list of day
+    names, their three-letter abbreviations or numbers ('mon,wed,friday' /
+    '0,2,4') or a list of either.
+    :raises ValueError: for any other token
+    """
+    if pattern is None:
+        return NAMED_PATTERNS['weekdays']
+    if isinstance(pattern, str):
+        if pattern.strip().lower() in NAMED_PATTERNS:
+            return NAMED_PATTERNS[pattern.strip().lower()]
+        pattern = pattern.split(',')
+    days = set()
+    for day in pattern:
+        day = str(day).strip().lower()
+        if day in WEEKDAY_NAMES:
+            days.add(WEEKDAY_NAMES.index(day))
+        elif day in WEEKDAY_FULL_NAMES:
+            days.add(WEEKDAY_FULL_NAMES.index(day))
+        elif day.isdigit() and int(day) < 7:
+            days.add(int(day))
+        else:
+            raise ValueError(f"Unknown weekday '{day}' in pattern.")
+    return days
+
+
+def _parse_date(value):
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def expand_schedule_dates(start, end, weekdays):
+    """Yield every date from start to end (inclusive) that falls on one of weekdays."""
+    day = start
+    while day <= end:
+        if day.weekday() in weekdays:
+            yield day
+        day += datetime.timedelta(days=1)
+
+
+def _resolve_staff(entries):
+    emails = {entry['staff'] for entry in entries if isinstance(entry.get('staff'), str) and not entry['staff'].isdigit()}
+    ids = {int(entry['staff']) for entry in entries if str(entry.get('staff', '')).isdigit()}
+    conditions = []
+    if emails:
+        conditions.append(Staff.email.in_(emails))
+    if ids:
+        conditions.append(Staff.user_id.in_(ids))
+    if not conditions:
+        return {}
+    rows = db.session.execute(db.select(Staff.user_id, Staff.email).filter(db.or_(*conditions))).all()
+    staff = {row.email: row.user_id for row in rows}
+    staff.update({str(row.user_id): row.user_id for row in rows})
+    return staff
+
+
+def _entry_error(entry):
+    """Why an entry does not have the shape bulk_schedule_shifts takes, or None."""
+    if not isinstance(entry, dict):
+        return "Entries must be objects with staff, start, end and pattern."
+    staff = entry.get('staff')
+    if not isinstance(staff, (str, int)) or isinstance(staff, bool):
+        return "Entry staff must be an email or a user id."
+    if entry.get('start') is None:
+        return "Entry needs a start date."
+    for field in ('start', 'end'):
+        if entry.get(field) is not None and not isinstance(entry[field], (str, datetime.date)):
+            return f"Entry {field} must be a YYYY-MM-DD string."
+    if entry.get('pattern') is not None and not isinstance(entry['pattern'], (str, list)):
+        return "Entry pattern must be a string or a list of weekdays."
+    if entry.get('change_request') is not None and not isinstance(entry['change_request'], str):
+        return "Entry change_request must be a string."
+    return None
+
+
+def _plan_entries(entries):
+    shape_errors = [_entry_error(entry) for entry in entries]
+    staff = _resolve_staff([entry for entry, error in zip(entries, shape_errors) if error is None])
+    planned, errors = [], []
+    for index, entry in enumerate(entries):
+        if shape_errors[index] is not None:
+            errors.append({'index': index, 'error': shape_errors[index]})
+            continue
+        user_id = staff.get(str(entry.get('staff', '')))
+        if user_id is None:
+            errors.append({'index': index, 'error': f"Staff '{entry.get('staff')}' not found."})
+            continue
+        try:
+            start = _parse_date(entry['start'])
+            end = _parse_date(entry.get('end') or entry['start'])
+            weekdays = parse_pattern(entry.get('pattern'))
+        except ValueError as e:
+            errors.append({'index': index, 'error': str(e)})
+            continue
+        if end < start or (end - start).days >= MAX_ENTRY_DAYS:
+            errors.append({'index': index, 'error': f"Date range must run forwards and span at most {MAX_ENTRY_DAYS} days."})
+            continue
+        planned.append({
+            'index': index,
+            'user_id': user_id,
+            'dates': list(expand_schedule_dates(start, end, weekdays)),
+            'change_request': entry.get('change_request')
+        })
+    return planned, errors
+
+
+class ShiftIntervals:
+    """
+    One staff member's shifts sorted by start date, answering which shift
+    overlaps a date range with a binary search. latest[i] is the shift with
+    the latest end among the first i + 1, so only one candidate needs checking
+    even when existing shifts overlap each other.
+    """
+
+    def __init__(self, shifts):
+        shifts = sorted(shifts, key=lambda shift: shift.weekStart)
+        self.starts = [shift.weekStart for shift in shifts]
+        self.latest = []
+        for shift in shifts:
+            if not self.latest or shift.weekEnd > self.latest[-1].weekEnd:
+                self.latest.append(shift)
+            else:
+                self.latest.append(self.latest[-1])
+
+    def overlapping(self, start, end):
+        """The shift ending last among those overlapping start..end (inclusive), or None."""
+        position = bisect.bisect_right(self.starts, end)
+        if position and self.latest[position - 1].weekEnd >= start:
+            return self.latest[position - 1]
+        return None
+
+
+def _existing_shifts(user_ids, first_day, last_day):
+    from .shift_template import template_shifts
+    # served by ix_shifts_user_week: one range scan per staff member
+    existing = defaultdict(list)
+    user_ids = sorted(user_ids)
+    for offset in range(0, len(user_ids), CONFLICT_LOOKUP_CHUNK):
+        chunk = user_ids[offset:offset + CONFLICT_LOOKUP_CHUNK]
+        rows = db.session.execute(
+            db.select(Shift.id, Shift.user_id, Shift.weekStart, Shift.weekEnd)
+            .filter(
+                Shift.user_id.in_(chunk),
+                Shift.weekStart <= last_day,
+                Shift.weekEnd >= first_day
+            )
+        )
+        for row in rows:
+            existing[row.user_id].append(row)
+        # recurring shifts have no Shift row until clocked against or changed
+        for occurrence in template_shifts(first_day, last_day, chunk, use_replica=False):
+            existing[occurrence.user_id].append(occurrence)
+    return {user_id: ShiftIntervals(shifts) for user_id, shifts in existing.items()}
+
+
+def find_conflicts(planned):
+    """
+    Check planned shifts against existing shifts and each other. Existing
+    shifts in the batch's date window are read with one indexed query per
+    CONFLICT_LOOKUP_CHUNK staff, then each new shift costs one binary search.
+    Conflicting dates are removed from each plan's 'dates'.
+    :return: One error dict per rejected shift, with the entry index, date and
+        the id of the existing shift it overlaps (None for a clash within the batch)
+    """
+    days = [day for plan in planned for day in plan['dates']]
+    if not days:
+        return []
+    existing = _existing_shifts({plan['user_id'] for plan in planned}, min(days), max(days))
+    taken, conflicts = set(), []
+    for plan in planned:
+        intervals = existing.get(plan['user_id'])
+        accepted = []
+        for day in plan['dates']:
+            shift = intervals.overlapping(day, day) if intervals else None
+            if shift is not None:
+                error = f"Staff {plan['user_id']} already has shift {shift.id} on {day.isoformat()}."
+            elif (plan['user_id'], day) in taken:
+                error = f"Staff {plan['user_id']} is scheduled twice on {day.isoformat()} in this batch."
+            else:
+                taken.add((plan['user_id'], day))
+                accepted.append(day)
+                continue
+            conflicts.append({
+                'index': plan['index'],
+                'date': day.isoformat(),
+                'shift_id': shift.id if shift is not None else None,
+                'error': error
+            })
+        plan['dates'] = accepted
+    return conflicts
+
+
+def bulk_schedule_shifts(entries, skip_conflicts=False):
+    """
+    Create shifts and roster entries for many (staff, date range, pattern) entries.
+    Every entry is validated first; if any is rejected nothing is written and a
+    ScheduleError listing the rejected entries is raised. Shifts that overlap an
+    existing shift of the same staff member, or another shift in the batch, are
+    rejected the same way, all reported together; with skip_conflicts they are
+    left out instead and the rest are scheduled. All shifts and rosters are
+    inserted with set-based statements in a single transaction.
+    :param entries: List of dicts with 'staff' (email or user id), 'start', 'end'
+        (YYYY-MM-DD or date) and an optional weekday 'pattern' (see parse_pattern)
+    :param skip_conflicts: Schedule the shifts without conflicts and report the rest
+    :return: List of dicts with the entry index, user id, created shift ids and
+        the conflicts skipped for that entry
+    """
+    planned, errors = _plan_entries(entries)
+    if errors:
+        raise ScheduleError(errors)
+    conflicts = find_conflicts(planned)
+    if conflicts and not skip_conflicts:
+        raise ScheduleError(conflicts)
+    rejected = defaultdict(list)
+    for conflict in conflicts:
+        rejected[conflict['index']].append(conflict)
+    shift_rows = [
+        {'user_id': plan['user_id'], 'weekStart': day, 'weekEnd': day}
+        for plan in planned
+        for day in plan['dates']
+    ]
+    change_details = [plan['change_request'] for plan in planned for day in plan['dates']]
+    if not shift_rows:
+        return [
+            {'index': plan['index'], 'user_id': plan['user_id'], 'shift_ids': [], 'rejected': rejected[plan['index']]}
+            for plan in planned
+        ]
+    now = datetime.datetime.now()
+    try:
+        shift_ids = bulk_insert(Shift, shift_rows, Shift.id, execution_options={'rollup_maintained': True})
+        db.session.execute(db.insert(Roster), [
+            {'shiftID': shift_id, 'userID': row['user_id']}
+            for shift_id, row in zip(shift_ids, shift_rows)
+        ])
+        change_rows = [
+            {'shiftID': shift_id, 'userID': row['user_id'], 'details': details,
+             'status': RequestStatus.PENDING, 'created': now}
+            for shift_id, row, details in zip(shift_ids, shift_rows, change_details)
+            if details
+        ]
+        if change_rows:
+            db.session.execute(db.insert(ShiftChangeRequest), change_rows)
+        deltas = new_deltas()
+        for row in shift_rows:
+            add_shift(deltas, row['user_id'], row['weekStart'])
+        apply_rollup_deltas(deltas)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    results, position = [], 0
+    for plan in planned:
+        count = len(plan['dates'])
+        results.append({
+            'index': plan['index'],
+            'user_id': plan['user_id'],
+            'shift_ids': shift_ids[position:position + count],
+            'rejected': rejected[plan['index']]
+        })
+        position += count
+    return results
+
+
+def read_schedule_file(path):
+    """Load bulk schedule entries from a .json or .csv file (columns: staff,start,end,pattern)."""
+    with open(path, newline='') as f:
+        if path.lower().endswith('.json'):
+            data = json.load(f)
+            return data['entries'] if isinstance(data, dict) else data
+        return [
+            {key: value for key, value in row.items() if value not in (None, '')}
+            for row in csv.DictReader(f)
+        ]
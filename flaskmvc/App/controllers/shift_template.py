@@ -0,0 +1,337 @@
+import datetime, heapq
+from collections import Counter, namedtuple
+
+from sqlalchemy import exc
+
+from App.database import db, bulk_insert
+from App.models.user import User
+from App.models.Shift import Shift
+from App.models.Roster import Roster
+from App.models.shift_template import ShiftTemplate
+from .rollup import add_shift, apply_rollup_deltas, new_deltas
+from .schedule import ScheduleError, WEEKDAY_NAMES, _parse_date, _resolve_staff, parse_pattern
+
+ONE_DAY = datetime.timedelta(days=1)
+# how far ahead open-ended templates are expanded for reads with no end date or limit
+TEMPLATE_HORIZON = datetime.timedelta(days=366)
+
+
+class TemplateShift(namedtuple('TemplateShift', 'id user_id weekStart weekEnd template_id start_time end_time name email')):
+    """
+    One occurrence of a ShiftTemplate that has no Shift row. Its id is the
+    occurrence's shift reference (see shift_ref), and it has the fields of
+    the Shift and roster rows it is read alongside, so roster, report and
+    conflict code can treat both kinds alike.
+    """
+    __slots__ = ()
+
+    @property
+    def roster_user_id(self):
+        # a template is its staff member's roster assignment
+        return self.user_id
+
+
+def shift_ref(template_id, day):
+    """Reference to a template occurrence, usable wherever a shift id is taken, e.g. '4@2025-10-06'."""
+    return f"{template_id}@{day.isoformat()}"
+
+
+def parse_shift_id(value):
+    """
+    A shift id (int) or, for a shift reference, its (template_id, date).
+    :raises ValueError: if value is neither
+    """
+    if isinstance(value, int):
+        return value
+    value = str(value).strip()
+    if '@' not in value:
+        return int(value)
+    template_id, _, day = value.partition('@')
+    return int(template_id), datetime.date.fromisoformat(day)
+
+
+def shift_order(day, shift_id):
+    """Sort key for shifts and template occurrences: by date, Shift rows before occurrences on the same day."""
+    return day, isinstance(shift_id, str), shift_id
+
+
+def weekday_mask(weekdays):
+    return sum(1 << day for day in set(weekdays))
+
+
+def mask_weekdays(mask):
+    return {day for day in range(7) if mask & (1 << day)}
+
+
+def _parse_time(value):
+    if isinstance(value, datetime.time):
+        return value
+    return datetime.datetime.strptime(value, "%H:%M").time()
+
+
+def _occurs(template, day):
+    return (template.weekdays & (1 << day.weekday()) and template.valid_from <= day
+            and (template.valid_until is None or day <= template.valid_until))
+
+
+def _occurrence_key(occurrence):
+    return occurrence.weekStart, occurrence.id
+
+
+def templates_query(start, end, user_ids=None):
+    """Templates valid at some point from start to end (either may be None), with their staff member's name and email."""
+    query = (
+        db.select(
+            ShiftTemplate.id, ShiftTemplate.user_id, ShiftTemplate.weekdays, ShiftTemplate.start_time,
+            ShiftTemplate.end_time, ShiftTemplate.valid_from, ShiftTemplate.valid_until, User.name, User.email
+        )
+        .join(User, User.user_id == ShiftTemplate.user_id)
+        .order_by(ShiftTemplate.id)
+        .execution_options(use_replica=True)
+    )
+    if end is not None:
+        query = query.filter(ShiftTemplate.valid_from <= end)
+    if start is not None:
+        query = query.filter(db.or_(ShiftTemplate.valid_until.is_(None), ShiftTemplate.valid_until >= start))
+    if user_ids is not None:
+        query = query.filter(ShiftTemplate.user_id.in_(user_ids))
+    return query
+
+
+def materialized_query(start, end, user_ids=None):
+    """(template_id, template_date) of the template occurrences from start to end that have a Shift row."""
+    query = (
+        db.select(Shift.template_id, Shift.template_date)
+        .filter(Shift.template_id.is_not(None))
+        .execution_options(use_replica=True)
+    )
+    if start is not None:
+        query = query.filter(Shift.template_date >= start)
+    if end is not None:
+        query = query.filter(Shift.template_date <= end)
+    if user_ids is not None:
+        query = query.filter(Shift.user_id.in_(user_ids))
+    return query
+
+
+def expand_templates(templates, materialized, start, end):
+    """
+    Lazily yield a TemplateShift for each occurrence of templates from start
+    to end (inclusive; None leaves that side open) that is not in
+    materialized, ordered by date and then reference. With no end, an
+    open-ended template yields for ever, so bound the caller's reads.
+    :param templates: rows of templates_query
+    :param materialized: (template_id, template_date) pairs of occurrences with a Shift row
+    """
+    materialized = set(materialized)
+
+    def occurrences(template):
+        weekdays = mask_weekdays(template.weekdays)
+        if not weekdays:
+            return
+        day = max(start, template.valid_from) if start else template.valid_from
+        last = min(date for date in (end, template.valid_until) if date) if end or template.valid_until else None
+        while last is None or day <= last:
+            if day.weekday() in weekdays and (template.id, day) not in materialized:
+                yield TemplateShift(shift_ref(template.id, day), template.user_id, day, day, template.id,
+                                    template.start_time, template.end_time, template.name, template.email)
+            day += ONE_DAY
+
+    return heapq.merge(*(occurrences(template) for template in templates), key=_occurrence_key)
+
+
+def template_shifts(start, end, user_ids=None, use_replica=True):
+    """
+    The occurrences without a Shift row of every template from start to end,
+    as a generator of TemplateShift (see expand_templates). Templates and
+    materialised occurrences are read with two queries; nothing is stored
+    per occurrence.
+    :param use_replica: Set to False for reads that decide a write
+    """
+    options = {'use_replica': use_replica}
+    templates = db.session.execute(templates_query(start, end, user_ids).execution_options(**options)).all()
+    if not templates:
+        return iter(())
+    materialized = db.session.execute(materialized_query(start, end, user_ids).execution_options(**options)).all()
+    return expand_templates(templates, materialized, start, end)
+
+
+def template_shift_counts(start, end, user_ids=None):
+    """Number of template occurrences without a Shift row from start to end, by user id."""
+    return Counter(occurrence.user_id for occurrence in template_shifts(start, end, user_ids))
+
+
+def merge_shifts(rows, occurrences):
+    """
+    Merge rows ordered by (weekStart, id) with TemplateShift occurrences
+    ordered by (weekStart, reference); on the same day, rows come first.
+    Both are consumed lazily.
+    """
+    return heapq.merge(rows, occurrences, key=lambda row: shift_order(row.weekStart, row.id))
+
+
+def _template_conflicts(user_id, weekdays, valid_from, valid_until):
+    errors = []
+    shifts = db.session.execute(
+        db.select(Shift.id, Shift.weekStart, Shift.weekEnd)
+        .filter(Shift.user_id == user_id, Shift.weekEnd >= valid_from)
+        .filter(Shift.weekStart <= valid_until if valid_until else db.true())
+        .order_by(Shift.weekStart)
+    )
+    for shift in shifts:
+        day = max(shift.weekStart, valid_from)
+        while day <= shift.weekEnd and (valid_until is None or day <= valid_until):
+            if day.weekday() in weekdays:
+                errors.append({'index': 0, 'date': day.isoformat(), 'shift_id': shift.id,
+                               'error': f"Staff {user_id} already has shift {shift.id} on {day.isoformat()}."})
+                break
+            day += ONE_DAY
+    for template in db.session.scalars(db.select(ShiftTemplate).filter(ShiftTemplate.user_id == user_id)):
+        first = max(valid_from, template.valid_from)
+        ends = [date for date in (valid_until, template.valid_until) if date]
+        last = min(ends) if ends else None
+        # a shared weekday recurs within any seven days of the overlap
+        for offset in range(7):
+            day = first + datetime.timedelta(days=offset)
+            if last is not None and day > last:
+                break
+            if day.weekday() in weekdays and _occurs(template, day):
+                errors.append({'index': 0, 'date': day.isoformat(), 'shift_id': shift_ref(template.id, day),
+                               'error': f"Staff {user_id} already has recurring shift {template.id} on {day.isoformat()}."})
+                break
+    return errors
+
+
+def create_shift_template(staff, pattern, start_time, end_time, valid_from, valid_until=None):
+    """
+    Schedule a recurring shift for a staff member. No Shift rows are
+    written: its occurrences are expanded when rosters and reports are read
+    and materialised when clocked against or overridden. It is rejected if
+    any occurrence falls on a day the staff member already has a shift or
+    another template's occurrence.
+    :param staff: Email or user id of the staff member
+    :param pattern: Weekday pattern (see parse_pattern)
+    :param start_time: Time of day the shift starts (datetime.time or HH:MM)
+    :param end_time: Time of day the shift ends
+    :param valid_from: First date (YYYY-MM-DD or date)
+    :param valid_until: Optional last date; open-ended when None
+    :raises ScheduleError: with the reason or the conflicting shifts
+    :return: The new ShiftTemplate
+    """
+    user_id = _resolve_staff([{'staff': str(staff)}]).get(str(staff))
+    if user_id is None:
+        raise ScheduleError([{'index': 0, 'error': f"Staff '{staff}' not found."}])
+    try:
+        weekdays = parse_pattern(pattern)
+        start_time, end_time = _parse_time(start_time), _parse_time(end_time)
+        valid_from = _parse_date(valid_from)
+        valid_until = _parse_date(valid_until) if valid_until else None
+    except ValueError as e:
+        raise ScheduleError([{'index': 0, 'error': str(e)}]) from None
+    if not weekdays:
+        raise ScheduleError([{'index': 0, 'error': "The pattern has no weekdays."}])
+    if end_time <= start_time:
+        raise ScheduleError([{'index': 0, 'error': "The shift must end after it starts."}])
+    if valid_until is not None and valid_until < valid_from:
+        raise ScheduleError([{'index': 0, 'error': "Date range must run forwards."}])
+    conflicts = _template_conflicts(user_id, weekdays, valid_from, valid_until)
+    if conflicts:
+        raise ScheduleError(conflicts)
+    template = ShiftTemplate(user_id, weekday_mask(weekdays), start_time, end_time, valid_from, valid_until)
+    db.session.add(template)
+    db.session.commit()
+    return template
+
+
+def template_json(template):
+    return {
+        'id': template.id,
+        'user_id': template.user_id,
+        'weekdays': [WEEKDAY_NAMES[day] for day in sorted(mask_weekdays(template.weekdays))],
+        'start_time': template.start_time.strftime("%H:%M"),
+        'end_time': template.end_time.strftime("%H:%M"),
+        'valid_from': template.valid_from.isoformat(),
+        'valid_until': template.valid_until.isoformat() if template.valid_until else None
+    }
+
+
+def _existing_template_shifts(occurrences):
+    rows = db.session.execute(
+        db.select(Shift.id, Shift.template_id, Shift.template_date)
+        .filter(Shift.template_id.in_({template_id for template_id, _ in occurrences}),
+                Shift.template_date.in_({day for _, day in occurrences}))
+    )
+    return {(row.template_id, row.template_date): row.id for row in rows
+            if (row.template_id, row.template_date) in occurrences}
+
+
+def materialize_template_shifts(occurrences, owners=None, create=True):
+    """
+    Shift ids for template occurrences, creating (and committing) a Shift and
+    its roster entry for each occurrence that has none yet. Occurrences off
+    their template's schedule are left out.
+    :param occurrences: (template_id, date) pairs
+    :param owners: Optional dict of occurrence to the user ids asking for it;
+        an occurrence is only created for its template's staff member
+    :param create: Only look up occurrences that already have a Shift when False
+    :return: Dict of (template_id, date) to shift id
+    """
+    occurrences = set(occurrences)
+    if not occurrences:
+        return {}
+    ids = _existing_template_shifts(occurrences)
+    if not create or len(ids) == len(occurrences):
+        return ids
+    templates = {
+        template.id: template
+        for template in db.session.scalars(
+            db.select(ShiftTemplate).filter(ShiftTemplate.id.in_({template_id for template_id, _ in occurrences}))
+        )
+    }
+    missing = sorted(
+        (template_id, day) for template_id, day in occurrences - set(ids)
+        if template_id in templates and _occurs(templates[template_id], day)
+        and (owners is None or templates[template_id].user_id in owners.get((template_id, day), ()))
+    )
+    if not missing:
+        return ids
+    rows = [
+        {'user_id': templates[template_id].user_id, 'weekStart': day, 'weekEnd': day,
+         'template_id': template_id, 'template_date': day}
+        for template_id, day in missing
+    ]
+    try:
+        shift_ids = bulk_insert(Shift, rows, Shift.id, execution_options={'rollup_maintained': True})
+        db.session.execute(db.insert(Roster), [
+            {'shiftID': shift_id, 'userID': row['user_id']} for shift_id, row in zip(shift_ids, rows)
+        ])
+        deltas = new_deltas()
+        for row in rows:
+            add_shift(deltas, row['user_id'], row['weekStart'])
+        apply_rollup_deltas(deltas)
+        db.session.commit()
+    except exc.IntegrityError:
+        # another request materialised one of them first
+        db.session.rollback()
+        return _existing_template_shifts(occurrences)
+    except Exception:
+        db.session.rollback()
+        raise
+    ids.update(zip(missing, shift_ids))
+    return ids
+
+
+def resolve_shift_id(shift_id, user_id, create=True):
+    """
+    The id of a user's shift given its id or a shift reference (see
+    shift_ref), materialising the referenced occurrence when create is set.
+    :return: The shift id, or None for a malformed reference or an
+        occurrence that is not the user's (or has no Shift and create is unset)
+    """
+    try:
+        shift_id = parse_shift_id(shift_id)
+    except ValueError:
+        return None
+    if isinstance(shift_id, int):
+        return shift_id
+    return materialize_template_shifts([shift_id], {shift_id: {user_id}}, create).get(shift_id)
@@ -1,6 +1,14 @@
+from sqlalchemy.orm import selectin_polymorphic
+
 from App.models import User
+from App.models.admin import Admin
+from App.models.staff import Staff
 from App.database import db
 
+# Load subclass columns (role) for a mixed list of users with one
+# SELECT .. IN per subclass table instead of one SELECT per user.
+USER_SUBCLASS_LOADER = selectin_polymorphic(User, [Admin, Staff])
+
 def create_user(username, password):
     newuser = User(username=username, password=password)
     db.session.add(newuser)
@@ -15,7 +23,7 @@ def get_user(id):
     return db.session.get(User, id)
 
 def get_all_users():
-    return db.session.scalars(db.select(User)).all()
+    return db.session.scalars(db.select(User).options(USER_SUBCLASS_LOADER)).all()
 
 def get_all_users_json():
     users = get_all_users()
@@ -32,3 +40,48 @@ def update_user(id, username):
         db.session.commit()
         return True
     return None
+
+def _user_listing_query(type=None, name_prefix=None, email=None):
+    # plain columns only, so listing never touches the admin/staff tables
+    query = (
+        db.select(User.user_id, User.name, User.email, User.type)
+        .order_by(User.user_id)
+        .execution_options(use_replica=True)
+    )
+    if type:
+        query = query.filter(User.type == type)
+    if name_prefix:
+        query = query.filter(User.name.startswith(name_prefix, autoescape=True))
+    if email:
+        query = query.filter(User.email == email)
+    return query
+
+def _user_row_json(row):
+    return {'user_id': row.user_id, 'name': row.name, 'email': row.email, 'type': row.type}
+
+def list_users(after=None, limit=50, **filters):
+    """
+    One keyset page of users ordered by id.
+    :param after: user_id of the last row of the previous page
+    :param limit: page size (at most 1000)
+    :param filters: type, name_prefix and/or email
+    :return: (list of user dicts, cursor for the next page or None)
+    """
+    limit = max(min(limit, 1000), 1)
+    query = _user_listing_query(**filters)
+    if after is not None:
+        query = query.filter(User.user_id > after)
+    rows = db.session.execute(query.limit(limit + 1)).all()
+    users = [_user_row_json(row) for row in rows[:limit]]
+    next_cursor = users[-1]['user_id'] if len(rows) > limit else None
+    return users, next_cursor
+
+def iter_users(chunk_size=1000, **filters):
+    """
+    Yield every matching user as a dict, reading chunk_size rows at a time
+    through a server-side cursor where the driver supports one.
+    """
+    query = _user_listing_query(**filters).execution_options(yield_per=chunk_size)
+    for partition in db.session.execute(query).partitions():
+        for row in partition:
+            yield _user_row_json(row)
@@ -1,14 +1,232 @@
+import logging, os, random, threading, time, weakref
+
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from sqlalchemy import event, exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
 
+logger = logging.getLogger(__name__)
 
 db = SQLAlchemy()
 
+# config key -> create_engine() argument, with the default used when unset
+POOL_SETTINGS = {
+    'DB_POOL_SIZE': ('pool_size', 5),
+    'DB_MAX_OVERFLOW': ('max_overflow', 10),
+    'DB_POOL_TIMEOUT': ('pool_timeout', 30),
+    'DB_POOL_RECYCLE': ('pool_recycle', 1800),
+    'DB_POOL_PRE_PING': ('pool_pre_ping', True)
+}
+
+_apps = weakref.WeakSet()
+
+REPLICA_PREFIX = 'replica_'
+# replica engine -> (monotonic time of the last check, usable)
+_replica_state = weakref.WeakKeyDictionary()
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = {'checkouts': 0, 'wait_total': 0.0, 'wait_max': 0.0, 'timeouts': 0}
+        self._metrics_lock = threading.Lock()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._metrics_lock:
+                self.metrics['checkouts'] += 1
+                self.metrics['wait_total'] += waited
+                self.metrics['wait_max'] = max(self.metrics['wait_max'], waited)
+                self.metrics['timeouts'] += timed_out
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics, pool._metrics_lock = self.metrics, self._metrics_lock
+        return pool
+
+    def stats(self):
+        size, overflow = self.size(), self._max_overflow
+        limit = size + overflow if overflow >= 0 else None
+        with self._metrics_lock:
+            metrics = dict(self.metrics)
+        checkouts = metrics['checkouts']
+        return {
+            'size': size,
+            'max_overflow': overflow,
+            'max_connections': limit,
+            'checked_out': self.checkedout(),
+            'saturation': round(self.checkedout() / limit, 3) if limit else None,
+            'checkouts': checkouts,
+            'timeouts': metrics['timeouts'],
+            'wait_avg_ms': round(metrics['wait_total'] / checkouts * 1000, 3) if checkouts else 0.0,
+            'wait_max_ms': round(metrics['wait_max'] * 1000, 3)
+        }
+
+
+def engine_options(config):
+    """
+    Engine options for SQLALCHEMY_ENGINE_OPTIONS built from the DB_POOL_*
+    settings (FLASK_DB_POOL_SIZE etc. in the environment). Options already
+    in SQLALCHEMY_ENGINE_OPTIONS win. In-memory SQLite keeps the
+    single-connection pool Flask-SQLAlchemy gives it, and only the options
+    already in SQLALCHEMY_ENGINE_OPTIONS.
+    """
+    options = {}
+    url = make_url(config.get('SQLALCHEMY_DATABASE_URI') or 'sqlite://')
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+    options['poolclass'] = MeteredQueuePool
+    for key, (option, default) in POOL_SETTINGS.items():
+        options[option] = config.get(key, default)
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    return options
+
+
+def dispose_engines():
+    """
+    Drop pooled connections inherited from a parent process. The parent
+    keeps using its sockets, so they are discarded without being closed;
+    the child opens its own connections on first use.
+    """
+    for app in list(_apps):
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=dispose_engines)
+
+
+def get_pool_stats():
+    """Checkout wait and saturation figures for each engine of the current app, by bind key."""
+    return {
+        key or 'default': engine.pool.stats()
+        for key, engine in db.engines.items()
+        if isinstance(engine.pool, MeteredQueuePool)
+    }
+
 def get_migrate(app):
+    # imported here: alembic is slow to load and only `flask db` needs it
+    from flask_migrate import Migrate
     return Migrate(app, db)
 
+def replica_binds(config):
+    """
+    SQLALCHEMY_BINDS entries for the read replicas in REPLICA_DATABASE_URIS
+    (a list, or a comma separated string in FLASK_REPLICA_DATABASE_URIS).
+    """
+    uris = config.get('REPLICA_DATABASE_URIS') or []
+    if isinstance(uris, str):
+        uris = [uri.strip() for uri in uris.split(',') if uri.strip()]
+    return {f"{REPLICA_PREFIX}{index}": uri for index, uri in enumerate(uris)}
+
+
+def replication_lag(connection):
+    """Seconds the replica behind connection is behind its primary, or None when unknown."""
+    if connection.dialect.name != 'postgresql':
+        return None
+    # NULL on a server that is not a standby
+    lag = connection.execute(text(
+        "SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())"
+    )).scalar()
+    return float(lag) if lag is not None else None
+
+
+def _replica_usable(engine):
+    now = time.monotonic()
+    checked, usable = _replica_state.get(engine, (None, False))
+    if checked is not None and now - checked < current_app.config.get('REPLICA_CHECK_INTERVAL', 5):
+        return usable
+    try:
+        with engine.connect() as connection:
+            lag = replication_lag(connection)
+        usable = lag is None or lag <= current_app.config.get('REPLICA_MAX_LAG', 10)
+        if not usable:
+            logger.warning("Replica %s is %.1fs behind; reading from the primary", engine.url, lag)
+    except exc.DBAPIError:
+        logger.warning("Replica %s is unreachable; reading from the primary", engine.url, exc_info=True)
+        usable = False
+    _replica_state[engine] = (now, usable)
+    return usable
+
+
+def get_read_engine():
+    """A reachable replica engine within REPLICA_MAX_LAG seconds of the primary, or None for the primary."""
+    replicas = [engine for key, engine in db.engines.items() if key and key.startswith(REPLICA_PREFIX)]
+    random.shuffle(replicas)
+    for engine in replicas:
+        if _replica_usable(engine):
+            return engine
+    return None
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _route_reads_to_replica(orm_execute_state):
+    # Only SELECTs marked with .execution_options(use_replica=True) are
+    # routed; everything else, including every write, stays on the primary.
+    if not orm_execute_state.is_select or not orm_execute_state.execution_options.get('use_replica'):
+        return None
+    session = orm_execute_state.session
+    if session.new or session.dirty or session.deleted:
+        return None  # read this session's own pending writes
+    engine = get_read_engine()
+    if engine is None:
+        return None
+    try:
+        return orm_execute_state.invoke_statement(bind_arguments={'bind': engine})
+    except exc.DBAPIError:
+        logger.warning("Read on replica %s failed; retrying on the primary", engine.url, exc_info=True)
+        _replica_state[engine] = (time.monotonic(), False)
+        return None
+
+
 def create_db():
     db.create_all()
     
 def init_db(app):
-    db.init_app(app)
\ No newline at end of file
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    binds = replica_binds(app.config)
+    if binds:
+        app.config['SQLALCHEMY_BINDS'] = {**(app.config.get('SQLALCHEMY_BINDS') or {}), **binds}
+    db.init_app(app)
+    # Replicas mirror the default metadata and no model is bound to them, so
+    # keep create_all()/drop_all() from treating them as separate databases.
+    for key in binds:
+        db.metadatas.pop(key, None)
+    _apps.add(app)
+
+def bulk_insert(model, rows, id_column, execution_options=None):
+    """
+    Insert rows with one executemany statement and return the generated ids
+    in the same order as rows. Uses batched INSERT .. RETURNING where the
+    dialect supports it and falls back to a bulk save otherwise. Neither
+    path fires mapper persistence events.
+    """
+    if not rows:
+        return []
+    if db.engine.dialect.insert_executemany_returning:
+        # batched RETURNING does not promise parameter order on every
+        # dialect unless asked to keep it
+        result = db.session.execute(
+            db.insert(model).returning(id_column, sort_by_parameter_order=True),
+            rows,
+            execution_options=execution_options
+        )
+        return result.scalars().all()
+    objects = [model(**row) for row in rows]
+    db.session.bulk_save_objects(objects, return_defaults=True)
+    return [getattr(obj, id_column.key) for obj in objects]
@@ -0,0 +1,89 @@
+import sys, threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# werkzeug's own default; the pbkdf2 form is e.g. "pbkdf2:sha256:600000"
+DEFAULT_METHOD = "scrypt:32768:8:1"
+
+_settings = {'method': DEFAULT_METHOD, 'salt_length': 16, 'workers': 4}
+_executor = None
+_gevent_pool = None
+# configured method -> the prefix its hashes are stored with
+_method_prefixes = {}
+_executor_lock = threading.Lock()
+
+
+def configure_hashing(app):
+    """
+    Read the KDF settings from app config:
+    PASSWORD_HASH_METHOD      werkzeug method string including cost parameters
+    PASSWORD_HASH_SALT_LENGTH salt length for new hashes
+    PASSWORD_HASH_WORKERS     KDF runs allowed at once per worker process; 0 runs them inline
+    """
+    global _executor, _gevent_pool
+    _settings['method'] = app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+    _settings['salt_length'] = app.config.get('PASSWORD_HASH_SALT_LENGTH', 16)
+    _settings['workers'] = app.config.get('PASSWORD_HASH_WORKERS', 4)
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+        if _gevent_pool is not None:
+            _gevent_pool.kill()
+            _gevent_pool = None
+
+
+def _gevent_patched():
+    monkey = sys.modules.get('gevent.monkey')
+    return monkey is not None and monkey.is_module_patched('threading')
+
+
+def _run(fn, *args):
+    """
+    Run fn in the bounded KDF pool and wait for it.
+    hashlib's scrypt and pbkdf2 release the GIL, so real threads let hashes
+    run in parallel. Under gevent, threading is patched into greenlets, so
+    gevent's native threadpool is used instead; the calling greenlet waits
+    cooperatively while the rest of the worker keeps serving requests.
+    That pool is our own, so its size leaves the hub's threadpool (used by
+    gevent for DNS and file I/O) alone.
+    """
+    global _executor, _gevent_pool
+    workers = _settings['workers']
+    if not workers:
+        return fn(*args)
+    if _gevent_patched():
+        if _gevent_pool is None:
+            from gevent.threadpool import ThreadPool
+            _gevent_pool = ThreadPool(workers)
+        return _gevent_pool.apply(fn, args)
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='kdf')
+    return _executor.submit(fn, *args).result()
+
+
+def hash_password(password):
+    """Hash a password with the configured KDF and cost parameters."""
+    return _run(generate_password_hash, password, _settings['method'], _settings['salt_length'])
+
+
+def verify_password(pwhash, password):
+    """Check a password against a stored hash of any supported method."""
+    return _run(check_password_hash, pwhash, password)
+
+
+def needs_rehash(pwhash):
+    """True when a stored hash was made with different KDF parameters than the configured ones."""
+    return pwhash.split('$', 1)[0] != _method_prefix()
+
+
+def _method_prefix():
+    # werkzeug fills in defaults for a partial method such as "scrypt" or
+    # "pbkdf2:sha256", so compare against what it actually writes
+    method = _settings['method']
+    if method not in _method_prefixes:
+        _method_prefixes[method] = generate_password_hash('', method, 1).split('$', 1)[0]
+    return _method_prefixes[method]
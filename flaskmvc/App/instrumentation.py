@@ -0,0 +1,215 @@
+import cProfile, datetime, logging, os, random, re, threading, time
+from collections import Counter, defaultdict
+
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+logger = logging.getLogger(__name__)
+
+# upper bounds in seconds of the request duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestStats:
+    """SQL statements sent to the database while handling one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.query_time = 0.0
+        self.statements = Counter()
+
+    def record(self, statement, elapsed):
+        self.queries += 1
+        self.query_time += elapsed
+        self.statements[statement] += 1
+
+    def repeated(self, threshold):
+        """Statements run more than threshold times, most repeated first."""
+        return [(statement, count) for statement, count in self.statements.most_common() if count > threshold]
+
+
+class Metrics:
+    """
+    Per-worker request and query totals, rendered in the Prometheus text
+    format. Each worker process keeps its own; scrape every worker, or
+    sum them, as with the other per-worker figures on /health.
+    """
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._requests = Counter()
+        self._durations = defaultdict(lambda: [0] * (len(self.buckets) + 1))
+        self._duration_sums = Counter()
+        self._queries = Counter()
+        self._query_seconds = Counter()
+        self._n_plus_one = Counter()
+        self._profiles = Counter()
+
+    def observe(self, endpoint, method, status, duration, stats, n_plus_one):
+        with self._lock:
+            self._requests[(endpoint, method, str(status))] += 1
+            counts = self._durations[endpoint]
+            for index, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._duration_sums[endpoint] += duration
+            self._queries[endpoint] += stats.queries
+            self._query_seconds[endpoint] += stats.query_time
+            if n_plus_one:
+                self._n_plus_one[endpoint] += 1
+
+    def profiled(self, endpoint):
+        with self._lock:
+            self._profiles[endpoint] += 1
+
+    def render(self):
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                label_text = ','.join(f'{key}="{_escape(label)}"' for key, label in labels)
+                lines.append(f"{name}{suffix}{{{label_text}}} {value}")
+
+        with self._lock:
+            family('http_requests_total', 'counter', 'Requests handled, by endpoint, method and status.', [
+                ('', [('endpoint', endpoint), ('method', method), ('status', status)], count)
+                for (endpoint, method, status), count in sorted(self._requests.items())
+            ])
+            durations = []
+            for endpoint, counts in sorted(self._durations.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), counts):
+                    cumulative += count
+                    durations.append(('_bucket', [('endpoint', endpoint), ('le', bound)], cumulative))
+                durations.append(('_sum', [('endpoint', endpoint)], round(self._duration_sums[endpoint], 6)))
+                durations.append(('_count', [('endpoint', endpoint)], cumulative))
+            family('http_request_duration_seconds', 'histogram', 'Wall time spent handling requests.', durations)
+            for name, help_text, values in [
+                ('http_request_sql_queries_total', 'SQL statements sent while handling requests.', self._queries),
+                ('http_request_sql_seconds_total', 'Time spent waiting on SQL statements.', self._query_seconds),
+                ('http_request_n_plus_one_total',
+                 'Requests that ran one statement more than N_PLUS_ONE_THRESHOLD times.', self._n_plus_one),
+                ('http_request_profiles_total', 'Slow sampled requests whose profile was saved.', self._profiles)
+            ]:
+                family(name, 'counter', help_text, [
+                    ('', [('endpoint', endpoint)], round(value, 6)) for endpoint, value in sorted(values.items())
+                ])
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _request_stats():
+    if not has_request_context():
+        return None
+    return g.get('_request_stats')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _request_stats() is not None:
+        context._instrumentation_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_stats()
+    started = getattr(context, '_instrumentation_started', None)
+    if stats is not None and started is not None:
+        # an executemany counts once, however many rows it sends
+        stats.record(statement, time.perf_counter() - started)
+
+
+def _endpoint():
+    # the route's pattern rather than the path, so ids do not become labels
+    return request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+
+
+def _start_request():
+    config = current_app.config
+    if request.endpoint == 'metrics':
+        return
+    g._request_stats = RequestStats()
+    rate = float(config.get('PROFILE_SAMPLE_RATE', 0))
+    if rate and random.random() < rate:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # another profiler is already running in this thread
+            return
+        g._request_profiler = profiler
+
+
+def _finish_request(status):
+    stats = g.pop('_request_stats', None)
+    if stats is None:
+        return
+    profiler = g.pop('_request_profiler', None)
+    if profiler is not None:
+        profiler.disable()
+    duration = time.perf_counter() - stats.started
+    config = current_app.config
+    endpoint = _endpoint()
+    repeated = stats.repeated(int(config.get('N_PLUS_ONE_THRESHOLD', 10)))
+    for statement, count in repeated:
+        logger.warning("Possible N+1 on %s %s: ran %d times: %s", request.method, endpoint, count,
+                       ' '.join(statement.split())[:300])
+    metrics = current_app.extensions['instrumentation']
+    metrics.observe(endpoint, request.method, status, duration, stats, bool(repeated))
+    if profiler is not None and duration * 1000 >= float(config.get('PROFILE_SLOW_REQUEST_MS', 500)):
+        directory = config.get('PROFILE_DIR') or os.path.join(current_app.instance_path, 'profiles')
+        os.makedirs(directory, exist_ok=True)
+        route = re.sub(r'[^\w.-]+', '_', endpoint).strip('_') or 'index'
+        path = os.path.join(directory, f"{datetime.datetime.now():%Y%m%dT%H%M%S.%f}-{request.method}-{route}.prof")
+        profiler.dump_stats(path)
+        metrics.profiled(endpoint)
+        logger.info("Profiled slow request %s %s (%.0f ms) to %s", request.method, endpoint, duration * 1000, path)
+
+
+def init_instrumentation(app):
+    """
+    Set up request instrumentation when INSTRUMENTATION_ENABLED is set:
+    N_PLUS_ONE_THRESHOLD     a statement run more times than this in one request is logged as a likely N+1
+    PROFILE_SAMPLE_RATE      fraction of requests run under cProfile (0 disables profiling)
+    PROFILE_SLOW_REQUEST_MS  a profiled request taking at least this long has its profile saved
+    PROFILE_DIR              where profiles are saved (default instance/profiles), for pstats or snakeviz
+    Wall time, SQL statement count and SQL time per request are served
+    at /metrics in the Prometheus text format.
+    """
+    if not app.config.get('INSTRUMENTATION_ENABLED', False):
+        return None
+    metrics = Metrics()
+    app.extensions['instrumentation'] = metrics
+    # on the Engine class, so replica binds and engines created later are covered
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    # ahead of every other before_request hook, so their queries are counted too
+    app.before_request_funcs.setdefault(None, []).insert(0, _start_request)
+
+    @app.after_request
+    def record_response(response):
+        _finish_request(response.status_code)
+        return response
+
+    @app.teardown_request
+    def record_failure(error):
+        # only reached with stats left when after_request did not run
+        _finish_request(500)
+
+    def metrics_view():
+        return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view, methods=['GET'])
+    return metrics
@@ -1,41 +1,107 @@
-import os
+import os, sys, threading
 from flask import Flask, render_template
-from flask_uploads import DOCUMENTS, IMAGES, TEXT, UploadSet, configure_uploads
-from flask_cors import CORS
-from werkzeug.utils import secure_filename
-from werkzeug.datastructures import  FileStorage
 
 from App.database import init_db
 from App.config import load_config
+from App.hashing import configure_hashing
+from App.response_cache import init_response_cache
 
 
 from App.controllers import (
     setup_jwt,
-    add_auth_context
+    add_auth_context,
+    init_punch_queue
 )
 
-from App.views import views, setup_admin
-
+# flask CLI commands that serve or inspect the web layer; every other
+# command gets a lite app (see create_app)
+WEB_COMMANDS = {'run', 'routes', 'shell'}
+# global options of the flask command that take a value
+_CLI_VALUE_OPTIONS = {'--app', '-A', '--env-file', '-e'}
 
 
 def add_views(app):
+    from App.views import views
     for view in views:
         app.register_blueprint(view)
 
-def create_app(overrides={}):
-    app = Flask(__name__, static_url_path='/static')
-    load_config(app, overrides)
+def init_web(app):
+    """
+    Register what is only needed to serve requests: CORS, uploads, the
+    blueprints, request instrumentation, JWT and Flask-Admin. Their modules
+    are imported here, so a lite app never loads them.
+    """
+    if app.extensions.get('web_layer'):
+        return
+    from flask_uploads import DOCUMENTS, IMAGES, TEXT, UploadSet, configure_uploads
+    from flask_cors import CORS
+    from App.instrumentation import init_instrumentation
+    from App.views import setup_admin
+
     CORS(app)
     add_auth_context(app)
     photos = UploadSet('photos', TEXT + DOCUMENTS + IMAGES)
     configure_uploads(app, photos)
     add_views(app)
-    init_db(app)
+    init_instrumentation(app)
     jwt = setup_jwt(app)
     setup_admin(app)
     @jwt.invalid_token_loader
     @jwt.unauthorized_loader
     def custom_unauthorized_response(error):
         return render_template('401.html', error=error), 401
+    app.extensions['web_layer'] = True
+
+class _DeferredWeb:
+    """WSGI middleware that finishes a lite app's web setup before its first request."""
+
+    def __init__(self, app):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        with self._lock:
+            if self.app.wsgi_app is self:
+                # Flask refuses new routes once a request has been handled,
+                # so this has to run before the first one reaches it
+                init_web(self.app)
+                self.app.wsgi_app = self.wsgi_app
+        return self.wsgi_app(environ, start_response)
+
+def cli_command(argv=None):
+    """
+    The command a flask CLI process was started with ('clock-in' for
+    "flask --app wsgi clock-in ..."), or None when the process is not the
+    flask CLI (e.g. a gunicorn worker or pytest).
+    """
+    argv = sys.argv if argv is None else argv
+    if not argv or 'flask' not in os.path.normpath(argv[0]).split(os.sep)[-2:]:
+        return None
+    args = iter(argv[1:])
+    for arg in args:
+        if arg in _CLI_VALUE_OPTIONS:
+            next(args, None)
+        elif not arg.startswith('-'):
+            return arg
+    return None
+
+def create_app(overrides={}, lite=False):
+    """
+    Build the app. A lite app (lite=True) has only config, the database and
+    model layer, the response cache and the punch queue, which is all the
+    CLI commands use; its web layer (see init_web) is added just before it
+    serves its first request.
+    """
+    app = Flask(__name__, static_url_path='/static')
+    load_config(app, overrides)
+    configure_hashing(app)
+    init_db(app)
+    init_response_cache(app)
+    init_punch_queue(app)
+    if lite:
+        app.wsgi_app = _DeferredWeb(app)
+    else:
+        init_web(app)
     app.app_context().push()
     return app
\ No newline at end of file
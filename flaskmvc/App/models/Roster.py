@@ -1,5 +1,10 @@
+from collections import namedtuple
+
 from App.database import db
 
+# one row of User.viewRoster
+RosterEntry = namedtuple('RosterEntry', 'shift_id user_id start end')
+
 class Roster(db.Model):
     __tablename__ = "rosters"
     shiftID = db.Column(db.Integer, db.ForeignKey('shifts.id'), primary_key=True)
@@ -7,6 +12,10 @@ class Roster(db.Model):
     shift = db.relationship("Shift", backref="roster")
     user = db.relationship("User", backref="rosters")
 
+    __table_args__ = (
+        db.Index('ix_rosters_user', 'userID'),
+    )
+
     def __init__(self, shiftID, userID):
         self.shiftID = shiftID
         self.userID = userID
\ No newline at end of file
@@ -5,13 +5,25 @@ class Shift(db.Model):
     __tablename__ = "shifts"
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
-    changeRequest = db.Column(db.String(200))
     weekStart = db.Column(db.Date, nullable=False)
     weekEnd = db.Column(db.Date, nullable=False)
+    # set on the Shift materialised for one occurrence of a ShiftTemplate
+    template_id = db.Column(db.Integer, db.ForeignKey('shift_templates.id', name='fk_shifts_template_id'))
+    template_date = db.Column(db.Date)
     user = db.relationship("User", backref="shifts")
 
-    def __init__(self, user_id, weekStart, weekEnd, changeRequest=None):
+    __table_args__ = (
+        # per-user lookups (User.viewRoster, clock in/out shift checks, reports)
+        db.Index('ix_shifts_user_week', 'user_id', 'weekStart', 'weekEnd'),
+        # weekly roster and report range scans
+        db.Index('ix_shifts_week', 'weekStart', 'weekEnd'),
+        # at most one Shift per template occurrence; date first for range reads
+        db.UniqueConstraint('template_date', 'template_id', name='uq_shifts_template_date'),
+    )
+
+    def __init__(self, user_id, weekStart, weekEnd, template_id=None, template_date=None):
         self.user_id = user_id
         self.weekStart = weekStart
         self.weekEnd = weekEnd
-        self.changeRequest = changeRequest
+        self.template_id = template_id
+        self.template_date = template_date
@@ -22,9 +22,7 @@ class Admin(User):
         :param shiftList: List of shift IDs to assign
         """
         from App.models.Roster import Roster
-        for shift_id in shiftList:
-            roster = Roster(shiftID=shift_id, userID=user_id)
-            session.add(roster)
+        session.add_all([Roster(shiftID=shift_id, userID=user_id) for shift_id in shiftList])
         session.commit()
 
     def viewWeeklyReport(self, session, week_start, week_end):
@@ -35,41 +33,65 @@ class Admin(User):
         :param week_end: End date of the week (inclusive)
         :return: List of Shift objects
         """
+        from sqlalchemy.orm import selectinload
         from App.models.Shift import Shift
-        shifts = session.query(Shift).filter(
+        from App.models.staff import Staff
+        shifts = session.query(Shift).options(
+            selectinload(Shift.user).selectin_polymorphic([Admin, Staff])
+        ).filter(
             Shift.weekStart >= week_start,
             Shift.weekEnd <= week_end
-        ).all()
+        ).execution_options(use_replica=True).all()
         return shifts
 
+    def viewWeeklyHours(self, session, week_start, week_end):
+        """
+        Worked time, overtime, late clock-ins and open records per staff member
+        for a week, computed in bulk by App.controllers.hours.
+        :param session: SQLAlchemy session
+        :param week_start: Start date of the week (inclusive)
+        :param week_end: End date of the week (inclusive)
+        :return: Dict of user id to totals (see compute_hours)
+        """
+        from App.controllers.hours import staff_hours
+        return staff_hours(week_start, week_end)
+
+    def _decideRequest(self, session, user_id, shift_id, status):
+        import datetime
+        from App.models.shift_change_request import RequestStatus, ShiftChangeRequest
+        change = session.query(ShiftChangeRequest).filter_by(
+            shiftID=shift_id, userID=user_id, status=RequestStatus.PENDING
+        ).first()
+        if not change:
+            return False
+        change.status = status
+        change.decided = datetime.datetime.now()
+        change.decidedBy = self.user_id
+        session.commit()
+        return True
+
     def approveRequest(self, session, user_id, shift_id):
         """
-        Approve a shift change request.
+        Approve a shift's pending change request.
         :param session: SQLAlchemy session
         :param user_id: ID of the user who made the request
         :param shift_id: ID of the shift
         :return: String indicating approval
         """
-        from App.models.Shift import Shift
-        shift = session.query(Shift).filter_by(id=shift_id, user_id=user_id).first()
-        if shift and shift.changeRequest:
-            shift.changeRequest = "APPROVED: " + shift.changeRequest
-            session.commit()
+        from App.models.shift_change_request import RequestStatus
+        if self._decideRequest(session, user_id, shift_id, RequestStatus.APPROVED):
             return f"Request for shift {shift_id} by user {user_id} approved."
         return f"No pending request found for shift {shift_id} by user {user_id}."
 
     def denyRequest(self, session, user_id, shift_id):
         """
-        Deny a shift change request.
+        Deny a shift's pending change request.
         :param session: SQLAlchemy session
         :param user_id: ID of the user who made the request
         :param shift_id: ID of the shift
         :return: String indicating denial
         """
-        from App.models.Shift import Shift
-        shift = session.query(Shift).filter_by(id=shift_id, user_id=user_id).first()
-        if shift and shift.changeRequest:
-            shift.changeRequest = "DENIED: " + shift.changeRequest
-            session.commit()
+        from App.models.shift_change_request import RequestStatus
+        if self._decideRequest(session, user_id, shift_id, RequestStatus.DENIED):
             return f"Request for shift {shift_id} by user {user_id} denied."
         return f"No pending request found for shift {shift_id} by user {user_id}."
\ No newline at end of file
@@ -6,4 +6,18 @@ class AttendanceRecord(db.Model):
     shiftID = db.Column(db.Integer, db.ForeignKey('shifts.id'), nullable=False)
     userID = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
     timeIn = db.Column(db.DateTime, nullable=False)
-    timeout = db.Column(db.DateTime)
\ No newline at end of file
+    timeout = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # per-user history and report ranges
+        db.Index('ix_attendance_user_timein', 'userID', 'timeIn'),
+        db.Index('ix_attendance_timein', 'timeIn'),
+        # clock-out lookup of the record still open for a shift
+        db.Index('ix_attendance_shift_user_timeout', 'shiftID', 'userID', 'timeout'),
+        # partial index holding only open records, where the database supports it
+        db.Index(
+            'ix_attendance_open', 'shiftID', 'userID',
+            postgresql_where=db.text('timeout IS NULL'),
+            sqlite_where=db.text('timeout IS NULL')
+        ),
+    )
\ No newline at end of file
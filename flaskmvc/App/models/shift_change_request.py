@@ -0,0 +1,43 @@
+import datetime, enum
+
+from App.database import db
+
+
+class RequestStatus(enum.Enum):
+    PENDING = 'pending'
+    APPROVED = 'approved'
+    DENIED = 'denied'
+
+
+class ShiftChangeRequest(db.Model):
+    """A staff member's request to change one of their shifts, and the admin's decision."""
+    __tablename__ = "shift_change_requests"
+    id = db.Column(db.Integer, primary_key=True)
+    shiftID = db.Column(db.Integer, db.ForeignKey('shifts.id'), nullable=False)
+    userID = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    details = db.Column(db.String(200), nullable=False)
+    # stored as the lowercase value in a VARCHAR, so no database enum type is needed
+    status = db.Column(
+        db.Enum(RequestStatus, name='shift_change_request_status', native_enum=False, length=10,
+                values_callable=lambda statuses: [status.value for status in statuses]),
+        nullable=False, default=RequestStatus.PENDING
+    )
+    created = db.Column(db.DateTime, nullable=False, default=datetime.datetime.now)
+    decided = db.Column(db.DateTime)
+    decidedBy = db.Column(db.Integer, db.ForeignKey('users.user_id'))
+    shift = db.relationship("Shift", backref="change_requests")
+    user = db.relationship("User", foreign_keys=[userID], backref="change_requests")
+
+    __table_args__ = (
+        # pending queue, oldest first
+        db.Index('ix_change_requests_status_created', 'status', 'created'),
+        # the open request of a shift (requestShiftChange, approve/deny by shift)
+        db.Index('ix_change_requests_shift_status', 'shiftID', 'status'),
+    )
+
+    def __init__(self, shiftID, userID, details, status=RequestStatus.PENDING, created=None):
+        self.shiftID = shiftID
+        self.userID = userID
+        self.details = details
+        self.status = status
+        self.created = created or datetime.datetime.now()
@@ -0,0 +1,34 @@
+from App.database import db
+
+
+class ShiftTemplate(db.Model):
+    """
+    A staff member's recurring shift: the weekdays in the weekdays bitmask
+    (bit 0 is Monday) from valid_from to valid_until (inclusive; open-ended
+    when NULL). Occurrences have no Shift row until they are clocked against
+    or overridden (see App.controllers.shift_template); the Shift created
+    then records the occurrence in template_id and template_date.
+    """
+    __tablename__ = "shift_templates"
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    weekdays = db.Column(db.Integer, nullable=False)
+    start_time = db.Column(db.Time, nullable=False)
+    end_time = db.Column(db.Time, nullable=False)
+    valid_from = db.Column(db.Date, nullable=False)
+    valid_until = db.Column(db.Date)
+    user = db.relationship("User", backref="shift_templates")
+
+    __table_args__ = (
+        # per-user conflict checks and the templates live in a date range
+        db.Index('ix_shift_templates_user_from', 'user_id', 'valid_from'),
+        db.Index('ix_shift_templates_valid', 'valid_from', 'valid_until'),
+    )
+
+    def __init__(self, user_id, weekdays, start_time, end_time, valid_from, valid_until=None):
+        self.user_id = user_id
+        self.weekdays = weekdays
+        self.start_time = start_time
+        self.end_time = end_time
+        self.valid_from = valid_from
+        self.valid_until = valid_until
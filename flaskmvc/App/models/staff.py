@@ -16,18 +16,32 @@ class Staff(User):
 
     def requestShiftChange(self, session, shift_id, request_text):
         """
-        Request a shift change by updating the changeRequest field in Shift.
+        Request a shift change by opening a pending ShiftChangeRequest, or
+        replacing the details of the shift's pending one.
         :param session: SQLAlchemy session
-        :param shift_id: ID of the shift to request change for
+        :param shift_id: ID of the shift to request change for, or the
+            reference of a recurring shift's occurrence, which is given its
+            own Shift row to carry the change
         :param request_text: The change request details
+        :return: The ShiftChangeRequest, or None if the shift is not this user's
         """
         from App.models.Shift import Shift
+        from App.models.shift_change_request import RequestStatus, ShiftChangeRequest
+        from App.controllers.shift_template import resolve_shift_id
+        shift_id = resolve_shift_id(shift_id, self.user_id)
+        if shift_id is None:
+            return None
         shift = session.query(Shift).filter_by(id=shift_id, user_id=self.user_id).first()
-        if shift:
-            shift.changeRequest = request_text
-            session.commit()
-            return shift
-        return None
+        if not shift:
+            return None
+        change = session.query(ShiftChangeRequest).filter_by(shiftID=shift_id, status=RequestStatus.PENDING).first()
+        if change:
+            change.details = request_text
+        else:
+            change = ShiftChangeRequest(shiftID=shift_id, userID=self.user_id, details=request_text)
+            session.add(change)
+        session.commit()
+        return change
 
 
 
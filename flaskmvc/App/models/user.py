@@ -1,5 +1,5 @@
-from werkzeug.security import check_password_hash, generate_password_hash
 from App.database import db
+from App.hashing import hash_password, verify_password
 
 class User(db.Model):
     __tablename__ = "users"
@@ -29,24 +29,35 @@ class User(db.Model):
 
     def set_password(self, password):
         """Create hashed password."""
-        self.password = generate_password_hash(password)
+        self.password = hash_password(password)
     
     def check_password(self, password):
         """Check hashed password."""
-        return check_password_hash(self.password, password)
+        return verify_password(self.password, password)
 
     def clockIn(self, session, shift_id, timein):
         """
         Clock in the user for a shift.
         :param session: SQLAlchemy session
-        :param shift_id: ID of the shift
+        :param shift_id: ID of the shift, or the reference of a recurring
+            shift's occurrence (see App.controllers.shift_template.shift_ref)
         :param timein: datetime/date object for clock-in time
         """
+        from flask import current_app
         from App.models.attendance_record import AttendanceRecord
+        if 'punch_queue' in current_app.extensions:
+            # group-committed with other punches by the write-behind queue
+            from App.controllers.attendance import submit_punch_events
+            result = submit_punch_events([{'type': 'in', 'staff': self.email, 'shift_id': shift_id, 'time': timein}])[0]
+            return session.get(AttendanceRecord, result['attendance_id']) if result['status'] == 'ok' else None
+        from App.controllers.shift_template import resolve_shift_id
+        shift_id = resolve_shift_id(shift_id, self.user_id)
+        if shift_id is None:
+            return None
         attendance = AttendanceRecord(
             shiftID=shift_id,
             userID=self.user_id,
-            timein=timein,
+            timeIn=timein,
             timeout=None
         )
         session.add(attendance)
@@ -57,10 +68,20 @@ class User(db.Model):
         """
         Clock out the user for a shift.
         :param session: SQLAlchemy session
-        :param shift_id: ID of the shift
+        :param shift_id: ID of the shift, or the reference of a recurring
+            shift's occurrence
         :param timeout: datetime/date object for clock-out time
         """
+        from flask import current_app
         from App.models.attendance_record import AttendanceRecord
+        if 'punch_queue' in current_app.extensions:
+            from App.controllers.attendance import submit_punch_events
+            result = submit_punch_events([{'type': 'out', 'staff': self.email, 'shift_id': shift_id, 'time': timeout}])[0]
+            return session.get(AttendanceRecord, result['attendance_id']) if result['status'] == 'ok' else None
+        from App.controllers.shift_template import resolve_shift_id
+        shift_id = resolve_shift_id(shift_id, self.user_id, create=False)
+        if shift_id is None:
+            return None
         attendance = session.query(AttendanceRecord).filter_by(
             shiftID=shift_id,
             userID=self.user_id,
@@ -71,20 +92,70 @@ class User(db.Model):
             session.commit()
         return attendance
 
-    def viewRoster(self, session):
+    def viewRoster(self, session, start=None, end=None, limit=None, after=None):
         """
-        View all roster entries for this user.
+        View this user's roster entries, earliest shift first, read with one
+        join of rosters and shifts. Occurrences of the user's recurring shift
+        templates that have no Shift row yet are expanded lazily and merged
+        in, with their shift reference as shift_id.
         :param session: SQLAlchemy session
-        :return: List of Roster objects
+        :param start: Optional date; only shifts starting on or after it
+        :param end: Optional date; only shifts ending on or before it
+        :param limit: Optional maximum number of entries
+        :param after: Optional (start date, shift id) of the last entry
+            already seen, to continue from it
+        :return: List of RosterEntry tuples (shift_id, user_id, start, end)
         """
+        import datetime, heapq, itertools
         from App.models.Shift import Shift
-        from App.models.Roster import Roster
-        # Find all shifts for this user
-        user_shifts = session.query(Shift).filter_by(user_id=self.user_id).all()
-        shift_ids = [shift.id for shift in user_shifts]
-        # Find all roster entries for these shifts
-        rosters = session.query(Roster).filter(Roster.shiftID.in_(shift_ids)).all()
-        return rosters
-
-
-
+        from App.models.Roster import Roster, RosterEntry
+        from App.controllers.shift_template import TEMPLATE_HORIZON, expand_templates, shift_order, templates_query
+        # walks ix_shifts_user_week in order and joins each shift's entry
+        # by primary key, so the cost is bounded by limit
+        query = (
+            db.select(Roster.shiftID, Roster.userID, Shift.weekStart, Shift.weekEnd, Shift.template_id, Shift.template_date)
+            .join(Shift, Shift.id == Roster.shiftID)
+            .filter(Shift.user_id == self.user_id)
+            .order_by(Shift.weekStart, Shift.id)
+        )
+        if start is not None:
+            query = query.filter(Shift.weekStart >= start)
+        if end is not None:
+            query = query.filter(Shift.weekEnd <= end)
+        if after is not None:
+            after_start, after_id = after
+            if isinstance(after_id, str):
+                # a template occurrence; the day's shifts all came before it
+                query = query.filter(Shift.weekStart > after_start)
+            else:
+                query = query.filter(db.or_(
+                    Shift.weekStart > after_start,
+                    db.and_(Shift.weekStart == after_start, Shift.id > after_id)
+                ))
+        if limit is not None:
+            query = query.limit(limit)
+        rows = session.execute(query).all()
+        entries = [RosterEntry(*row[:4]) for row in rows]
+        first = max(day for day in (start, after and after[0]) if day) if start or after else None
+        templates = session.execute(templates_query(first, end, [self.user_id])).all()
+        if not templates:
+            return entries
+        # every materialised occurrence that could make the page is in rows
+        materialized = [(row.template_id, row.template_date) for row in rows if row.template_id is not None]
+        if after is not None:
+            # and on the day of after, those in rows are only the ones following it
+            materialized += session.execute(
+                db.select(Shift.template_id, Shift.template_date)
+                .filter(Shift.user_id == self.user_id, Shift.template_date == after[0])
+            ).all()
+        last = end if end is not None or limit is not None else datetime.date.today() + TEMPLATE_HORIZON
+        occurrences = (
+            RosterEntry(occurrence.id, occurrence.user_id, occurrence.weekStart, occurrence.weekEnd)
+            for occurrence in expand_templates(templates, materialized, first, last)
+        )
+        if after is not None:
+            occurrences = itertools.dropwhile(
+                lambda entry: shift_order(entry.start, entry.shift_id) <= shift_order(*after), occurrences
+            )
+        merged = heapq.merge(entries, occurrences, key=lambda entry: shift_order(entry.start, entry.shift_id))
+        return list(itertools.islice(merged, limit))
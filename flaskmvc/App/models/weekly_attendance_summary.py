@@ -0,0 +1,28 @@
+from App.database import db
+
+class WeeklyAttendanceSummary(db.Model):
+    """
+    Per-user totals for one ISO week, kept in step with shifts and
+    attendance_records by App.controllers.rollup.
+    Shifts count toward the week their weekStart falls in and attendance
+    records toward the week of their timeIn; only closed records are counted.
+    """
+    __tablename__ = "weekly_attendance_summary"
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), primary_key=True)
+    week_start = db.Column(db.Date, primary_key=True)  # Monday of the ISO week
+    scheduled_shifts = db.Column(db.Integer, nullable=False, default=0)
+    completed_records = db.Column(db.Integer, nullable=False, default=0)
+    total_seconds = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # report range scans across all users
+        db.Index('ix_weekly_summary_week', 'week_start'),
+    )
+
+
+class RollupStatus(db.Model):
+    """Whether a rollup table has been backfilled and is still being maintained."""
+    __tablename__ = "rollup_status"
+    name = db.Column(db.String(50), primary_key=True)
+    built_at = db.Column(db.DateTime)
+    stale = db.Column(db.Boolean, nullable=False, default=True)
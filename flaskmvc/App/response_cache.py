@@ -0,0 +1,202 @@
+import datetime, functools, hashlib, itertools, json, threading, time
+from urllib.parse import urlencode
+
+from flask import Response, current_app, has_app_context, request
+from sqlalchemy import event, inspect
+
+from App.cache import TTLCache
+from App.database import db
+
+
+class LocalBackend:
+    """
+    In-process LRU. Entries and version counters are private to each worker,
+    so a write seen by one worker reaches the others' cached responses only
+    when those expire; use RedisBackend to share them.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def set(self, key, value, ex=None):
+        self._entries.set(key, value, ttl=ex)
+
+    def mget(self, keys):
+        with self._lock:
+            return [self._versions.get(key) for key in keys]
+
+    def incr(self, key):
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            return self._versions[key]
+
+
+class RedisBackend:
+    """
+    Entries and version counters in Redis, shared by every worker. Any client
+    with redis-py's get/set(ex=)/mget/incr methods can be passed in.
+    """
+
+    def __init__(self, client, prefix='response-cache:'):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND 'redis' needs the redis package installed.") from None
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value, ex=None):
+        self.client.set(self.prefix + key, value, ex=ex)
+
+    def mget(self, keys):
+        return self.client.mget([self.prefix + key for key in keys])
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+
+class ResponseCache:
+    """
+    Cached GET responses keyed by request URL and the version counters of
+    the tables they were built from. Committing a write to a table bumps its
+    counter, so later requests miss and rebuild instead of being purged.
+    """
+
+    def __init__(self, backend, ttl=60):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def versions(self, tables):
+        values = self.backend.mget([f"version:{table}" for table in tables])
+        return [int(value or 0) for value in values]
+
+    def bump(self, tables):
+        for table in sorted(tables):
+            self.backend.incr(f"version:{table}")
+
+    def get(self, key):
+        data = self.backend.get(f"entry:{key}")
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        header, body = data.split(b'\n', 1)
+        return dict(json.loads(header), body=body)
+
+    def set(self, key, entry):
+        header = json.dumps({name: value for name, value in entry.items() if name != 'body'})
+        self.backend.set(f"entry:{key}", header.encode() + b'\n' + entry['body'], ex=self.ttl)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+def cached_response(*tables, vary=None):
+    """
+    Serve a GET view's 200 responses from the app's response cache until one
+    of tables is written. Responses carry a strong ETag (a hash of the body)
+    and Last-Modified, and conditional requests are answered with 304.
+    Entries are keyed by path and query string; vary is an optional callable
+    whose result is added to the key, for inputs the view resolves itself
+    (e.g. the current week when the query does not name one).
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions.get('response_cache')
+            if cache is None:
+                return view(*args, **kwargs)
+            # versions are read before the view runs, so a write committed
+            # while it runs leaves its result under the old versions
+            versions = cache.versions(tables)
+            query = urlencode(sorted(request.args.items(multi=True)))
+            key = f"{request.path}?{query}#{'.'.join(map(str, versions))}"
+            if vary is not None:
+                key += f"#{vary()}"
+            entry = cache.get(key)
+            if entry is None:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                body = response.get_data()
+                entry = {
+                    'etag': hashlib.sha256(body).hexdigest(),
+                    'modified': time.time(),
+                    'content_type': response.content_type,
+                    'body': body
+                }
+                cache.set(key, entry)
+            response = Response(entry['body'], content_type=entry['content_type'])
+            response.set_etag(entry['etag'])
+            response.last_modified = datetime.datetime.fromtimestamp(entry['modified'], datetime.timezone.utc)
+            response.cache_control.no_cache = True
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_flushed_tables(session, flush_context):
+    tables = session.info.setdefault('written_tables', set())
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        tables.update(table.name for table in inspect(obj).mapper.tables)
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _collect_bulk_tables(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None:
+            orm_execute_state.session.info.setdefault('written_tables', set()).add(table.name)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _bump_written_tables(session):
+    tables = session.info.pop('written_tables', None)
+    if tables and has_app_context() and 'response_cache' in current_app.extensions:
+        current_app.extensions['response_cache'].bump(tables)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_written_tables(session):
+    session.info.pop('written_tables', None)
+
+
+def init_response_cache(app):
+    """
+    Set up the response cache from config:
+    RESPONSE_CACHE_BACKEND    'redis', 'local' or 'none'; defaults to 'redis' when
+                              RESPONSE_CACHE_REDIS_URL is set and 'none' otherwise
+    RESPONSE_CACHE_REDIS_URL  Redis URL for the redis backend
+    RESPONSE_CACHE_TTL        seconds an entry is kept
+    RESPONSE_CACHE_SIZE       most entries per worker for the local backend
+    The local backend only sees writes made by its own worker, so it is
+    never picked unless asked for.
+    """
+    kind = app.config.get('RESPONSE_CACHE_BACKEND') or (
+        'redis' if app.config.get('RESPONSE_CACHE_REDIS_URL') else 'none'
+    )
+    ttl = app.config.get('RESPONSE_CACHE_TTL', 60)
+    if kind == 'none':
+        return None
+    if kind == 'redis':
+        backend = RedisBackend.from_url(app.config['RESPONSE_CACHE_REDIS_URL'])
+    else:
+        backend = LocalBackend(maxsize=app.config.get('RESPONSE_CACHE_SIZE', 1024), ttl=ttl)
+    cache = ResponseCache(backend, ttl=ttl)
+    app.extensions['response_cache'] = cache
+    return cache
@@ -1,15 +1,16 @@
 
 async function getUserData(){
     const response = await fetch('/api/users');
-    return response.json();
+    const data = await response.json();
+    return data.users;
 }
 
 function loadTable(users){
     const table = document.querySelector('#result');
     for(let user of users){
         table.innerHTML += `<tr>
-            <td>${user.id}</td>
-            <td>${user.username}</td>
+            <td>${user.user_id}</td>
+            <td>${user.name}</td>
         </tr>`;
     }
 }
@@ -1 +1,20 @@
-from .test_app import *
\ No newline at end of file
+from .test_app import *
+from .test_roster import *
+from .test_report import *
+from .test_schedule import *
+from .test_attendance import *
+from .test_auth import *
+from .test_users import *
+from .test_database import *
+from .test_replica import *
+from .test_rollup import *
+from .test_response_cache import *
+from .test_change_request import *
+from .test_export import *
+from .test_hours import *
+from .test_instrumentation import *
+from .test_bench import *
+from .test_startup import *
+from .test_command_server import *
+from .test_async_api import *
+from .test_shift_template import *
\ No newline at end of file
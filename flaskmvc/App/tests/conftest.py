@@ -0,0 +1,35 @@
+import pytest
+
+from App.main import create_app
+from App.database import db, create_db
+from App.controllers import identity_cache, shift_cache, staff_cache
+
+
+@pytest.fixture(scope="module")
+def app_config():
+    """Config overrides for the module's app; a module overrides this fixture to change them."""
+    return {}
+
+
+@pytest.fixture(scope="module")
+def lite():
+    """Whether the module's app is a lite app (see create_app); a module overrides this fixture to change it."""
+    return False
+
+
+@pytest.fixture(scope="module")
+def app(app_config, lite):
+    """
+    An app on a fresh in-memory database, one per test module, with its
+    tables created and the per-process caches emptied. Everything is
+    dropped once the module is done. Modules seed it in their own fixture.
+    """
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://', **app_config}, lite=lite)
+    create_db()
+    # user and shift ids are reused from one module's database to the next
+    identity_cache.clear()
+    staff_cache.clear()
+    shift_cache.clear()
+    yield app
+    db.session.remove()
+    db.drop_all()
@@ -0,0 +1,156 @@
+import asyncio, datetime, json, pytest
+
+from flask_jwt_extended import create_access_token
+
+from App.main import create_app
+from App.database import db
+from App.models.Shift import Shift
+from App.models.Roster import Roster
+from App.models.admin import Admin
+from App.models.staff import Staff
+from App.models.attendance_record import AttendanceRecord
+from App.controllers import get_current_week, identity_cache, rebuild_rollups
+from App.async_api import async_database_url, create_asgi_app
+
+
+@pytest.fixture(scope="module")
+def async_api(tmp_path_factory):
+    pytest.importorskip("aiosqlite")
+    path = tmp_path_factory.mktemp("async") / "async.db"
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f"sqlite:///{path}", 'RESPONSE_CACHE_BACKEND': 'none'})
+    db.create_all()
+    identity_cache.clear()
+    staff = Staff(name="Async Staff", email="async-staff@example.com", password="staffpass")
+    admin = Admin(name="Async Admin", email="async-admin@example.com", password="adminpass")
+    db.session.add_all([staff, admin])
+    db.session.commit()
+    monday, _ = get_current_week()
+    shifts = [Shift(staff.user_id, monday + datetime.timedelta(days=day), monday + datetime.timedelta(days=day))
+              for day in range(3)]
+    db.session.add_all(shifts)
+    db.session.commit()
+    db.session.add_all([Roster(shift.id, staff.user_id) for shift in shifts[:2]])
+    start = datetime.datetime.combine(monday, datetime.time(8))
+    db.session.add_all([
+        AttendanceRecord(shiftID=shifts[0].id, userID=staff.user_id, timeIn=start, timeout=start + datetime.timedelta(hours=8)),
+        AttendanceRecord(shiftID=shifts[1].id, userID=staff.user_id, timeIn=start + datetime.timedelta(days=1), timeout=None)
+    ])
+    db.session.commit()
+    tokens = {user.email: create_access_token(identity=str(user.user_id)) for user in (staff, admin)}
+    yield app, create_asgi_app(app, mount_wsgi=True), tokens
+    db.session.remove()
+    db.drop_all()
+
+
+def get(api, requests):
+    """Run (path, headers) requests through the ASGI app in one event loop; returns (status, json) pairs."""
+    async def request(path, headers):
+        path, _, query = path.partition('?')
+        scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query.encode(),
+                 'headers': [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+                 'http_version': '1.1', 'scheme': 'http', 'root_path': '', 'server': ('testserver', 80),
+                 'client': ('127.0.0.1', 1234)}
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        await api(scope, receive, send)
+        body = b''.join(message.get('body', b'') for message in messages if message['type'] == 'http.response.body')
+        return messages[0]['status'], json.loads(body)
+
+    async def run():
+        try:
+            return [await request(path, headers) for path, headers in requests]
+        finally:
+            if api.engine is not None:
+                await api.engine.dispose()
+                api.engine = None
+    return asyncio.run(run())
+
+
+def bearer(token):
+    return {'Authorization': f"Bearer {token}"}
+
+
+def test_async_reads_match_the_flask_view(async_api):
+    app, api, tokens = async_api
+    token = tokens['async-staff@example.com']
+    expected = app.test_client().get('/api/me/week', headers=bearer(token)).json
+    assert len(expected['roster']) == 3
+    assert [shift['rostered'] for shift in expected['roster']] == [True, True, False]
+    assert expected['open_shift']['shift_id'] == expected['roster'][1]['shift_id']
+    assert expected['summary'] == {'scheduled_shifts': 3, 'attendance_records': 2, 'total_seconds': 8 * 3600,
+                                   'total_hours': 8.0}
+
+    (status, week), (_, roster), (_, open_shift), (_, summary), (_, cookie_week) = get(api, [
+        ('/async/api/me/week', bearer(token)),
+        ('/async/api/me/roster', bearer(token)),
+        ('/async/api/me/open-shift', bearer(token)),
+        ('/async/api/me/summary', bearer(token)),
+        ('/async/api/me/week', {'Cookie': f"access_token={token}"})
+    ])
+    assert status == 200
+    assert week == expected == cookie_week
+    assert roster['roster'] == expected['roster']
+    assert open_shift == {'open_shift': expected['open_shift']}
+    assert {key: summary[key] for key in expected['summary']} == expected['summary']
+
+    # the same totals come from the weekly summary once it is built
+    rebuild_rollups()
+    (_, week), = get(api, [('/async/api/me/week', bearer(token))])
+    assert week == expected
+
+    # a user without shifts
+    (_, week), = get(api, [('/async/api/me/week', bearer(tokens['async-admin@example.com']))])
+    assert week['roster'] == [] and week['open_shift'] is None
+    assert week['summary']['scheduled_shifts'] == 0
+
+
+def test_async_errors_and_mounting(async_api):
+    app, api, tokens = async_api
+    responses = get(api, [
+        ('/async/api/me/week', {}),
+        ('/async/api/me/week', bearer('not-a-token')),
+        ('/async/api/me/week', {'Authorization': f"Basic {tokens['async-staff@example.com']}"}),
+        ('/async/api/me/week?week_start=03-03-2025', bearer(tokens['async-staff@example.com'])),
+        ('/async/api/me/week?week_start=2025-03-03', bearer(tokens['async-staff@example.com'])),
+        # everything else is served by the mounted Flask app
+        ('/health', {})
+    ])
+    assert [status for status, _ in responses] == [401, 401, 401, 400, 200, 200]
+    assert responses[4][1]['week_end'] == '2025-03-09' and responses[4][1]['roster'] == []
+    assert responses[5][1]['status'] == 'healthy'
+
+    standalone = create_asgi_app(app)
+    (status, _), = get(standalone, [('/health', {})])
+    assert status == 404
+
+
+def test_async_tokens_checked_like_flask(async_api):
+    app, api, tokens = async_api
+    staff = bearer(tokens['async-staff@example.com'])
+    # a well-signed token for a user that does not exist
+    (status, _), = get(api, [('/async/api/me/week', bearer(create_access_token(identity='999999')))])
+    assert status == 401
+    audience, app.config['JWT_DECODE_AUDIENCE'] = app.config['JWT_DECODE_AUDIENCE'], 'roster-app'
+    try:
+        (status, _), = get(api, [('/async/api/me/week', staff)])
+        assert status == 401
+    finally:
+        app.config['JWT_DECODE_AUDIENCE'] = audience
+    (status, _), = get(api, [('/async/api/me/week', staff)])
+    assert status == 200
+
+
+def test_async_database_url():
+    assert str(async_database_url({'SQLALCHEMY_DATABASE_URI': 'sqlite:////srv/app.db'})) == 'sqlite+aiosqlite:////srv/app.db'
+    assert str(async_database_url({'SQLALCHEMY_DATABASE_URI': 'postgresql+psycopg2://u@db/app?sslmode=require'})) \
+        == 'postgresql+asyncpg://u@db/app?ssl=require'
+    assert str(async_database_url({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'ASYNC_DATABASE_URI': 'sqlite+aiosqlite:////x.db'})) \
+        == 'sqlite+aiosqlite:////x.db'
+    with pytest.raises(RuntimeError, match="in-memory"):
+        async_database_url({'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
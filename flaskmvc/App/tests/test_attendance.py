@@ -0,0 +1,230 @@
+import datetime, json, os, pytest, tempfile, threading, unittest
+from unittest import mock
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from flask_jwt_extended import create_access_token
+
+from App.database import db
+from App.models.admin import Admin
+from App.models.staff import Staff
+from App.models.Shift import Shift
+from App.models.attendance_record import AttendanceRecord
+from App.models.user import User
+from App.controllers import (
+    clock_in,
+    clock_out,
+    PunchQueue,
+    identity_cache,
+    record_punch_events,
+    shift_cache,
+    staff_cache
+)
+from .test_roster import QueryCounter
+
+DAY = datetime.date(2025, 10, 6)
+
+
+@pytest.fixture(autouse=True, scope="module")
+def attendance_db(app):
+    staff = [Staff(name=f"Staff {i}", email=f"punch{i}@example.com", password="staffpass") for i in range(3)]
+    db.session.add_all(staff)
+    db.session.flush()
+    db.session.add_all([
+        Shift(user_id=member.user_id, weekStart=DAY + datetime.timedelta(days=day), weekEnd=DAY + datetime.timedelta(days=day))
+        for member in staff for day in range(5)
+    ])
+    db.session.add(Admin(name="Alice Johnson", email="punch-admin@example.com", password="adminpass1"))
+    db.session.commit()
+    return app.test_client()
+
+
+def shift_ids(email):
+    return db.session.scalars(
+        db.select(Shift.id).join(Staff, Staff.user_id == Shift.user_id).filter(Staff.email == email).order_by(Shift.id)
+    ).all()
+
+
+'''
+    Integration Tests
+'''
+class PunchEventIntegrationTests(unittest.TestCase):
+
+    def test_clock_in_and_out(self):
+        shift_id = shift_ids("punch0@example.com")[0]
+        result = clock_in("punch0@example.com", shift_id, datetime.datetime(2025, 10, 6, 8, 0))
+        assert result['status'] == 'ok'
+        assert clock_in("punch0@example.com", shift_id, "2025-10-06T08:05")['status'] == 'error'
+        closed = clock_out("punch0@example.com", shift_id, "2025-10-06T16:00")
+        assert closed['attendance_id'] == result['attendance_id']
+        record = db.session.get(AttendanceRecord, result['attendance_id'])
+        assert record.timeout == datetime.datetime(2025, 10, 6, 16, 0)
+        assert clock_out("punch0@example.com", shift_id, "2025-10-06T16:00")['status'] == 'error'
+
+    def test_batch_results(self):
+        shift_id = shift_ids("punch1@example.com")[0]
+        other_shift = shift_ids("punch2@example.com")[0]
+        results = record_punch_events([
+            {'type': 'in', 'staff': "punch1@example.com", 'shift_id': shift_id, 'time': "2025-10-06T08:00"},
+            {'type': 'in', 'staff': "nobody@example.com", 'shift_id': shift_id, 'time': "2025-10-06T08:00"},
+            {'type': 'in', 'staff': "punch1@example.com", 'shift_id': other_shift, 'time': "2025-10-06T08:00"},
+            {'type': 'out', 'staff': "punch1@example.com", 'shift_id': shift_id, 'time': "2025-10-06T07:00"},
+            {'type': 'out', 'staff': "punch1@example.com", 'shift_id': shift_id, 'time': "2025-10-06T16:00"},
+            {'type': 'sideways', 'staff': "punch1@example.com"},
+        ])
+        assert [result['status'] for result in results] == ['ok', 'error', 'error', 'error', 'ok', 'error']
+        assert results[0]['attendance_id'] == results[4]['attendance_id']
+        record = db.session.get(AttendanceRecord, results[0]['attendance_id'])
+        assert record.timeout == datetime.datetime(2025, 10, 6, 16, 0)
+
+    def test_query_count_independent_of_batch_size(self):
+        staff_cache.clear()
+        shift_cache.clear()
+        events = [
+            {'type': kind, 'staff': f"punch{i}@example.com", 'shift_id': shift_id,
+             'time': "2025-10-07T08:00" if kind == 'in' else "2025-10-07T16:00"}
+            for i in range(3)
+            for shift_id in shift_ids(f"punch{i}@example.com")[1:]
+            for kind in ('in', 'out')
+        ]
+        with QueryCounter(db.engine) as large:
+            results = record_punch_events(events)
+        assert all(result['status'] == 'ok' for result in results)
+        # staff, shifts, open records and rollup upsert, plus the insert: one
+        # statement where RETURNING keeps parameter order in a batch, one per
+        # record on SQLite; commit is not a statement
+        inserts = len(events) // 2 if db.engine.dialect.name == 'sqlite' else 1
+        assert large.count == 4 + inserts
+
+
+class PunchQueueIntegrationTests(unittest.TestCase):
+
+    def setUp(self):
+        self.journal_dir = tempfile.mkdtemp()
+        self.queue = PunchQueue(current_app._get_current_object(), flush_interval=0.2, batch_size=50,
+                                journal_dir=self.journal_dir)
+
+    def test_group_commit(self):
+        commits = []
+        count_commit = lambda conn: commits.append(conn)
+        event.listen(db.engine, "commit", count_commit)
+        self.queue.start()
+        shifts = shift_ids("punch1@example.com")[1:5]
+        results = {}
+
+        def punch(shift_id):
+            results[shift_id] = self.queue.submit([
+                {'type': 'in', 'staff': "punch1@example.com", 'shift_id': shift_id, 'time': "2025-10-08T08:00"}
+            ])[0]
+
+        threads = [threading.Thread(target=punch, args=(shift_id,)) for shift_id in shifts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.queue.stop()
+        event.remove(db.engine, "commit", count_commit)
+        assert all(result['status'] == 'ok' for result in results.values())
+        assert len(commits) < len(shifts)
+        assert os.listdir(self.journal_dir) == []
+
+    def test_failed_commit_only_fails_its_own_event(self):
+        shifts = shift_ids("punch2@example.com")[1:4]
+        times = ["2025-10-07T09:30", "2025-10-08T09:30", "2025-10-09T09:30"]
+        bad_time = times[1]
+
+        def fail_on_bad_event(events, **kwargs):
+            if any(event['time'] == bad_time for event in events):
+                raise IntegrityError("INSERT INTO attendance_records", {}, Exception("duplicate punch"))
+            return record_punch_events(events, **kwargs)
+
+        results, errors = {}, {}
+
+        def punch(shift_id, time):
+            try:
+                results[shift_id] = self.queue.submit([
+                    {'type': 'in', 'staff': "punch2@example.com", 'shift_id': shift_id, 'time': time}
+                ])[0]
+            except IntegrityError as e:
+                errors[shift_id] = e
+
+        with mock.patch('App.controllers.punch_queue.record_punch_events', side_effect=fail_on_bad_event):
+            self.queue.start()
+            threads = [
+                threading.Thread(target=punch, args=(shift_id, time))
+                for shift_id, time in zip(shifts, times)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.queue.stop()
+        assert list(errors) == [shifts[1]]
+        assert sorted(results) == [shifts[0], shifts[2]] and all(result['status'] == 'ok' for result in results.values())
+        recorded = db.session.scalars(db.select(AttendanceRecord.shiftID).filter(
+            AttendanceRecord.timeIn.in_([datetime.datetime.fromisoformat(time) for time in times]))).all()
+        assert sorted(recorded) == [shifts[0], shifts[2]]
+        assert os.listdir(self.journal_dir) == []
+
+    def test_recover_journal(self):
+        shift_id = shift_ids("punch0@example.com")[4]
+        punches = [
+            {'type': 'in', 'staff': "punch0@example.com", 'shift_id': shift_id, 'time': "2025-10-10T08:00"},
+            {'type': 'out', 'staff': "punch0@example.com", 'shift_id': shift_id, 'time': "2025-10-10T16:00"},
+        ]
+        path = os.path.join(self.journal_dir, "punches-999999")
+        open(path + ".lock", "w").close()
+        with open(path + ".journal", "w") as journal:
+            journal.write(json.dumps({'seq': 1, 'event': dict(punches[0], time="2025-10-10T07:00")}) + "\n")
+            journal.write(json.dumps({'committed': 1}) + "\n")
+            journal.write(json.dumps({'seq': 2, 'event': punches[0]}) + "\n")
+            journal.write(json.dumps({'seq': 3, 'event': punches[1]}) + "\n")
+            journal.write('{"seq": 4, "ev')
+        assert self.queue.recover() == 2
+        records = db.session.scalars(db.select(AttendanceRecord).filter(
+            AttendanceRecord.shiftID == shift_id, AttendanceRecord.timeIn >= datetime.datetime(2025, 10, 10))).all()
+        assert [(record.timeIn.hour, record.timeout.hour) for record in records] == [(8, 16)]
+        assert os.listdir(self.journal_dir) == []
+
+        # committed before the process died, but not yet marked in its journal
+        open(path + ".lock", "w").close()
+        with open(path + ".journal", "w") as journal:
+            journal.write(''.join(json.dumps({'seq': seq, 'event': punch}) + "\n" for seq, punch in enumerate(punches, 1)))
+        assert self.queue.recover() == 2
+        assert db.session.scalar(db.select(db.func.count(AttendanceRecord.attendanceID)).filter(
+            AttendanceRecord.shiftID == shift_id, AttendanceRecord.timeIn >= datetime.datetime(2025, 10, 10))) == 1
+
+    def test_live_journal_is_not_recovered(self):
+        self.queue.start()
+        other = PunchQueue(current_app._get_current_object(), journal_dir=self.journal_dir)
+        assert other.recover() == 0
+        assert len(os.listdir(self.journal_dir)) == 2
+        self.queue.stop()
+        assert os.listdir(self.journal_dir) == []
+
+
+def token_for(email):
+    user_id = db.session.scalar(db.select(User.user_id).filter_by(email=email))
+    return {'Authorization': f"Bearer {create_access_token(identity=str(user_id))}"}
+
+
+def test_punch_events_api(attendance_db):
+    identity_cache.clear()
+    headers = token_for("punch2@example.com")
+    shift_id = shift_ids("punch2@example.com")[4]
+    events = [
+        {'type': 'in', 'staff': "punch2@example.com", 'shift_id': shift_id, 'time': "2025-10-10T08:00"},
+        {'type': 'out', 'staff': "punch2@example.com", 'shift_id': shift_id, 'time': "2025-10-10T16:00+02:00"}
+    ]
+    response = attendance_db.post('/api/attendance/events', json={'events': events}, headers=headers)
+    assert response.status_code == 200
+    assert (response.json['accepted'], response.json['rejected']) == (1, 1)
+    assert "UTC offset" in response.json['results'][1]['error']
+    # staff punch only for themselves; admins for anyone
+    other = [{'type': 'out', 'staff': "punch1@example.com", 'shift_id': shift_ids("punch1@example.com")[4],
+              'time': "2025-10-10T16:00"}]
+    assert attendance_db.post('/api/attendance/events', json={'events': other}, headers=headers).status_code == 403
+    response = attendance_db.post('/api/attendance/events', json={'events': other},
+                                  headers=token_for("punch-admin@example.com"))
+    assert response.status_code == 200
+    assert attendance_db.post('/api/attendance/events', json={'events': []}, headers=headers).status_code == 400
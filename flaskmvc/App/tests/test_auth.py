@@ -0,0 +1,106 @@
+import pytest, unittest
+from flask import current_app
+from flask_jwt_extended import create_access_token, decode_token
+
+from App.database import db
+from App.hashing import configure_hashing, needs_rehash
+from App.models.staff import Staff
+from App.controllers import (
+    identity_cache,
+    load_user,
+    login
+)
+from .test_roster import QueryCounter
+
+
+@pytest.fixture(autouse=True, scope="module")
+def auth_db(app):
+    db.session.add(Staff(name="Carol Lee", email="auth1@example.com", password="staffpass1"))
+    db.session.commit()
+    return app.test_client()
+
+
+def user_queries(counter):
+    return [statement for statement in counter.statements if 'FROM users' in statement]
+
+
+class UserQueryCounter(QueryCounter):
+
+    def __init__(self, engine):
+        super().__init__(engine)
+        self.statements = []
+
+    def _count(self, conn, cursor, statement, *args):
+        super()._count()
+        self.statements.append(statement)
+
+
+'''
+    Integration Tests
+'''
+class IdentityCacheIntegrationTests(unittest.TestCase):
+
+    def test_load_user_cached(self):
+        identity_cache.clear()
+        user = db.session.scalar(db.select(Staff).filter_by(email="auth1@example.com"))
+        db.session.expunge_all()
+        with QueryCounter(db.engine) as counter:
+            assert load_user(user.user_id).name == "Carol Lee"
+            db.session.expunge_all()
+            cached = load_user(user.user_id)
+            assert cached.email == "auth1@example.com" and cached.role == "staff"
+        assert counter.count == 1
+        assert identity_cache.stats()['hits'] >= 1
+
+    def test_update_invalidates(self):
+        user_id = db.session.scalar(db.select(Staff.user_id).filter_by(email="auth1@example.com"))
+        load_user(user_id).name = "Carol Lee-Smith"
+        db.session.commit()
+        db.session.expunge_all()
+        assert load_user(user_id).name == "Carol Lee-Smith"
+
+
+class PasswordHashIntegrationTests(unittest.TestCase):
+
+    def tearDown(self):
+        current_app.config.pop('PASSWORD_HASH_METHOD', None)
+        configure_hashing(current_app)
+
+    def test_login_upgrades_hash(self):
+        user = db.session.scalar(db.select(Staff).filter_by(email="auth1@example.com"))
+        assert user.password.startswith("scrypt:32768:8:1$")
+        current_app.config['PASSWORD_HASH_METHOD'] = "pbkdf2:sha256:2000"
+        configure_hashing(current_app)
+        assert needs_rehash(user.password)
+        assert login("auth1@example.com", "wrongpass") is None
+        assert user.password.startswith("scrypt:")
+        token = login("auth1@example.com", "staffpass1")
+        assert decode_token(token)['sub'] == str(user.user_id)
+        assert user.password.startswith("pbkdf2:sha256:2000$")
+        assert user.check_password("staffpass1") and not needs_rehash(user.password)
+
+    def test_partial_method_does_not_rehash(self):
+        user = db.session.scalar(db.select(Staff).filter_by(email="auth1@example.com"))
+        user.set_password("staffpass1")
+        db.session.commit()
+        current_app.config['PASSWORD_HASH_METHOD'] = "scrypt"
+        configure_hashing(current_app)
+        assert not needs_rehash(user.password)
+        current_app.config['PASSWORD_HASH_METHOD'] = "pbkdf2:sha256"
+        configure_hashing(current_app)
+        assert needs_rehash(user.password)
+        user.set_password("staffpass1")
+        assert user.password.startswith("pbkdf2:sha256:") and not needs_rehash(user.password)
+        db.session.rollback()
+
+
+def test_page_view_skips_users_table(auth_db):
+    identity_cache.clear()
+    user_id = db.session.scalar(db.select(Staff.user_id).filter_by(email="auth1@example.com"))
+    headers = {'Authorization': f"Bearer {create_access_token(identity=str(user_id))}"}
+    with UserQueryCounter(db.engine) as first:
+        assert auth_db.get('/', headers=headers).status_code == 200
+    with UserQueryCounter(db.engine) as second:
+        assert auth_db.get('/', headers=headers).status_code == 200
+    assert len(user_queries(first)) == 1
+    assert len(user_queries(second)) == 0
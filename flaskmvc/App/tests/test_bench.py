@@ -0,0 +1,67 @@
+import datetime, pytest
+
+from App.database import db
+from App.models.Shift import Shift
+from App.models.attendance_record import AttendanceRecord
+from App.bench import SCENARIOS, compare_to_baseline, generate_bench_data, load_baseline, percentile, run_scenario, save_baseline
+
+FIRST_WEEK = datetime.date(2025, 3, 3)
+
+
+@pytest.fixture(scope="module")
+def app_config():
+    return {'RESPONSE_CACHE_BACKEND': 'none'}
+
+
+@pytest.fixture(autouse=True, scope="module")
+def bench_data(app):
+    data = generate_bench_data(6, 2, first_week=FIRST_WEEK)
+    return app.test_client(use_cookies=False), data
+
+
+def test_generated_data(bench_data):
+    _, data = bench_data
+    assert len(data.admins) == 2
+    assert len(data.staff) == 6
+    assert db.session.scalar(db.select(db.func.count()).select_from(Shift)) == 6 * 5 * 2
+    # the first week is attended, the last is left open for the clock-in burst
+    assert db.session.scalar(db.select(db.func.count()).select_from(AttendanceRecord)) == 6 * 5
+    assert sorted(data.burst_shifts) == [user_id for user_id, _ in data.staff]
+    burst = db.session.get(Shift, data.burst_shifts[data.staff[0][0]])
+    assert burst.weekStart == FIRST_WEEK + datetime.timedelta(weeks=1)
+
+
+def test_every_scenario_runs_without_errors(bench_data):
+    client, data = bench_data
+    for name in SCENARIOS:
+        requests = 2 if name == 'login' else 14
+        result = run_scenario(client, data, name, requests, warmup=1)
+        assert result['requests'] == requests
+        assert result['errors'] == 0, name
+        assert result['p50_ms'] <= result['p95_ms'] <= result['p99_ms'] <= result['max_ms']
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 51
+    assert percentile(values, 99) == 100
+    assert percentile([7], 95) == 7
+
+
+def test_baseline_comparison(tmp_path):
+    baseline = {
+        'roster': {'p95_ms': 10.0, 'throughput': 100.0},
+        'report': {'p95_ms': 20.0, 'throughput': 50.0}
+    }
+    path = tmp_path / "baseline.json"
+    save_baseline(path, baseline, 6, 2)
+    assert load_baseline(path) == baseline
+    results = {
+        'roster': {'p95_ms': 11.5, 'throughput': 85.0},
+        'report': {'p95_ms': 30.0, 'throughput': 30.0},
+        'login': {'p95_ms': 500.0, 'throughput': 1.0}
+    }
+    assert compare_to_baseline(results, baseline, tolerance=0.2) == [
+        ('report', 'p95_ms', 20.0, 30.0),
+        ('report', 'throughput', 50.0, 30.0)
+    ]
@@ -0,0 +1,126 @@
+import datetime, pytest, unittest
+from flask_jwt_extended import create_access_token
+
+from App.database import db
+from App.models.admin import Admin
+from App.models.staff import Staff
+from App.models.Shift import Shift
+from App.models.shift_change_request import RequestStatus, ShiftChangeRequest
+from App.controllers import (
+    bulk_schedule_shifts,
+    decide_change_requests,
+    identity_cache,
+    list_pending_requests
+)
+
+DAY = datetime.date(2026, 2, 2)
+
+
+@pytest.fixture(autouse=True, scope="module")
+def change_db(app):
+    db.session.add_all([
+        Admin(name="Change Admin", email="change-admin@example.com", password="adminpass"),
+        Staff(name="Change Staff", email="change-staff@example.com", password="staffpass"),
+    ])
+    db.session.commit()
+    return app.test_client()
+
+
+def people():
+    admin = db.session.scalar(db.select(Admin).filter_by(email="change-admin@example.com"))
+    staff = db.session.scalar(db.select(Staff).filter_by(email="change-staff@example.com"))
+    return admin, staff
+
+
+def add_shifts(staff, count, first_day):
+    shifts = [
+        Shift(user_id=staff.user_id, weekStart=first_day + datetime.timedelta(days=day),
+              weekEnd=first_day + datetime.timedelta(days=day))
+        for day in range(count)
+    ]
+    db.session.add_all(shifts)
+    db.session.commit()
+    return shifts
+
+
+'''
+    Integration Tests
+'''
+class ChangeRequestIntegrationTests(unittest.TestCase):
+
+    def test_request_and_decide_one_shift(self):
+        admin, staff = people()
+        shift = add_shifts(staff, 1, DAY)[0]
+        first = staff.requestShiftChange(db.session, shift.id, "swap")
+        again = staff.requestShiftChange(db.session, shift.id, "swap with Dan")
+        assert again.id == first.id and again.details == "swap with Dan"
+        assert again.status == RequestStatus.PENDING
+        assert admin.approveRequest(db.session, staff.user_id, shift.id) == \
+            f"Request for shift {shift.id} by user {staff.user_id} approved."
+        assert admin.denyRequest(db.session, staff.user_id, shift.id).startswith("No pending request")
+        decided = db.session.get(ShiftChangeRequest, first.id)
+        assert (decided.status, decided.decidedBy) == (RequestStatus.APPROVED, admin.user_id)
+        assert decided.decided is not None
+
+    def test_pending_queue_pages_and_bulk_decisions(self):
+        admin, staff = people()
+        shifts = add_shifts(staff, 5, DAY + datetime.timedelta(days=7))
+        created = datetime.datetime(2026, 1, 1, 9, 0)
+        # two requests share a timestamp, so the cursor must break ties by id
+        db.session.add_all([
+            ShiftChangeRequest(shiftID=shift.id, userID=staff.user_id, details=f"change {i}",
+                               created=created + datetime.timedelta(minutes=min(i, 3)))
+            for i, shift in enumerate(shifts)
+        ])
+        db.session.commit()
+        ids = [row.id for row in db.session.execute(
+            db.select(ShiftChangeRequest.id).filter(ShiftChangeRequest.details.like("change %"))
+            .order_by(ShiftChangeRequest.created, ShiftChangeRequest.id)
+        )]
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = list_pending_requests(after=cursor, limit=2)
+            seen += [request['id'] for request in page]
+            if cursor is None:
+                break
+        # older than any request the other tests open
+        assert seen[:len(ids)] == ids and len(seen) == len(set(seen))
+
+        result = decide_change_requests(admin.user_id, approve=ids[:2], deny=[ids[2], 999999])
+        assert result == {'approved': ids[:2], 'denied': [ids[2]], 'skipped': [999999]}
+        assert decide_change_requests(admin.user_id, approve=ids[:1])['skipped'] == ids[:1]
+        with pytest.raises(ValueError):
+            decide_change_requests(admin.user_id, approve=ids[3:], deny=ids[3:])
+        assert [request['id'] for request in list_pending_requests()[0]][:2] == ids[3:]
+
+    def test_bulk_schedule_opens_requests(self):
+        _, staff = people()
+        results = bulk_schedule_shifts([
+            {'staff': staff.email, 'start': DAY + datetime.timedelta(days=14), 'end': DAY + datetime.timedelta(days=15),
+             'pattern': 'daily', 'change_request': "cover needed"}
+        ])
+        requests = db.session.scalars(
+            db.select(ShiftChangeRequest).filter(ShiftChangeRequest.shiftID.in_(results[0]['shift_ids']))
+        ).all()
+        assert [(request.details, request.status) for request in requests] == [("cover needed", RequestStatus.PENDING)] * 2
+
+
+def test_pending_queue_api(change_db):
+    admin, staff = people()
+    shift = add_shifts(staff, 1, DAY + datetime.timedelta(days=21))[0]
+    change = staff.requestShiftChange(db.session, shift.id, "api swap")
+    # user ids are reused by other test modules' databases
+    identity_cache.clear()
+    admin_headers = {'Authorization': f"Bearer {create_access_token(identity=str(admin.user_id))}"}
+    staff_headers = {'Authorization': f"Bearer {create_access_token(identity=str(staff.user_id))}"}
+
+    assert change_db.get('/api/shift-requests/pending').status_code == 401
+    assert change_db.get('/api/shift-requests/pending', headers=staff_headers).status_code == 403
+    response = change_db.get('/api/shift-requests/pending?limit=1000', headers=admin_headers)
+    assert response.status_code == 200 and change.id in [request['id'] for request in response.json['requests']]
+    assert change_db.get('/api/shift-requests/pending?after=bogus', headers=admin_headers).status_code == 400
+
+    response = change_db.post('/api/shift-requests/decisions', json={'deny': [change.id]}, headers=admin_headers)
+    assert response.status_code == 200 and response.json['denied'] == [change.id]
+    assert change_db.post('/api/shift-requests/decisions', json={'deny': "x"}, headers=admin_headers).status_code == 400
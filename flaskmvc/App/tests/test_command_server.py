@@ -0,0 +1,94 @@
+import socket, sys, threading, click, pytest
+
+from App.database import db
+from App.models.staff import Staff
+from App.command_server import CommandServer, _CommandHandler, send_command
+
+COMMANDS = ('staff-name', 'fail', 'quit')
+
+
+@pytest.fixture(scope="module")
+def lite():
+    return True
+
+
+@pytest.fixture(autouse=True, scope="module")
+def command_app(app):
+    db.session.add(Staff(name="Socket Staff", email="socket-staff@example.com", password="staffpass"))
+    db.session.commit()
+
+    @app.cli.command("staff-name")
+    @click.argument("email")
+    def staff_name(email):
+        staff = db.session.scalar(db.select(Staff).filter_by(email=email))
+        if not staff:
+            print(f"Staff with email '{email}' not found.", file=sys.stderr)
+            sys.exit(3)
+        print(staff.name)
+
+    @app.cli.command("fail")
+    def fail():
+        raise RuntimeError("boom")
+
+    return app
+
+
+@pytest.fixture
+def server(command_app, tmp_path):
+    server = CommandServer(command_app, str(tmp_path / "commands.sock"), commands=COMMANDS)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_replies_carry_output_and_exit_code(server):
+    path = server.server_address
+    assert send_command(['staff-name', 'socket-staff@example.com'], path) == {
+        'stdout': "Socket Staff\n", 'stderr': '', 'exit_code': 0
+    }
+    assert send_command(['staff-name', 'nobody@example.com'], path) == {
+        'stdout': '', 'stderr': "Staff with email 'nobody@example.com' not found.\n", 'exit_code': 3
+    }
+
+
+def test_usage_errors_and_failures(server):
+    path = server.server_address
+    reply = send_command(['staff-name'], path)
+    assert reply['exit_code'] == 2
+    assert "Usage: flask staff-name [OPTIONS] EMAIL" in reply['stderr']
+    assert "Missing argument 'EMAIL'" in reply['stderr']
+    assert send_command(['fail'], path) == {'stdout': '', 'stderr': "Error: boom\n", 'exit_code': 1}
+    # only the configured commands are served, even if the app has others
+    reply = send_command(['quit'], path)
+    assert reply['exit_code'] == 2
+    assert send_command(['init'], path)['exit_code'] == 2
+    # still serving after all of the above
+    assert send_command(['staff-name', 'socket-staff@example.com'], path)['exit_code'] == 0
+
+
+def test_socket_is_replaced_only_when_stale(command_app, tmp_path):
+    path = str(tmp_path / "stale.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+    server = CommandServer(command_app, path, commands=COMMANDS)
+    try:
+        with pytest.raises(RuntimeError, match="already listening"):
+            CommandServer(command_app, path, commands=COMMANDS)
+    finally:
+        server.server_close()
+    with pytest.raises(FileNotFoundError):
+        send_command(['staff-name', 'socket-staff@example.com'], path)
+
+
+def test_silent_client_times_out(server, monkeypatch):
+    monkeypatch.setattr(_CommandHandler, 'timeout', 0.2)
+    path = server.server_address
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as silent:
+        silent.settimeout(5)
+        silent.connect(path)
+        with silent.makefile('rb') as reply:
+            assert b"Timed out waiting for the command request" in reply.readline()
+    assert send_command(['staff-name', 'socket-staff@example.com'], path)['exit_code'] == 0
@@ -0,0 +1,75 @@
+import os, pytest, tempfile, unittest
+
+from App.main import create_app
+from App.database import db, create_db, dispose_engines, engine_options, get_pool_stats, MeteredQueuePool
+
+
+@pytest.fixture(autouse=True, scope="module")
+def pool_db():
+    folder = tempfile.mkdtemp()
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(folder, 'pool.db')}",
+        'DB_POOL_SIZE': 2,
+        'DB_MAX_OVERFLOW': 1
+    })
+    create_db()
+    yield app.test_client()
+    db.session.remove()
+    db.drop_all()
+
+
+'''
+    Unit Tests
+'''
+class EngineOptionsUnitTests(unittest.TestCase):
+
+    def test_pool_settings(self):
+        options = engine_options({'SQLALCHEMY_DATABASE_URI': 'postgresql://db/app', 'DB_POOL_SIZE': 20})
+        assert options['poolclass'] is MeteredQueuePool
+        assert options['pool_size'] == 20 and options['max_overflow'] == 10 and options['pool_pre_ping'] is True
+
+    def test_explicit_engine_options_win(self):
+        options = engine_options({
+            'SQLALCHEMY_DATABASE_URI': 'postgresql://db/app',
+            'SQLALCHEMY_ENGINE_OPTIONS': {'pool_recycle': 60}
+        })
+        assert options['pool_recycle'] == 60
+
+    def test_memory_sqlite_keeps_its_pool(self):
+        assert engine_options({'SQLALCHEMY_DATABASE_URI': 'sqlite://'}) == {}
+        assert engine_options({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'}) == {}
+        # but keeps the options configured for it
+        assert engine_options({
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+            'SQLALCHEMY_ENGINE_OPTIONS': {'echo': True, 'connect_args': {'timeout': 5}}
+        }) == {'echo': True, 'connect_args': {'timeout': 5}}
+
+
+'''
+    Integration Tests
+'''
+class PoolMetricsIntegrationTests(unittest.TestCase):
+
+    def test_checkouts_are_measured(self):
+        db.session.remove()
+        db.session.execute(db.text("SELECT 1"))
+        stats = get_pool_stats()['default']
+        assert stats['size'] == 2 and stats['max_connections'] == 3
+        assert stats['checked_out'] == 1 and stats['saturation'] == round(1 / 3, 3)
+        assert stats['checkouts'] >= 1 and stats['wait_max_ms'] >= stats['wait_avg_ms'] >= 0
+        db.session.remove()
+        assert get_pool_stats()['default']['checked_out'] == 0
+
+    def test_dispose_after_fork_keeps_metrics(self):
+        pool = db.engine.pool
+        checkouts = get_pool_stats()['default']['checkouts']
+        dispose_engines()
+        assert db.engine.pool is not pool
+        db.session.execute(db.text("SELECT 1"))
+        db.session.remove()
+        assert get_pool_stats()['default']['checkouts'] == checkouts + 1
+
+
+def test_health_reports_pool(pool_db):
+    assert 'default' in pool_db.get('/health').json['db_pool']
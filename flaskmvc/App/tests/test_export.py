@@ -0,0 +1,92 @@
+import csv, datetime, io, pytest, unittest
+from flask_jwt_extended import create_access_token
+
+from App.database import db
+from App.models.admin import Admin
+from App.models.staff import Staff
+from App.models.Shift import Shift
+from App.models.attendance_record import AttendanceRecord
+from App.controllers import export_attendance, identity_cache
+
+DAY = datetime.date(2026, 3, 2)
+LAST = DAY + datetime.timedelta(days=4)
+
+
+@pytest.fixture(autouse=True, scope="module")
+def export_db(app):
+    db.session.add_all([
+        Admin(name="Export Admin", email="export-admin@example.com", password="adminpass"),
+        Staff(name="Export One", email="export1@example.com", password="staffpass"),
+        Staff(name="Export Two", email="export2@example.com", password="staffpass"),
+    ])
+    db.session.commit()
+    for member in db.session.scalars(db.select(Staff)):
+        for day in range(5):
+            date = DAY + datetime.timedelta(days=day)
+            shift = Shift(user_id=member.user_id, weekStart=date, weekEnd=date)
+            db.session.add(shift)
+            db.session.flush()
+            time_in = datetime.datetime.combine(date, datetime.time(8))
+            # the last day is still open
+            db.session.add(AttendanceRecord(shiftID=shift.id, userID=member.user_id, timeIn=time_in,
+                                            timeout=None if day == 4 else time_in + datetime.timedelta(hours=8)))
+    db.session.commit()
+    return app.test_client()
+
+
+def read_csv(chunks):
+    return list(csv.reader(io.StringIO(b''.join(chunks).decode())))
+
+
+'''
+    Integration Tests
+'''
+class ExportIntegrationTests(unittest.TestCase):
+
+    def test_csv_export_in_chunks(self):
+        rows = read_csv(export_attendance(DAY, LAST, chunk_size=3))
+        assert rows[0][:3] == ['attendance_id', 'shift_id', 'user_id']
+        assert len(rows) == 11
+        assert [row[6] for row in rows[1:]] == sorted(row[6] for row in rows[1:])
+        assert rows[1][7:] == ['2026-03-02T16:00:00', '28800'] and rows[-1][7:] == ['', '']
+        only = read_csv(export_attendance(DAY, DAY, staff=["export2@example.com"]))
+        assert [row[4] for row in only[1:]] == ["export2@example.com"]
+
+    def test_resume_from_cursor(self):
+        cursors = []
+        body = export_attendance(DAY, LAST, chunk_size=4, progress=lambda rows, cursor: cursors.append((rows, cursor)))
+        first = next(body)
+        # nothing is reported until the consumer asks for the next chunk
+        assert cursors == []
+        next(body)
+        assert cursors[0][0] == 4
+        rest = read_csv(export_attendance(DAY, LAST, after=cursors[0][1]))
+        full = read_csv(export_attendance(DAY, LAST))
+        assert read_csv([first]) + rest == full
+        with pytest.raises(ValueError):
+            export_attendance(DAY, LAST, after="bogus")
+        with pytest.raises(ValueError):
+            export_attendance(DAY, LAST, format="xlsx")
+
+    def test_parquet_export(self):
+        pq = pytest.importorskip("pyarrow.parquet")
+        data = b''.join(export_attendance(DAY, LAST, format="parquet", chunk_size=4))
+        table = pq.read_table(io.BytesIO(data))
+        assert table.num_rows == 10
+        assert pq.ParquetFile(io.BytesIO(data)).metadata.num_row_groups == 3
+        assert table.column('seconds').to_pylist()[:2] == [28800, 28800]
+
+
+def test_export_api(export_db):
+    identity_cache.clear()
+    admin = db.session.scalar(db.select(Admin).filter_by(email="export-admin@example.com"))
+    staff = db.session.scalar(db.select(Staff).filter_by(email="export1@example.com"))
+    admin_headers = {'Authorization': f"Bearer {create_access_token(identity=str(admin.user_id))}"}
+    staff_headers = {'Authorization': f"Bearer {create_access_token(identity=str(staff.user_id))}"}
+    url = '/api/attendance/export?start=2026-03-02&end=2026-03-06'
+    assert export_db.get(url, headers=staff_headers).status_code == 403
+    assert export_db.get('/api/attendance/export?start=2026-03-02', headers=admin_headers).status_code == 400
+    response = export_db.get(url + '&staff=export1@example.com', headers=admin_headers)
+    assert response.status_code == 200 and response.is_streamed
+    assert response.mimetype == 'text/csv'
+    assert len(read_csv([response.get_data()])) == 6
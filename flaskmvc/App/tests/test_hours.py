@@ -0,0 +1,59 @@
+import datetime, pytest, unittest
+from array import array
+
+from App.controllers.hours import HoursColumns, compute_hours
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+def columns(records):
+    """HoursColumns from (user_id, time_in, time_out or None, shift_date[, template start_time]) in seconds."""
+    return HoursColumns(
+        datetime.datetime(2025, 10, 6),
+        array('q', [record[0] for record in records]),
+        array('q', [record[1] for record in records]),
+        array('q', [record[1] if record[2] is None else record[2] for record in records]),
+        array('q', [record[3] for record in records]),
+        array('q', [record[4] if len(record) > 4 else -1 for record in records]),
+        array('q', [int(record[2] is None) for record in records])
+    )
+
+
+RECORDS = [
+    # user 1: 3 x 15h in week one (5h over 40h), one open record in week two
+    (1, 0 * DAY + 8 * HOUR, 0 * DAY + 23 * HOUR, 0),
+    (1, 1 * DAY + 8 * HOUR, 1 * DAY + 23 * HOUR, 1 * DAY),
+    (1, 2 * DAY + 8 * HOUR, 2 * DAY + 23 * HOUR, 2 * DAY),
+    (1, 7 * DAY + 8 * HOUR, None, 7 * DAY),
+    # user 2: 20 minutes late, then clocking in the day after the shift
+    (2, 0 * DAY + 8 * HOUR + 20 * 60, 0 * DAY + 16 * HOUR, 0),
+    (2, 2 * DAY + 8 * HOUR, 2 * DAY + 12 * HOUR, 1 * DAY),
+    # user 3: a 14:00 template shift, on time, then 10 minutes late
+    (3, 0 * DAY + 14 * HOUR, 0 * DAY + 22 * HOUR, 0, 14 * HOUR),
+    (3, 1 * DAY + 14 * HOUR + 10 * 60, 1 * DAY + 22 * HOUR, 1 * DAY, 14 * HOUR),
+]
+EXPECTED = {
+    1: {'worked_seconds': 45 * HOUR, 'overtime_seconds': 5 * HOUR, 'late_records': 0, 'late_seconds': 0, 'open_records': 1},
+    2: {'worked_seconds': 7 * HOUR + 40 * 60 + 4 * HOUR, 'overtime_seconds': 0, 'late_records': 2,
+        'late_seconds': 20 * 60 + DAY, 'open_records': 0},
+    3: {'worked_seconds': 15 * HOUR + 50 * 60, 'overtime_seconds': 0, 'late_records': 1, 'late_seconds': 10 * 60,
+        'open_records': 0},
+}
+
+
+'''
+   Unit Tests
+'''
+class HoursUnitTests(unittest.TestCase):
+
+    def test_python_totals(self):
+        assert compute_hours(columns(RECORDS), late_grace=5 * 60, use_numpy=False) == EXPECTED
+        assert compute_hours(columns([]), use_numpy=False) == {}
+
+    def test_numpy_totals_match(self):
+        numpy = pytest.importorskip("numpy")
+        data = columns(RECORDS)
+        vectors = HoursColumns(data.origin, *(numpy.array(column, dtype=numpy.int64) for column in data[1:]))
+        assert compute_hours(vectors, late_grace=5 * 60) == EXPECTED
+        assert compute_hours(vectors, overtime_threshold=10 * HOUR, late_grace=30 * 60)[1]['overtime_seconds'] == 35 * HOUR
@@ -0,0 +1,98 @@
+import logging, os, pytest
+
+from App.main import create_app
+from App.database import db, create_db
+from App.models.user import User
+from App.instrumentation import Metrics, RequestStats
+
+
+@pytest.fixture(autouse=True, scope="module")
+def instrumented_app(tmp_path_factory):
+    profile_dir = tmp_path_factory.mktemp("profiles")
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'INSTRUMENTATION_ENABLED': True,
+        'N_PLUS_ONE_THRESHOLD': 3,
+        'PROFILE_SAMPLE_RATE': 1,
+        'PROFILE_SLOW_REQUEST_MS': 0,
+        'PROFILE_DIR': str(profile_dir)
+    })
+    create_db()
+
+    @app.route('/instrumented/<int:times>')
+    def repeat_queries(times):
+        for user_id in range(times):
+            db.session.get(User, user_id + 1)
+        return 'ok'
+
+    yield app.test_client(), profile_dir
+    db.session.remove()
+    db.drop_all()
+
+
+def metric(text, line_start):
+    return [line for line in text.splitlines() if line.startswith(line_start)]
+
+
+def test_request_stats_repeated():
+    stats = RequestStats()
+    for statement in ['SELECT a', 'SELECT b', 'SELECT a', 'SELECT a']:
+        stats.record(statement, 0.001)
+    assert stats.queries == 4
+    assert stats.repeated(2) == [('SELECT a', 3)]
+    assert stats.repeated(3) == []
+
+
+def test_metrics_render_prometheus_text():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    stats = RequestStats()
+    stats.record('SELECT 1', 0.25)
+    metrics.observe('/api/roster', 'GET', 200, 0.5, stats, False)
+    metrics.observe('/api/roster', 'GET', 200, 2.0, stats, True)
+    text = metrics.render()
+    assert '# TYPE http_request_duration_seconds histogram' in text
+    assert 'http_requests_total{endpoint="/api/roster",method="GET",status="200"} 2' in text
+    assert metric(text, 'http_request_duration_seconds_bucket') == [
+        'http_request_duration_seconds_bucket{endpoint="/api/roster",le="0.1"} 0',
+        'http_request_duration_seconds_bucket{endpoint="/api/roster",le="1.0"} 1',
+        'http_request_duration_seconds_bucket{endpoint="/api/roster",le="+Inf"} 2'
+    ]
+    assert 'http_request_duration_seconds_count{endpoint="/api/roster"} 2' in text
+    assert 'http_request_sql_queries_total{endpoint="/api/roster"} 2' in text
+    assert 'http_request_sql_seconds_total{endpoint="/api/roster"} 0.5' in text
+    assert 'http_request_n_plus_one_total{endpoint="/api/roster"} 1' in text
+
+
+def test_metrics_endpoint_counts_queries_and_flags_n_plus_one(instrumented_app, caplog):
+    client, profile_dir = instrumented_app
+    with caplog.at_level(logging.WARNING, logger='App.instrumentation'):
+        assert client.get('/instrumented/2').status_code == 200
+        assert not caplog.records
+        assert client.get('/instrumented/5').status_code == 200
+    assert len(caplog.records) == 1
+    assert "ran 5 times" in caplog.records[0].getMessage()
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    text = response.get_data(as_text=True)
+    endpoint = 'endpoint="/instrumented/<int:times>"'
+    assert f'http_requests_total{{{endpoint},method="GET",status="200"}} 2' in text
+    assert f'http_request_sql_queries_total{{{endpoint}}} 7' in text
+    assert f'http_request_n_plus_one_total{{{endpoint}}} 1' in text
+    # the scrape itself is not recorded
+    assert 'endpoint="/metrics"' not in text
+
+    # every request was sampled and counts as slow, so each left a profile
+    assert f'http_request_profiles_total{{{endpoint}}} 2' in text
+    profiles = os.listdir(profile_dir)
+    assert len(profiles) == 2
+    assert all(name.endswith('-GET-instrumented_int_times.prof') for name in profiles)
+
+
+def test_unmatched_requests_share_one_label(instrumented_app):
+    client, _ = instrumented_app
+    assert client.get('/no-such-page/123').status_code == 404
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'http_requests_total{endpoint="<unmatched>",method="GET",status="404"} 1' in text
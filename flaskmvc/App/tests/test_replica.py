@@ -0,0 +1,106 @@
+import datetime, os, pytest, tempfile, unittest
+from unittest import mock
+
+from App.main import create_app
+from App.database import db, create_db, get_read_engine, replica_binds, _replica_state
+from App.models.user import User
+from App.models.staff import Staff
+from App.models.Shift import Shift
+from App.controllers import (
+    get_weekly_roster,
+    list_users
+)
+
+WEEK_START = datetime.date(2024, 4, 1)
+
+
+def replica():
+    return db.engines['replica_0']
+
+
+def seed_replica():
+    # rows that only exist on the replica, so reads show where they ran
+    db.metadata.create_all(replica())
+    with replica().begin() as connection:
+        connection.execute(db.insert(User.__table__), [
+            {'user_id': 100, 'name': "Replica Only", 'email': "replica@example.com", 'password': "x", 'type': "staff"}
+        ])
+        connection.execute(db.insert(Shift.__table__), [
+            {'id': 100, 'user_id': 100, 'weekStart': WEEK_START, 'weekEnd': WEEK_START}
+        ])
+
+
+@pytest.fixture(autouse=True, scope="module")
+def replica_db():
+    folder = tempfile.mkdtemp()
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(folder, 'primary.db')}",
+        'REPLICA_DATABASE_URIS': f"sqlite:///{os.path.join(folder, 'replica.db')}"
+    })
+    create_db()
+    seed_replica()
+    db.session.add(Staff(name="Primary Only", email="primary@example.com", password="staffpass"))
+    db.session.commit()
+    yield app.test_client()
+    db.session.remove()
+    db.drop_all()
+    db.metadata.drop_all(replica())
+    _replica_state.clear()
+
+
+@pytest.fixture(autouse=True)
+def fresh_replica_state():
+    _replica_state.clear()
+    yield
+    db.session.remove()
+
+
+'''
+    Unit Tests
+'''
+class ReplicaBindsUnitTests(unittest.TestCase):
+
+    def test_uris_from_list_or_string(self):
+        assert replica_binds({}) == {}
+        assert replica_binds({'REPLICA_DATABASE_URIS': "postgresql://r1/app, postgresql://r2/app"}) == {
+            'replica_0': "postgresql://r1/app", 'replica_1': "postgresql://r2/app"
+        }
+        assert replica_binds({'REPLICA_DATABASE_URIS': ["postgresql://r1/app"]}) == {'replica_0': "postgresql://r1/app"}
+
+
+'''
+    Integration Tests
+'''
+class ReplicaRoutingIntegrationTests(unittest.TestCase):
+
+    def test_reads_go_to_replica(self):
+        users, _ = list_users()
+        assert [user['email'] for user in users] == ["replica@example.com"]
+        assert [row.email for row in get_weekly_roster(WEEK_START, WEEK_START)] == ["replica@example.com"]
+
+    def test_writes_and_plain_reads_stay_on_primary(self):
+        emails = [user.email for user in db.session.scalars(db.select(User))]
+        assert emails == ["primary@example.com"]
+
+    def test_pending_writes_read_from_primary(self):
+        db.session.add(Staff(name="Pending", email="pending@example.com", password="staffpass"))
+        users, _ = list_users()
+        assert [user['email'] for user in users] == ["primary@example.com", "pending@example.com"]
+        db.session.rollback()
+
+    def test_lagging_replica_is_skipped(self):
+        with mock.patch('App.database.replication_lag', return_value=60.0):
+            assert get_read_engine() is None
+            users, _ = list_users()
+        assert [user['email'] for user in users] == ["primary@example.com"]
+
+    def test_failed_replica_read_falls_back_to_primary(self):
+        db.metadata.drop_all(replica())
+        try:
+            users, _ = list_users()
+            assert [user['email'] for user in users] == ["primary@example.com"]
+            assert _replica_state[replica()][1] is False
+        finally:
+            db.session.remove()
+            seed_replica()
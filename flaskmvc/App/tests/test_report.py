@@ -0,0 +1,135 @@
+import datetime, pytest, unittest
+
+from App.database import db
+from App.models.admin import Admin
+from App.models.staff import Staff
+from App.models.Shift import Shift
+from App.models.shift_template import ShiftTemplate
+from App.models.attendance_record import AttendanceRecord
+from App.controllers import (
+    generate_shift_report,
+    identity_cache,
+    shift_report_csv
+)
+from App.controllers.hours import staff_hours
+from flask_jwt_extended import create_access_token
+from .test_roster import QueryCounter
+
+WEEK_START = datetime.date(2025, 10, 6)
+WEEK_END = datetime.date(2025, 10, 12)
+
+
+@pytest.fixture(autouse=True, scope="module")
+def report_db(app):
+    carol = Staff(name="Carol Lee", email="report1@example.com", password="staffpass1")
+    david = Staff(name="David Brown", email="report2@example.com", password="staffpass2")
+    db.session.add_all([carol, david])
+    db.session.commit()
+    shifts = [
+        Shift(user_id=carol.user_id, weekStart=WEEK_START + datetime.timedelta(days=day),
+              weekEnd=WEEK_START + datetime.timedelta(days=day))
+        for day in range(3)
+    ]
+    db.session.add_all(shifts)
+    db.session.flush()
+    db.session.add_all([
+        AttendanceRecord(shiftID=shifts[0].id, userID=carol.user_id,
+                         timeIn=datetime.datetime(2025, 10, 6, 8, 0), timeout=datetime.datetime(2025, 10, 6, 16, 30)),
+        AttendanceRecord(shiftID=shifts[1].id, userID=carol.user_id,
+                         timeIn=datetime.datetime(2025, 10, 7, 9, 15), timeout=datetime.datetime(2025, 10, 7, 17, 0)),
+        AttendanceRecord(shiftID=shifts[2].id, userID=carol.user_id,
+                         timeIn=datetime.datetime(2025, 10, 8, 8, 0), timeout=None),
+        # outside the report week
+        AttendanceRecord(shiftID=shifts[0].id, userID=carol.user_id,
+                         timeIn=datetime.datetime(2025, 10, 13, 8, 0), timeout=datetime.datetime(2025, 10, 13, 9, 0)),
+    ])
+    db.session.commit()
+    return app.test_client()
+
+
+'''
+    Integration Tests
+'''
+class ShiftReportIntegrationTests(unittest.TestCase):
+
+    def test_shift_report_totals(self):
+        with QueryCounter(db.engine) as counter:
+            report = generate_shift_report(WEEK_START, WEEK_END)
+        # rollup freshness check, the report itself, then the recurring shift templates in range
+        assert counter.count == 3
+        carol, david = report
+        assert (carol['scheduled_shifts'], carol['attendance_records']) == (3, 3)
+        assert carol['total_seconds'] == (8 * 60 + 30 + 7 * 60 + 45) * 60
+        assert carol['total_hours'] == 16.25
+        assert (david['scheduled_shifts'], david['attendance_records'], david['total_seconds']) == (0, 0, 0)
+
+    def test_shift_report_with_hours(self):
+        with QueryCounter(db.engine) as counter:
+            carol, david = generate_shift_report(WEEK_START, WEEK_END, with_hours=True)
+        # the hours come from one more query over the range's attendance columns
+        assert counter.count == 4
+        assert (carol['overtime_hours'], carol['late_records'], carol['late_minutes'], carol['open_records']) == (0.0, 1, 75.0, 1)
+        assert (david['late_records'], david['open_records']) == (0, 0)
+        lines = shift_report_csv([carol]).splitlines()
+        assert lines[0].endswith(",total_hours,overtime_hours,late_records,late_minutes,open_records")
+
+    def test_template_shifts_are_late_from_their_start_time(self):
+        erin = Staff(name="Erin Diaz", email="report3@example.com", password="staffpass3")
+        db.session.add(erin)
+        db.session.flush()
+        day = datetime.date(2025, 11, 3)
+        template = ShiftTemplate(user_id=erin.user_id, weekdays=0b1111111, start_time=datetime.time(14, 0),
+                                 end_time=datetime.time(22, 0), valid_from=day)
+        db.session.add(template)
+        db.session.flush()
+        shifts = [
+            Shift(user_id=erin.user_id, weekStart=day + datetime.timedelta(days=offset),
+                  weekEnd=day + datetime.timedelta(days=offset), template_id=template.id,
+                  template_date=day + datetime.timedelta(days=offset))
+            for offset in range(2)
+        ]
+        # not made from a template, so late from SHIFT_START_TIME (08:00)
+        shifts.append(Shift(user_id=erin.user_id, weekStart=day + datetime.timedelta(days=2),
+                            weekEnd=day + datetime.timedelta(days=2)))
+        db.session.add_all(shifts)
+        db.session.flush()
+        db.session.add_all([
+            AttendanceRecord(shiftID=shifts[0].id, userID=erin.user_id,
+                             timeIn=datetime.datetime(2025, 11, 3, 14, 0), timeout=datetime.datetime(2025, 11, 3, 22, 0)),
+            AttendanceRecord(shiftID=shifts[1].id, userID=erin.user_id,
+                             timeIn=datetime.datetime(2025, 11, 4, 14, 20), timeout=datetime.datetime(2025, 11, 4, 22, 0)),
+            AttendanceRecord(shiftID=shifts[2].id, userID=erin.user_id,
+                             timeIn=datetime.datetime(2025, 11, 5, 8, 30), timeout=datetime.datetime(2025, 11, 5, 16, 0)),
+        ])
+        db.session.commit()
+        hours = staff_hours(day, day + datetime.timedelta(days=6), [erin.user_id])
+        assert (hours[erin.user_id]['late_records'], hours[erin.user_id]['late_seconds']) == (2, 50 * 60)
+
+    def test_shift_report_csv(self):
+        lines = shift_report_csv(generate_shift_report(WEEK_START, WEEK_END)).splitlines()
+        assert lines[0] == "user_id,name,email,scheduled_shifts,attendance_records,total_seconds,total_hours"
+        assert lines[1].endswith(",3,3,58500,16.25")
+
+
+def test_shift_report_api(report_db):
+    identity_cache.clear()
+    url = '/api/reports/shifts?week_start=2025-10-06&week_end=2025-10-12'
+    assert report_db.get(url).status_code == 401
+    carol = db.session.scalar(db.select(Staff.user_id).filter_by(email="report1@example.com"))
+    staff = {'Authorization': f"Bearer {create_access_token(identity=str(carol))}"}
+    assert report_db.get(url, headers=staff).status_code == 403
+
+    admin = Admin(name="Alice Johnson", email="report-admin@example.com", password="adminpass1")
+    db.session.add(admin)
+    db.session.commit()
+    headers = {'Authorization': f"Bearer {create_access_token(identity=str(admin.user_id))}"}
+    response = report_db.get(url, headers=headers)
+    assert response.status_code == 200
+    assert response.json['staff'][0]['total_hours'] == 16.25
+    # a cached report is not served past the check
+    assert report_db.get(url, headers=staff).status_code == 403
+    response = report_db.get(url + '&format=csv', headers=headers)
+    assert response.mimetype == 'text/csv'
+    assert report_db.get('/api/reports/shifts?week_start=2025-10-06', headers=headers).status_code == 400
+    db.session.delete(admin)
+    db.session.commit()
@@ -0,0 +1,159 @@
+import datetime, pytest, unittest
+from flask import Flask
+from flask_jwt_extended import create_access_token
+
+from App.database import db
+from App.models.admin import Admin
+from App.models.staff import Staff
+from App.models.Shift import Shift
+from App.controllers import identity_cache
+from App.response_cache import LocalBackend, RedisBackend, ResponseCache, init_response_cache
+
+WEEK_START = datetime.date(2025, 12, 1)
+ROSTER_URL = '/api/roster?week_start=2025-12-01'
+REPORT_URL = '/api/reports/shifts?week_start=2025-12-01&week_end=2025-12-07'
+
+
+class FakeRedis:
+    """The subset of redis-py the response cache uses, on a dict; values come back as bytes."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, name):
+        return self.data.get(name)
+
+    def set(self, name, value, ex=None):
+        self.data[name] = value if isinstance(value, bytes) else str(value).encode()
+
+    def mget(self, names):
+        return [self.data.get(name) for name in names]
+
+    def incr(self, name):
+        value = int(self.data.get(name, b'0')) + 1
+        self.data[name] = str(value).encode()
+        return value
+
+
+@pytest.fixture(scope="module")
+def app_config():
+    return {'RESPONSE_CACHE_BACKEND': 'local'}
+
+
+@pytest.fixture(autouse=True, scope="module")
+def cache_db(app):
+    db.session.add_all([
+        Admin(name="Cache Admin", email="cache-admin@example.com", password="adminpass"),
+        Staff(name="Cache Staff", email="cache-staff@example.com", password="staffpass")
+    ])
+    db.session.commit()
+    staff = db.session.scalar(db.select(Staff).filter_by(email="cache-staff@example.com"))
+    db.session.add(Shift(user_id=staff.user_id, weekStart=WEEK_START, weekEnd=WEEK_START))
+    db.session.commit()
+    admin = db.session.scalar(db.select(Admin).filter_by(email="cache-admin@example.com"))
+    client = app.test_client()
+    # the roster and report are admin-only
+    client.environ_base['HTTP_AUTHORIZATION'] = f"Bearer {create_access_token(identity=str(admin.user_id))}"
+    return client
+
+
+def people():
+    admin = db.session.scalar(db.select(Admin).filter_by(email="cache-admin@example.com"))
+    staff = db.session.scalar(db.select(Staff).filter_by(email="cache-staff@example.com"))
+    shift = db.session.scalar(db.select(Shift).filter_by(user_id=staff.user_id))
+    return admin, staff, shift
+
+
+'''
+    Unit Tests
+'''
+class ResponseCacheUnitTests(unittest.TestCase):
+
+    def test_entries_round_trip_through_redis_backend(self):
+        cache = ResponseCache(RedisBackend(FakeRedis()), ttl=30)
+        assert cache.get('k') is None
+        cache.set('k', {'etag': 'abc', 'modified': 1.5, 'content_type': 'text/csv', 'body': b'a\nb'})
+        assert cache.get('k') == {'etag': 'abc', 'modified': 1.5, 'content_type': 'text/csv', 'body': b'a\nb'}
+        assert cache.stats() == {'hits': 1, 'misses': 1}
+
+    def test_versions_bump_per_table(self):
+        for backend in (LocalBackend(), RedisBackend(FakeRedis())):
+            cache = ResponseCache(backend)
+            assert cache.versions(['shifts', 'users']) == [0, 0]
+            cache.bump({'shifts'})
+            assert cache.versions(['shifts', 'users']) == [1, 0]
+
+
+'''
+    Integration Tests
+'''
+def test_conditional_requests_get_304(cache_db):
+    first = cache_db.get(ROSTER_URL)
+    assert first.status_code == 200 and first.headers['ETag'] and first.headers['Last-Modified']
+    assert cache_db.get(ROSTER_URL).get_data() == first.get_data()
+    assert cache_db.get(ROSTER_URL, headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+    assert cache_db.get(ROSTER_URL, headers={'If-Modified-Since': first.headers['Last-Modified']}).status_code == 304
+    assert cache_db.get(ROSTER_URL, headers={'If-None-Match': '"stale"'}).status_code == 200
+
+
+def test_write_paths_bump_versions(cache_db):
+    cache = cache_db.application.extensions['response_cache']
+    admin, staff, shift = people()
+    etag = cache_db.get(ROSTER_URL).headers['ETag']
+
+    admin.scheduleShift(db.session, staff.user_id, [shift.id])
+    response = cache_db.get(ROSTER_URL, headers={'If-None-Match': etag})
+    assert response.status_code == 200 and response.json['shifts'][0]['rostered'] is True
+
+    before = cache.versions(['shift_change_requests'])[0]
+    staff.requestShiftChange(db.session, shift.id, "swap with someone")
+    admin.approveRequest(db.session, staff.user_id, shift.id)
+    staff.requestShiftChange(db.session, shift.id, "swap again")
+    admin.denyRequest(db.session, staff.user_id, shift.id)
+    assert cache.versions(['shift_change_requests'])[0] == before + 4
+
+    identity_cache.clear()
+    headers = {'Authorization': f"Bearer {create_access_token(identity=str(admin.user_id))}"}
+    etag = cache_db.get(REPORT_URL, headers=headers).headers['ETag']
+    staff.clockIn(db.session, shift.id, datetime.datetime(2025, 12, 1, 8, 0))
+    staff.clockOut(db.session, shift.id, datetime.datetime(2025, 12, 1, 12, 0))
+    response = cache_db.get(REPORT_URL, headers=dict(headers, **{'If-None-Match': etag}))
+    assert response.status_code == 200
+    assert next(row for row in response.json['staff'] if row['user_id'] == staff.user_id)['total_hours'] == 4.0
+
+
+def test_default_week_is_part_of_the_key(cache_db, monkeypatch):
+    import App.views.roster as roster_views
+    week = lambda start: (start, start + datetime.timedelta(days=6))
+    monkeypatch.setattr(roster_views, 'get_current_week', lambda: week(WEEK_START))
+    assert cache_db.get('/api/roster').json['week_start'] == WEEK_START.isoformat()
+    # the week rolls over with nothing written in between
+    next_week = WEEK_START + datetime.timedelta(weeks=1)
+    monkeypatch.setattr(roster_views, 'get_current_week', lambda: week(next_week))
+    assert cache_db.get('/api/roster').json['week_start'] == next_week.isoformat()
+
+
+def test_backend_defaults_to_none_without_redis():
+    app = Flask(__name__)
+    assert init_response_cache(app) is None and 'response_cache' not in app.extensions
+
+
+def test_workers_share_redis_backend(cache_db):
+    app = cache_db.application
+    local = app.extensions['response_cache']
+    redis = FakeRedis()
+    worker_a, worker_b = ResponseCache(RedisBackend(redis)), ResponseCache(RedisBackend(redis))
+    try:
+        app.extensions['response_cache'] = worker_a
+        etag = cache_db.get(ROSTER_URL).headers['ETag']
+        app.extensions['response_cache'] = worker_b
+        assert cache_db.get(ROSTER_URL, headers={'If-None-Match': etag}).status_code == 304
+        assert worker_b.stats()['hits'] == 1
+        # a write committed in worker b invalidates the entry worker a cached
+        _, staff, _ = people()
+        db.session.add(Shift(user_id=staff.user_id, weekStart=WEEK_START, weekEnd=WEEK_START))
+        db.session.commit()
+        app.extensions['response_cache'] = worker_a
+        assert cache_db.get(ROSTER_URL, headers={'If-None-Match': etag}).status_code == 200
+    finally:
+        app.extensions['response_cache'] = local
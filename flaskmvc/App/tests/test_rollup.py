@@ -0,0 +1,159 @@
+import datetime, pytest, unittest
+from unittest import mock
+from sqlalchemy.exc import OperationalError
+
+from App.database import db
+from App.models.staff import Staff
+from App.models.Shift import Shift
+from App.models.attendance_record import AttendanceRecord
+from App.models.weekly_attendance_summary import WeeklyAttendanceSummary
+from App.controllers import (
+    bulk_schedule_shifts,
+    generate_shift_report,
+    rebuild_rollups,
+    record_punch_events,
+    rollup_covers,
+    shift_cache,
+    staff_cache,
+    week_of
+)
+from App.controllers import rollup
+from App.controllers.report import _shift_report_query
+
+MONDAY = datetime.date(2025, 11, 3)
+SUNDAY = MONDAY + datetime.timedelta(days=6)
+
+
+def summary(user_id, week_start=MONDAY):
+    row = db.session.get(WeeklyAttendanceSummary, (user_id, week_start))
+    return (row.scheduled_shifts, row.completed_records, row.total_seconds) if row else (0, 0, 0)
+
+
+def at(day, hour):
+    return datetime.datetime.combine(MONDAY + datetime.timedelta(days=day), datetime.time(hour))
+
+
+@pytest.fixture(autouse=True, scope="module")
+def rollup_db(app):
+    db.session.add_all([
+        Staff(name=f"Rollup {i}", email=f"rollup{i}@example.com", password="staffpass") for i in range(3)
+    ])
+    db.session.commit()
+    return app.test_client()
+
+
+def staff(i):
+    return db.session.scalar(db.select(Staff).filter_by(email=f"rollup{i}@example.com"))
+
+
+'''
+    Unit Tests
+'''
+class RollupUnitTests(unittest.TestCase):
+
+    def test_week_of(self):
+        assert week_of(datetime.date(2025, 11, 9)) == MONDAY
+        assert week_of(datetime.datetime(2025, 11, 3, 23, 59)) == MONDAY
+
+
+'''
+    Integration Tests
+'''
+class RollupIntegrationTests(unittest.TestCase):
+
+    def setUp(self):
+        staff_cache.clear()
+        shift_cache.clear()
+
+    def test_orm_writes_are_rolled_up(self):
+        carol = staff(0)
+        shift = Shift(user_id=carol.user_id, weekStart=MONDAY, weekEnd=MONDAY)
+        db.session.add(shift)
+        db.session.commit()
+        assert summary(carol.user_id) == (1, 0, 0)
+
+        carol.clockIn(db.session, shift.id, at(0, 8))
+        assert summary(carol.user_id) == (1, 0, 0)
+        record = carol.clockOut(db.session, shift.id, at(0, 16))
+        assert summary(carol.user_id) == (1, 1, 8 * 3600)
+
+        # moving a shift to the next week moves its count
+        shift.weekStart = shift.weekEnd = MONDAY + datetime.timedelta(days=7)
+        db.session.commit()
+        assert summary(carol.user_id) == (0, 1, 8 * 3600)
+        assert summary(carol.user_id, MONDAY + datetime.timedelta(days=7)) == (1, 0, 0)
+
+        db.session.delete(record)
+        db.session.delete(shift)
+        db.session.commit()
+        assert summary(carol.user_id) == (0, 0, 0)
+        assert summary(carol.user_id, MONDAY + datetime.timedelta(days=7)) == (0, 0, 0)
+
+    def test_bulk_writes_are_rolled_up(self):
+        david = staff(1)
+        results = bulk_schedule_shifts([{'staff': david.email, 'start': MONDAY, 'end': SUNDAY, 'pattern': 'mon,tue'}])
+        monday_shift, tuesday_shift = results[0]['shift_ids']
+        assert summary(david.user_id) == (2, 0, 0)
+        record_punch_events([
+            {'type': 'in', 'staff': david.email, 'shift_id': monday_shift, 'time': at(0, 9)},
+            {'type': 'out', 'staff': david.email, 'shift_id': monday_shift, 'time': at(0, 17)},
+            {'type': 'in', 'staff': david.email, 'shift_id': tuesday_shift, 'time': at(1, 9)},
+        ])
+        assert summary(david.user_id) == (2, 1, 8 * 3600)
+        record_punch_events([{'type': 'out', 'staff': david.email, 'shift_id': tuesday_shift, 'time': at(1, 12)}])
+        assert summary(david.user_id) == (2, 2, 11 * 3600)
+
+    def test_rebuild_and_report_from_rollup(self):
+        eve = staff(2)
+        shifts = [Shift(user_id=eve.user_id, weekStart=at(day, 0).date(), weekEnd=at(day, 0).date()) for day in range(3)]
+        db.session.add_all(shifts)
+        db.session.flush()
+        db.session.add_all([
+            AttendanceRecord(shiftID=shifts[0].id, userID=eve.user_id, timeIn=at(0, 8), timeout=at(0, 12)),
+            AttendanceRecord(shiftID=shifts[1].id, userID=eve.user_id, timeIn=at(1, 8), timeout=None),
+        ])
+        db.session.commit()
+        # corrupt the summary, then rebuild it from the source tables
+        db.session.execute(db.update(WeeklyAttendanceSummary).values(total_seconds=1))
+        db.session.commit()
+        rebuild_rollups(chunk_size=1)
+        assert summary(eve.user_id) == (3, 1, 4 * 3600)
+
+        assert rollup_covers(MONDAY, SUNDAY)
+        assert not rollup_covers(MONDAY, SUNDAY - datetime.timedelta(days=1))
+        live = [row._asdict() for row in db.session.execute(_shift_report_query(MONDAY, SUNDAY))]
+        report = generate_shift_report(MONDAY, SUNDAY)
+        assert [
+            {key: row[key] for key in ('user_id', 'scheduled_shifts', 'attendance_records', 'total_seconds')}
+            for row in report
+        ] == [
+            {key: row[key] for key in ('user_id', 'scheduled_shifts', 'attendance_records', 'total_seconds')}
+            for row in live
+        ]
+        eve_row = next(row for row in report if row['user_id'] == eve.user_id)
+        assert (eve_row['scheduled_shifts'], eve_row['attendance_records']) == (3, 2)
+
+        # a bulk statement that does not maintain the rollup invalidates it
+        db.session.execute(db.update(Shift).filter(Shift.user_id == eve.user_id).values(weekEnd=Shift.weekEnd))
+        db.session.commit()
+        assert not rollup_covers(MONDAY, SUNDAY)
+        rebuild_rollups()
+        assert rollup_covers(MONDAY, SUNDAY)
+
+    def test_rebuild_retries_chunk_on_serialization_failure(self):
+        class SerializationFailure(Exception):
+            pgcode = '40001'
+
+        calls = []
+        rebuild_chunk = rollup._rebuild_chunk
+
+        def flaky(after, chunk_size):
+            calls.append(after)
+            if len(calls) == 1:
+                raise OperationalError("UPDATE ...", {}, SerializationFailure())
+            return rebuild_chunk(after, chunk_size)
+
+        with mock.patch.object(rollup, '_rebuild_chunk', flaky):
+            rebuild_rollups(chunk_size=100)
+        assert calls[:2] == [0, 0]
+        assert rollup_covers(MONDAY, SUNDAY)
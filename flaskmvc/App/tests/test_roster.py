@@ -0,0 +1,153 @@
+import datetime, pytest, unittest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from App.database import db
+from App.models.admin import Admin
+from App.models.staff import Staff
+from App.models.Shift import Shift
+from App.models.Roster import Roster, RosterEntry
+from App.controllers import (
+    get_current_week,
+    identity_cache,
+    get_weekly_roster,
+    get_weekly_roster_json
+)
+
+
+class QueryCounter:
+    """Counts the SQL statements sent to the engine while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _count(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._count)
+
+
+def add_week_of_shifts(staff, week_start, days=5):
+    shifts = [
+        Shift(user_id=staff.user_id, weekStart=week_start + datetime.timedelta(days=day),
+              weekEnd=week_start + datetime.timedelta(days=day))
+        for day in range(days)
+    ]
+    db.session.add_all(shifts)
+    db.session.flush()
+    db.session.add_all([Roster(shiftID=shift.id, userID=staff.user_id) for shift in shifts])
+    db.session.commit()
+    return shifts
+
+
+@pytest.fixture(autouse=True, scope="module")
+def roster_db(app):
+    return app.test_client()
+
+
+'''
+    Integration Tests
+'''
+class RosterIntegrationTests(unittest.TestCase):
+
+    def setUp(self):
+        self.week_start, self.week_end = get_current_week(datetime.date(2025, 10, 8))
+
+    def test_current_week(self):
+        self.assertEqual((self.week_start, self.week_end), (datetime.date(2025, 10, 6), datetime.date(2025, 10, 12)))
+
+    def test_query_count_constant(self):
+        carol = Staff(name="Carol Lee", email="roster1@example.com", password="staffpass1")
+        david = Staff(name="David Brown", email="roster2@example.com", password="staffpass2")
+        db.session.add_all([carol, david])
+        db.session.commit()
+
+        add_week_of_shifts(carol, self.week_start)
+        with QueryCounter(db.engine) as small:
+            rows = get_weekly_roster(self.week_start, self.week_end)
+        assert len(rows) == 5
+
+        add_week_of_shifts(david, self.week_start, days=7)
+        with QueryCounter(db.engine) as large:
+            rows = get_weekly_roster(self.week_start, self.week_end)
+        assert len(rows) == 12
+        # shifts with their roster entries and users, then the recurring shift templates
+        assert small.count == large.count == 2
+
+    def test_roster_json_pages(self):
+        first = get_weekly_roster_json(self.week_start, self.week_end, page=1, per_page=10)
+        second = get_weekly_roster_json(self.week_start, self.week_end, page=2, per_page=10)
+        assert first['next_page'] == 2 and second['next_page'] is None
+        assert len(first['shifts']) + len(second['shifts']) == 12
+        assert first['shifts'][0]['email'] in ("roster1@example.com", "roster2@example.com")
+        assert all(shift['rostered'] for shift in first['shifts'])
+
+    def test_view_roster(self):
+        erin = Staff(name="Erin Moss", email="roster3@example.com", password="staffpass3")
+        db.session.add(erin)
+        db.session.commit()
+        first_week = datetime.date(2025, 9, 1)
+        for week in range(3):
+            add_week_of_shifts(erin, first_week + datetime.timedelta(weeks=week))
+        # a shift with no roster entry is left out
+        db.session.add(Shift(user_id=erin.user_id, weekStart=first_week, weekEnd=first_week))
+        db.session.commit()
+        db.session.refresh(erin)
+
+        with QueryCounter(db.engine) as counter:
+            entries = erin.viewRoster(db.session)
+        # the joined roster read, then the user's recurring shift templates
+        assert counter.count == 2
+        assert len(entries) == 15 and isinstance(entries[0], RosterEntry)
+        assert [entry.start for entry in entries] == sorted(entry.start for entry in entries)
+        assert all(entry.user_id == erin.user_id for entry in entries)
+
+        second_week = first_week + datetime.timedelta(weeks=1)
+        window = erin.viewRoster(db.session, start=second_week, end=second_week + datetime.timedelta(days=6))
+        assert window == entries[5:10]
+        assert erin.viewRoster(db.session, limit=4) == entries[:4]
+        assert erin.viewRoster(db.session, limit=4, after=(entries[3].start, entries[3].shift_id)) == entries[4:8]
+
+
+def test_roster_api(roster_db):
+    identity_cache.clear()
+    assert roster_db.get('/api/roster?week_start=2025-10-06').status_code == 401
+    staff = Staff(name="Roster Reader", email="roster-reader@example.com", password="staffpass")
+    admin = Admin(name="Roster Admin", email="roster-admin@example.com", password="adminpass")
+    db.session.add_all([staff, admin])
+    db.session.commit()
+    staff_headers = {'Authorization': f"Bearer {create_access_token(identity=str(staff.user_id))}"}
+    assert roster_db.get('/api/roster?week_start=2025-10-06', headers=staff_headers).status_code == 403
+    headers = {'Authorization': f"Bearer {create_access_token(identity=str(admin.user_id))}"}
+    response = roster_db.get('/api/roster?week_start=2025-10-06&per_page=5', headers=headers)
+    assert response.status_code == 200
+    assert len(response.json['shifts']) == 5
+    assert response.json['next_page'] == 2
+    assert roster_db.get('/api/roster?week_start=06-10-2025', headers=headers).status_code == 400
+
+
+def test_my_roster_api(roster_db):
+    identity_cache.clear()
+    erin = db.session.scalar(db.select(Staff).filter_by(email="roster3@example.com"))
+    headers = {'Authorization': f"Bearer {create_access_token(identity=str(erin.user_id))}"}
+    pages, after = [], ''
+    while after is not None:
+        response = roster_db.get(f'/api/me/roster?limit=4&after={after}', headers=headers)
+        assert response.status_code == 200
+        pages.append(response.json['roster'])
+        after = response.json['next']
+    assert [len(page) for page in pages] == [4, 4, 4, 3]
+    assert [entry['shift_id'] for page in pages for entry in page] == [entry.shift_id for entry in erin.viewRoster(db.session)]
+
+    response = roster_db.get('/api/me/roster?start=2025-09-08&end=2025-09-14', headers=headers)
+    assert [entry['start'] for entry in response.json['roster']] == [f"2025-09-{day:02d}" for day in range(8, 13)]
+    assert response.json['next'] is None
+    assert roster_db.get('/api/me/roster?start=08-09-2025', headers=headers).status_code == 400
+    assert roster_db.get('/api/me/roster?after=garbage', headers=headers).status_code == 400
+    assert roster_db.get('/api/me/roster').status_code == 401
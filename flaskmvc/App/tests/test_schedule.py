@@ -0,0 +1,140 @@
+import collections, datetime, pytest, unittest
+from flask_jwt_extended import create_access_token
+
+from App.database import db
+from App.models.admin import Admin
+from App.models.staff import Staff
+from App.models.Shift import Shift
+from App.models.Roster import Roster
+from App.controllers import (
+    ScheduleError,
+    ShiftIntervals,
+    bulk_schedule_shifts,
+    identity_cache,
+    parse_pattern
+)
+from App.tests.test_roster import QueryCounter
+
+
+@pytest.fixture(autouse=True, scope="module")
+def schedule_db(app):
+    db.session.add_all([
+        Staff(name="Carol Lee", email="schedule1@example.com", password="staffpass1"),
+        Staff(name="David Brown", email="schedule2@example.com", password="staffpass2"),
+        Admin(name="Alice Johnson", email="schedule-admin@example.com", password="adminpass1"),
+    ])
+    db.session.commit()
+    return app.test_client()
+
+
+'''
+   Unit Tests
+'''
+class ScheduleUnitTests(unittest.TestCase):
+
+    def test_parse_pattern(self):
+        assert parse_pattern("weekdays") == {0, 1, 2, 3, 4}
+        assert parse_pattern("Mon,wed, FRI") == {0, 2, 4}
+        assert parse_pattern([5, "6"]) == {5, 6}
+        assert parse_pattern("monday,Tuesday") == {0, 1}
+        for junk in ("someday", "monkey", "mon,thur", [{}]):
+            with pytest.raises(ValueError):
+                parse_pattern(junk)
+
+    def test_shift_intervals(self):
+        row = collections.namedtuple('row', 'id weekStart weekEnd')
+        day = lambda n: datetime.date(2026, 1, n)
+        intervals = ShiftIntervals([row(2, day(10), day(10)), row(1, day(1), day(7)), row(3, day(3), day(4))])
+        assert intervals.overlapping(day(6), day(6)).id == 1
+        assert intervals.overlapping(day(8), day(9)) is None
+        assert intervals.overlapping(day(9), day(12)).id == 2
+        assert intervals.overlapping(day(11), day(11)) is None
+
+'''
+    Integration Tests
+'''
+class BulkScheduleIntegrationTests(unittest.TestCase):
+
+    def test_bulk_schedule(self):
+        results = bulk_schedule_shifts([
+            {'staff': "schedule1@example.com", 'start': "2025-10-06", 'end': "2025-10-19", 'pattern': "weekdays"},
+            {'staff': "schedule2@example.com", 'start': "2025-10-06", 'end': "2025-10-12", 'pattern': "sat,sun"},
+        ])
+        assert [len(result['shift_ids']) for result in results] == [10, 2]
+        weekend = db.session.scalars(db.select(Shift).filter(Shift.id.in_(results[1]['shift_ids']))).all()
+        assert sorted(shift.weekStart for shift in weekend) == [datetime.date(2025, 10, 11), datetime.date(2025, 10, 12)]
+        rosters = db.session.scalars(db.select(Roster).filter(Roster.shiftID.in_(results[0]['shift_ids']))).all()
+        assert {roster.userID for roster in rosters} == {results[0]['user_id']}
+        assert len(rosters) == 10
+
+    def test_bulk_schedule_is_atomic(self):
+        before = db.session.scalar(db.select(db.func.count(Shift.id)))
+        with pytest.raises(ScheduleError) as rejected:
+            bulk_schedule_shifts([
+                {'staff': "schedule1@example.com", 'start': "2025-11-03", 'end': "2025-11-07"},
+                {'staff': "nobody@example.com", 'start': "2025-11-03", 'end': "2025-11-07"},
+                {'staff': "schedule2@example.com", 'start': "2025-11-07", 'end': "2025-11-03"},
+            ])
+        assert [error['index'] for error in rejected.value.errors] == [1, 2]
+        assert db.session.scalar(db.select(db.func.count(Shift.id))) == before
+
+    def test_malformed_entries_are_rejected(self):
+        with pytest.raises(ScheduleError) as rejected:
+            bulk_schedule_shifts([
+                1,
+                {'staff': 5, 'start': []},
+                {'staff': ["schedule1@example.com"], 'start': "2025-11-03"},
+                {'staff': "schedule1@example.com", 'start': "2025-11-03", 'pattern': 5},
+                {'staff': "schedule1@example.com", 'start': "2025-11-03", 'change_request': {}},
+                {'staff': "schedule1@example.com", 'start': None},
+                {'staff': "schedule1@example.com", 'end': "2025-11-03"},
+                {'staff': "schedule1@example.com", 'start': "2025-11-03", 'end': 20251104},
+                {'staff': "schedule1@example.com", 'start': "2025-11-03"},
+            ])
+        assert [error['index'] for error in rejected.value.errors] == [0, 1, 2, 3, 4, 5, 6, 7]
+
+    def test_conflicts_are_rejected_together(self):
+        carol = db.session.scalar(db.select(Staff).filter_by(email="schedule1@example.com"))
+        week = Shift(user_id=carol.user_id, weekStart=datetime.date(2026, 1, 5), weekEnd=datetime.date(2026, 1, 11))
+        db.session.add(week)
+        db.session.commit()
+        before = db.session.scalar(db.select(db.func.count(Shift.id)))
+        entries = [
+            {'staff': "schedule1@example.com", 'start': "2026-01-09", 'end': "2026-01-13", 'pattern': "daily"},
+            {'staff': "schedule1@example.com", 'start': "2026-01-13", 'end': "2026-01-14", 'pattern': "daily"},
+            {'staff': "schedule2@example.com", 'start': "2026-01-05", 'end': "2026-01-09"},
+        ]
+        with QueryCounter(db.engine) as counter, pytest.raises(ScheduleError) as rejected:
+            bulk_schedule_shifts(entries)
+        # one query resolves the staff, one reads their existing shifts and one their recurring shift templates
+        assert counter.count == 3
+        assert [(error['index'], error['date'], error['shift_id']) for error in rejected.value.errors] == [
+            (0, "2026-01-09", week.id), (0, "2026-01-10", week.id), (0, "2026-01-11", week.id),
+            (1, "2026-01-13", None),
+        ]
+        assert db.session.scalar(db.select(db.func.count(Shift.id))) == before
+
+        results = bulk_schedule_shifts(entries, skip_conflicts=True)
+        assert [len(result['shift_ids']) for result in results] == [2, 1, 5]
+        assert [len(result['rejected']) for result in results] == [3, 1, 0]
+        with pytest.raises(ScheduleError):
+            bulk_schedule_shifts([{'staff': "schedule2@example.com", 'start': "2026-01-07", 'end': "2026-01-07"}])
+
+
+def test_bulk_schedule_api(schedule_db):
+    identity_cache.clear()
+    entries = [{'staff': "schedule2@example.com", 'start': "2025-12-01", 'end': "2025-12-07"}]
+    assert schedule_db.post('/api/roster/bulk', json={'entries': entries}).status_code == 401
+    staff_headers = {'Authorization': f"Bearer {create_access_token(identity='1')}"}
+    assert schedule_db.post('/api/roster/bulk', json={'entries': entries}, headers=staff_headers).status_code == 403
+    admin = db.session.scalar(db.select(Admin.user_id).filter_by(email="schedule-admin@example.com"))
+    headers = {'Authorization': f"Bearer {create_access_token(identity=str(admin))}"}
+    response = schedule_db.post('/api/roster/bulk', json={'entries': entries}, headers=headers)
+    assert response.status_code == 201
+    assert response.json['shifts_created'] == 5
+    response = schedule_db.post('/api/roster/bulk', json={'entries': [{'staff': "x"}]}, headers=headers)
+    assert response.status_code == 400
+    response = schedule_db.post('/api/roster/bulk', json={'entries': [1, {'staff': 5, 'start': []}]}, headers=headers)
+    assert response.status_code == 400 and [error['index'] for error in response.json['errors']] == [0, 1]
+    response = schedule_db.post('/api/roster/bulk', json={'entries': [{'staff': "schedule2@example.com", 'start': None}]}, headers=headers)
+    assert response.status_code == 400 and response.json['errors'] == [{'index': 0, 'error': "Entry needs a start date."}]
@@ -0,0 +1,148 @@
+import datetime, itertools, pytest, unittest
+from collections import namedtuple
+
+from App.database import db
+from App.models.staff import Staff
+from App.models.Shift import Shift
+from App.models.Roster import Roster
+from App.controllers import (
+    ScheduleError,
+    bulk_schedule_shifts,
+    clock_in,
+    clock_out,
+    create_shift_template,
+    expand_templates,
+    generate_shift_report,
+    get_weekly_roster,
+    get_weekly_roster_json,
+    list_user_roster,
+    parse_shift_id,
+    shift_ref,
+    weekday_mask
+)
+from .test_roster import QueryCounter
+
+MONDAY = datetime.date(2025, 10, 6)
+SUNDAY = datetime.date(2025, 10, 12)
+
+
+@pytest.fixture(autouse=True, scope="module")
+def template_db(app):
+    db.session.add_all([
+        Staff(name="Carol Lee", email="template1@example.com", password="staffpass1"),
+        Staff(name="David Brown", email="template2@example.com", password="staffpass2"),
+        Staff(name="Erin Moss", email="template3@example.com", password="staffpass3"),
+    ])
+    db.session.commit()
+    create_shift_template("template1@example.com", "weekdays", "08:00", "16:00", MONDAY)
+    create_shift_template("template2@example.com", "mon,wed", "12:00", "20:00", MONDAY, SUNDAY)
+    return app.test_client()
+
+
+def staff_id(email):
+    return db.session.scalar(db.select(Staff.user_id).filter_by(email=email))
+
+
+'''
+   Unit Tests
+'''
+class ShiftTemplateUnitTests(unittest.TestCase):
+
+    def test_shift_ref(self):
+        assert shift_ref(4, MONDAY) == "4@2025-10-06"
+        assert parse_shift_id("4@2025-10-06") == (4, MONDAY)
+        assert parse_shift_id("12") == 12
+        with pytest.raises(ValueError):
+            parse_shift_id("4@monday")
+
+    def test_expand_templates(self):
+        row = namedtuple('row', 'id user_id weekdays start_time end_time valid_from valid_until name email')
+        eight, four = datetime.time(8), datetime.time(16)
+        templates = [
+            row(1, 1, weekday_mask({0, 2}), eight, four, MONDAY, None, "A", "a@example.com"),
+            row(2, 2, weekday_mask({0}), eight, four, MONDAY - datetime.timedelta(weeks=4), MONDAY, "B", "b@example.com"),
+        ]
+        # open-ended, so only as many as are taken are expanded
+        occurrences = list(itertools.islice(expand_templates(templates, {(1, datetime.date(2025, 10, 13))}, MONDAY, None), 4))
+        assert [occurrence.id for occurrence in occurrences] == ["1@2025-10-06", "2@2025-10-06", "1@2025-10-08", "1@2025-10-15"]
+        assert occurrences[0].roster_user_id == 1 and occurrences[0].start_time == eight
+
+'''
+    Integration Tests
+'''
+class ShiftTemplateIntegrationTests(unittest.TestCase):
+
+    def test_roster_expands_templates(self):
+        carol, david = staff_id("template1@example.com"), staff_id("template2@example.com")
+        with QueryCounter(db.engine) as counter:
+            rows = get_weekly_roster(MONDAY, SUNDAY)
+        # the week's shifts, its templates and their materialised occurrences
+        assert counter.count == 3
+        rows = [row for row in rows if row.user_id in (carol, david)]
+        assert [(row.user_id, row.weekStart.day) for row in rows] == [
+            (carol, 6), (david, 6), (carol, 7), (carol, 8), (david, 8), (carol, 9), (carol, 10)
+        ]
+        every = get_weekly_roster(MONDAY, SUNDAY)
+        page = get_weekly_roster_json(MONDAY, SUNDAY, page=2, per_page=3)
+        assert [shift['shift_id'] for shift in page['shifts']] == [row.id for row in every[3:6]]
+        assert page['next_page'] == 3 and all(shift['rostered'] for shift in page['shifts'])
+
+    def test_clock_in_materializes_occurrence(self):
+        erin = staff_id("template3@example.com")
+        template = create_shift_template(erin, "tue", "09:00", "17:00", MONDAY, SUNDAY)
+        tuesday = shift_ref(template.id, datetime.date(2025, 10, 7))
+        # someone else's occurrence and a day off the pattern are not created
+        assert clock_in("template1@example.com", tuesday, "2025-10-07T09:00")['status'] == 'error'
+        assert clock_in("template3@example.com", f"{template.id}@2025-10-08", "2025-10-08T09:00")['status'] == 'error'
+        assert clock_out("template3@example.com", tuesday, "2025-10-07T17:00")['status'] == 'error'
+        assert db.session.scalar(db.select(db.func.count(Shift.id)).filter_by(template_id=template.id)) == 0
+
+        result = clock_in("template3@example.com", tuesday, "2025-10-07T09:05")
+        assert result['status'] == 'ok' and isinstance(result['shift_id'], int)
+        shift = db.session.get(Shift, result['shift_id'])
+        assert (shift.user_id, shift.weekStart, shift.template_date) == (erin, datetime.date(2025, 10, 7), datetime.date(2025, 10, 7))
+        assert db.session.scalar(db.select(Roster.userID).filter_by(shiftID=shift.id)) == erin
+        assert clock_out("template3@example.com", tuesday, "2025-10-07T17:00")['shift_id'] == shift.id
+
+        # the occurrence is now read from its Shift row, once
+        week = [row for row in get_weekly_roster(MONDAY, SUNDAY) if row.user_id == erin]
+        assert [row.id for row in week] == [shift.id]
+        report = {row['user_id']: row for row in generate_shift_report(MONDAY, SUNDAY)}
+        assert (report[erin]['scheduled_shifts'], report[erin]['attendance_records']) == (1, 1)
+
+    def test_report_counts_occurrences(self):
+        report = {row['user_id']: row for row in generate_shift_report(MONDAY, SUNDAY)}
+        assert report[staff_id("template1@example.com")]['scheduled_shifts'] == 5
+        assert report[staff_id("template2@example.com")]['scheduled_shifts'] == 2
+
+    def test_user_roster_pages_merge_occurrences(self):
+        carol = db.session.get(Staff, staff_id("template1@example.com"))
+        db.session.add(Shift(user_id=carol.user_id, weekStart=datetime.date(2025, 10, 11), weekEnd=datetime.date(2025, 10, 11)))
+        db.session.flush()
+        db.session.add(Roster(shiftID=db.session.scalar(db.select(db.func.max(Shift.id))), userID=carol.user_id))
+        db.session.commit()
+
+        # open-ended, so the first page is bounded by its limit only
+        entries, after = [], None
+        for _ in range(3):
+            page, after = list_user_roster(carol, start=MONDAY, after=after, limit=3)
+            entries += page
+        assert [entry['start'] for entry in entries] == [
+            "2025-10-06", "2025-10-07", "2025-10-08", "2025-10-09", "2025-10-10", "2025-10-11",
+            "2025-10-13", "2025-10-14", "2025-10-15"
+        ]
+        assert isinstance(entries[5]['shift_id'], int) and after == f"2025-10-15_{entries[-1]['shift_id']}"
+        assert carol.viewRoster(db.session, MONDAY, SUNDAY) == carol.viewRoster(db.session, MONDAY, SUNDAY, limit=10)
+
+    def test_conflicts_with_templates(self):
+        with pytest.raises(ScheduleError) as rejected:
+            bulk_schedule_shifts([{'staff': "template2@example.com", 'start': "2025-10-08", 'end': "2025-10-09", 'pattern': "daily"}])
+        assert "@2025-10-08" in rejected.value.errors[0]['shift_id']
+        with pytest.raises(ScheduleError):
+            create_shift_template("template1@example.com", "fri", "18:00", "22:00", datetime.date(2026, 3, 1))
+        # another weekday is free, and nothing is written per day
+        shifts = db.session.scalar(db.select(db.func.count(Shift.id)))
+        template = create_shift_template("template2@example.com", "fri", "12:00", "20:00",
+                                         MONDAY + datetime.timedelta(weeks=1), SUNDAY + datetime.timedelta(weeks=1))
+        assert template.weekdays == weekday_mask({4})
+        assert db.session.scalar(db.select(db.func.count(Shift.id))) == shifts
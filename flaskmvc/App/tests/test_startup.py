@@ -0,0 +1,42 @@
+import pytest
+
+from App.main import cli_command
+
+
+@pytest.fixture(scope="module")
+def app_config():
+    return {'RESPONSE_CACHE_BACKEND': 'local'}
+
+
+@pytest.fixture(scope="module")
+def lite():
+    return True
+
+
+@pytest.fixture(scope="module")
+def lite_app(app):
+    return app
+
+
+def test_cli_command():
+    assert cli_command(['/usr/local/bin/flask', 'clock-in', 'a@example.com', '3']) == 'clock-in'
+    assert cli_command(['/usr/local/bin/flask', '--app', 'wsgi', '--debug', 'run']) == 'run'
+    assert cli_command(['/lib/python3/site-packages/flask/__main__.py', '-e', '.env', 'db', 'upgrade']) == 'db'
+    assert cli_command(['/usr/local/bin/flask', '--help']) is None
+    assert cli_command(['/usr/local/bin/gunicorn', '-c', 'gunicorn_config.py', 'wsgi:app']) is None
+    assert cli_command(['/usr/local/bin/pytest', 'App/tests']) is None
+
+
+def test_lite_app_defers_the_web_layer(lite_app):
+    rules = {rule.rule for rule in lite_app.url_map.iter_rules()}
+    assert '/health' not in rules
+    assert 'flask-jwt-extended' not in lite_app.extensions
+    assert 'response_cache' in lite_app.extensions
+
+    # the first request brings the web layer up before it is dispatched
+    response = lite_app.test_client().get('/health')
+    assert response.status_code == 200
+    assert response.json['status'] == 'healthy'
+    assert '/api/login' in {rule.rule for rule in lite_app.url_map.iter_rules()}
+    assert 'flask-jwt-extended' in lite_app.extensions
+    assert lite_app.test_client().get('/api/identify').status_code == 401
@@ -0,0 +1,67 @@
+import json, pytest, unittest
+
+from App.database import db
+from App.models.admin import Admin
+from App.models.staff import Staff
+from App.controllers import (
+    get_all_users,
+    iter_users,
+    list_users
+)
+from .test_roster import QueryCounter
+
+
+@pytest.fixture(autouse=True, scope="module")
+def users_db(app):
+    db.session.add(Admin(name="Alice Johnson", email="list-admin@example.com", password="adminpass"))
+    db.session.add_all([
+        Staff(name=f"{'Carol' if i % 2 else 'David'} {i}", email=f"list{i}@example.com", password="staffpass")
+        for i in range(7)
+    ])
+    db.session.commit()
+    return app.test_client()
+
+
+'''
+    Integration Tests
+'''
+class UserListingIntegrationTests(unittest.TestCase):
+
+    def test_keyset_pages(self):
+        seen, cursor = [], None
+        while True:
+            users, cursor = list_users(after=cursor, limit=3)
+            seen.extend(user['user_id'] for user in users)
+            if cursor is None:
+                break
+        assert seen == sorted(seen) and len(seen) == 8
+
+    def test_filters(self):
+        users, cursor = list_users(type="staff", name_prefix="Carol")
+        assert [user['name'] for user in users] == ["Carol 1", "Carol 3", "Carol 5"] and cursor is None
+        users, _ = list_users(type="admin")
+        assert [user['email'] for user in users] == ["list-admin@example.com"]
+        users, _ = list_users(name_prefix="%")
+        assert users == []
+
+    def test_iter_users_chunks(self):
+        assert len(list(iter_users(chunk_size=2))) == 8
+        assert [user['email'] for user in iter_users(chunk_size=2, email="list4@example.com")] == ["list4@example.com"]
+
+    def test_mixed_users_load_roles_per_subclass(self):
+        db.session.expunge_all()
+        with QueryCounter(db.engine) as counter:
+            roles = {user.role for user in get_all_users()}
+        # one SELECT for users, then one SELECT .. IN each for admin and staff
+        assert roles == {"admin", "staff"} and counter.count == 3
+
+
+def test_users_api(users_db):
+    response = users_db.get('/api/users?limit=5&type=staff')
+    assert len(response.json['users']) == 5 and response.json['next'] is not None
+    response = users_db.get(f"/api/users?limit=5&type=staff&after={response.json['next']}")
+    assert len(response.json['users']) == 2 and response.json['next'] is None
+    response = users_db.get('/api/users?format=ndjson&name=David')
+    assert response.mimetype == 'application/x-ndjson'
+    assert [json.loads(line)['name'] for line in response.data.decode().splitlines()] == ["David 0", "David 2", "David 4", "David 6"]
+    assert b"Next page" in users_db.get('/users?limit=2').data
@@ -3,8 +3,12 @@
 from .user import user_views
 from .index import index_views
 from .auth import auth_views
+from .roster import roster_views
+from .report import report_views
+from .attendance import attendance_views
+from .change_request import change_request_views
 from .admin import setup_admin
 
 
-views = [user_views, index_views, auth_views] 
+views = [user_views, index_views, auth_views, roster_views, report_views, attendance_views, change_request_views] 
 # blueprints must be added to this list
\ No newline at end of file
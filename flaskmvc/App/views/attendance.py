@@ -0,0 +1,56 @@
+import datetime
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from flask_jwt_extended import jwt_required, current_user
+
+from App.controllers import EXPORT_FORMATS, export_attendance, submit_punch_events
+
+attendance_views = Blueprint('attendance_views', __name__, template_folder='../templates')
+
+
+'''
+API Routes
+'''
+
+@attendance_views.route('/api/attendance/events', methods=['POST'])
+@jwt_required()
+def punch_events_action():
+    data = request.json
+    events = data.get('events') if isinstance(data, dict) else data
+    if not isinstance(events, list) or not events:
+        return jsonify(message='Expected a non-empty list of punch events.'), 400
+    max_batch = current_app.config.get('ATTENDANCE_MAX_BATCH', 1000)
+    if len(events) > max_batch:
+        return jsonify(message=f'At most {max_batch} events may be sent per batch.'), 413
+    if current_user.type != 'admin' and any(
+            isinstance(event, dict) and event.get('staff') != current_user.email for event in events):
+        return jsonify(message='Staff can only send punch events for themselves.'), 403
+    results = submit_punch_events(events)
+    accepted = sum(1 for result in results if result['status'] == 'ok')
+    return jsonify({
+        'accepted': accepted,
+        'rejected': len(results) - accepted,
+        'results': results
+    })
+
+@attendance_views.route('/api/attendance/export', methods=['GET'])
+@jwt_required()
+def export_attendance_action():
+    if current_user is None or current_user.type != 'admin':
+        return jsonify(message='Only admins can export attendance.'), 403
+    try:
+        start = datetime.datetime.strptime(request.args['start'], "%Y-%m-%d").date()
+        end = datetime.datetime.strptime(request.args['end'], "%Y-%m-%d").date()
+    except (KeyError, ValueError):
+        return jsonify(message='start and end are required as YYYY-MM-DD.'), 400
+    format = request.args.get('format', 'csv')
+    staff = [member.strip() for member in request.args.get('staff', '').split(',') if member.strip()]
+    try:
+        body = export_attendance(start, end, format, staff, request.args.get('after'))
+    except ValueError as e:
+        return jsonify(message=str(e)), 400
+    except RuntimeError as e:
+        return jsonify(message=str(e)), 501
+    filename = f"attendance-{start.isoformat()}-{end.isoformat()}.{format}"
+    return Response(stream_with_context(body), mimetype=EXPORT_FORMATS[format],
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
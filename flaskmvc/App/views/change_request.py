@@ -0,0 +1,45 @@
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required, current_user
+
+from App.controllers import decide_change_requests, list_pending_requests
+
+change_request_views = Blueprint('change_request_views', __name__, template_folder='../templates')
+
+
+def _admin_only():
+    if current_user is None or current_user.type != 'admin':
+        return jsonify(message='Only admins can review shift change requests.'), 403
+    return None
+
+
+'''
+API Routes
+'''
+
+@change_request_views.route('/api/shift-requests/pending', methods=['GET'])
+@jwt_required()
+def pending_requests_action():
+    denied = _admin_only()
+    if denied:
+        return denied
+    try:
+        requests, next_cursor = list_pending_requests(request.args.get('after'), request.args.get('limit', 50, type=int))
+    except ValueError:
+        return jsonify(message='Invalid cursor.'), 400
+    return jsonify({'requests': requests, 'next': next_cursor})
+
+@change_request_views.route('/api/shift-requests/decisions', methods=['POST'])
+@jwt_required()
+def decide_requests_action():
+    denied = _admin_only()
+    if denied:
+        return denied
+    data = request.json
+    if not isinstance(data, dict) or not isinstance(data.get('approve', []), list) \
+            or not isinstance(data.get('deny', []), list):
+        return jsonify(message='Expected {"approve": [ids], "deny": [ids]}.'), 400
+    try:
+        result = decide_change_requests(current_user.user_id, data.get('approve', []), data.get('deny', []))
+    except (TypeError, ValueError) as e:
+        return jsonify(message=str(e)), 400
+    return jsonify(result)
@@ -1,5 +1,6 @@
-from flask import Blueprint, redirect, render_template, request, send_from_directory, jsonify
-from App.controllers import create_user, initialize
+from flask import Blueprint, current_app, redirect, render_template, request, send_from_directory, jsonify
+from App.controllers import create_user, initialize, get_identity_cache_stats
+from App.database import get_pool_stats
 
 index_views = Blueprint('index_views', __name__, template_folder='../templates')
 
@@ -14,4 +15,10 @@ def init():
 
 @index_views.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({'status':'healthy'})
\ No newline at end of file
+    response_cache = current_app.extensions.get('response_cache')
+    return jsonify({
+        'status':'healthy',
+        'identity_cache': get_identity_cache_stats(),
+        'db_pool': get_pool_stats(),
+        'response_cache': response_cache.stats() if response_cache else None
+    })
\ No newline at end of file
@@ -0,0 +1,41 @@
+import datetime
+
+from flask import Blueprint, Response, jsonify, request
+from flask_jwt_extended import current_user, jwt_required
+
+from App.response_cache import cached_response
+from App.controllers import (
+    generate_shift_report,
+    shift_report_csv
+)
+
+report_views = Blueprint('report_views', __name__, template_folder='../templates')
+
+
+'''
+API Routes
+'''
+
+@report_views.route('/api/reports/shifts', methods=['GET'])
+@jwt_required()
+def shift_report_action():
+    if current_user is None or current_user.type != 'admin':
+        return jsonify(message='Only admins can view shift reports.'), 403
+    return _shift_report()
+
+# checked above rather than in here, since a cache hit skips the view
+@cached_response('shifts', 'shift_templates', 'attendance_records', 'users')
+def _shift_report():
+    try:
+        week_start = datetime.datetime.strptime(request.args['week_start'], "%Y-%m-%d").date()
+        week_end = datetime.datetime.strptime(request.args['week_end'], "%Y-%m-%d").date()
+    except (KeyError, ValueError):
+        return jsonify(message='week_start and week_end are required as YYYY-MM-DD.'), 400
+    report = generate_shift_report(week_start, week_end, with_hours=request.args.get('hours') == '1')
+    if request.args.get('format') == 'csv':
+        return Response(shift_report_csv(report), mimetype='text/csv')
+    return jsonify({
+        'week_start': week_start.isoformat(),
+        'week_end': week_end.isoformat(),
+        'staff': report
+    })
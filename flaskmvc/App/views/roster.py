@@ -0,0 +1,95 @@
+import datetime
+
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import current_user, jwt_required
+
+from App.response_cache import cached_response
+from App.controllers import (
+    ScheduleError,
+    bulk_schedule_shifts,
+    get_current_week,
+    get_my_week_json,
+    list_user_roster,
+    get_weekly_roster_json
+)
+
+roster_views = Blueprint('roster_views', __name__, template_folder='../templates')
+
+
+def _parse_date(value):
+    return datetime.datetime.strptime(value, "%Y-%m-%d").date()
+
+
+'''
+API Routes
+'''
+
+@roster_views.route('/api/roster', methods=['GET'])
+@jwt_required()
+def get_roster_action():
+    if current_user is None or current_user.type != 'admin':
+        return jsonify(message='Only admins can view the roster.'), 403
+    return _weekly_roster()
+
+# checked above rather than in here, since a cache hit skips the view
+@cached_response('shifts', 'shift_templates', 'rosters', 'users', vary=lambda: get_current_week()[0])
+def _weekly_roster():
+    week_start, week_end = get_current_week()
+    try:
+        if request.args.get('week_start'):
+            week_start = _parse_date(request.args['week_start'])
+            week_end = week_start + datetime.timedelta(days=6)
+        if request.args.get('week_end'):
+            week_end = _parse_date(request.args['week_end'])
+    except ValueError:
+        return jsonify(message='Invalid date format. Use YYYY-MM-DD.'), 400
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 50, type=int)
+    return jsonify(get_weekly_roster_json(week_start, week_end, page, per_page))
+
+@roster_views.route('/api/me/week', methods=['GET'])
+@jwt_required()
+def get_my_week_action():
+    week_start, week_end = get_current_week()
+    if request.args.get('week_start'):
+        try:
+            week_start = _parse_date(request.args['week_start'])
+        except ValueError:
+            return jsonify(message='Invalid date format. Use YYYY-MM-DD.'), 400
+        week_end = week_start + datetime.timedelta(days=6)
+    return jsonify(get_my_week_json(current_user.user_id, week_start, week_end))
+
+@roster_views.route('/api/me/roster', methods=['GET'])
+@jwt_required()
+def get_my_roster_action():
+    try:
+        start = _parse_date(request.args['start']) if request.args.get('start') else None
+        end = _parse_date(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify(message='Invalid date format. Use YYYY-MM-DD.'), 400
+    try:
+        roster, next_cursor = list_user_roster(current_user, start, end, request.args.get('after'),
+                                               request.args.get('limit', 50, type=int))
+    except ValueError:
+        return jsonify(message='Invalid cursor.'), 400
+    return jsonify({'roster': roster, 'next': next_cursor})
+
+@roster_views.route('/api/roster/bulk', methods=['POST'])
+@jwt_required()
+def bulk_schedule_action():
+    if current_user is None or current_user.type != 'admin':
+        return jsonify(message='Only admins can schedule shifts.'), 403
+    data = request.json or {}
+    entries = data.get('entries') if isinstance(data, dict) else data
+    skip_conflicts = isinstance(data, dict) and bool(data.get('skip_conflicts'))
+    if not isinstance(entries, list):
+        return jsonify(message='Expected a list of schedule entries.'), 400
+    try:
+        results = bulk_schedule_shifts(entries, skip_conflicts=skip_conflicts)
+    except ScheduleError as e:
+        return jsonify(message=str(e), errors=e.errors), 400
+    return jsonify({
+        'shifts_created': sum(len(result['shift_ids']) for result in results),
+        'shifts_rejected': sum(len(result['rejected']) for result in results),
+        'entries': results
+    }), 201
@@ -1,4 +1,6 @@
-from flask import Blueprint, render_template, jsonify, request, send_from_directory, flash, redirect, url_for
+import json
+
+from flask import Blueprint, Response, render_template, jsonify, request, send_from_directory, flash, redirect, url_for, stream_with_context
 from flask_jwt_extended import jwt_required, current_user as jwt_current_user
 
 from.index import index_views
@@ -7,15 +9,25 @@ from App.controllers import (
     create_user,
     get_all_users,
     get_all_users_json,
+    iter_users,
+    list_users,
     jwt_required
 )
 
 user_views = Blueprint('user_views', __name__, template_folder='../templates')
 
+def _user_filters():
+    return {
+        'type': request.args.get('type'),
+        'name_prefix': request.args.get('name'),
+        'email': request.args.get('email')
+    }
+
 @user_views.route('/users', methods=['GET'])
 def get_user_page():
-    users = get_all_users()
-    return render_template('users.html', users=users)
+    users, next_cursor = list_users(request.args.get('after', type=int), request.args.get('limit', 50, type=int),
+                                    **_user_filters())
+    return render_template('users.html', users=users, next_cursor=next_cursor)
 
 @user_views.route('/users', methods=['POST'])
 def create_user_action():
@@ -26,8 +38,13 @@ def create_user_action():
 
 @user_views.route('/api/users', methods=['GET'])
 def get_users_action():
-    users = get_all_users_json()
-    return jsonify(users)
+    if request.args.get('format') == 'ndjson':
+        # full export, streamed one JSON object per line
+        rows = iter_users(**_user_filters())
+        return Response(stream_with_context(json.dumps(row) + '\n' for row in rows), mimetype='application/x-ndjson')
+    users, next_cursor = list_users(request.args.get('after', type=int), request.args.get('limit', 50, type=int),
+                                    **_user_filters())
+    return jsonify({'users': users, 'next': next_cursor})
 
 @user_views.route('/api/users', methods=['POST'])
 def create_user_endpoint():
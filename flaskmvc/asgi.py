@@ -0,0 +1,6 @@
+from App.main import create_app
+from App.async_api import create_asgi_app
+
+# uvicorn asgi:app, or with gunicorn_config.py:
+# gunicorn -c gunicorn_config.py -k uvicorn.workers.UvicornWorker asgi:app
+app = create_asgi_app(create_app(lite=True))
@@ -0,0 +1,157 @@
+"""
+Compare the async read API (asgi.py) with the Flask views served by
+gunicorn's gevent workers (gunicorn_config.py).
+
+Generates bench data (see App.bench) with an open attendance record for
+every other staff member, then starts each server in turn with the same
+gunicorn config and worker count and fires --requests GET /api/me/week
+calls (roster, open shift and weekly totals for the caller) from
+--concurrency keep-alive connections, each signed in as a different staff
+member. Reports requests per second and latency percentiles.
+
+    gevent   gunicorn -c gunicorn_config.py wsgi:app              GET /api/me/week
+    asgi     gunicorn -c gunicorn_config.py -k uvicorn.workers.UvicornWorker asgi:app
+                                                                  GET /async/api/me/week
+
+The gap depends on database round-trip time: the async view sends its
+three reads at once, the Flask view one after the other. SQLite answers
+in microseconds, so pass a Postgres --database-url to see it.
+
+Usage (from the flaskmvc folder, with gunicorn, uvicorn and the async driver installed):
+    python benchmarks/async_reads.py [--staff 200] [--weeks 8] [--workers 4] [--concurrency 64]
+        [--requests 5000] [--database-url postgresql://...] [--target gevent --target asgi]
+"""
+import argparse, asyncio, datetime, os, socket, statistics, subprocess, sys, tempfile, time
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, HERE)
+
+from flask_jwt_extended import create_access_token
+
+from App.main import create_app
+from App.database import db
+from App.models.attendance_record import AttendanceRecord
+from App.bench import generate_bench_data, percentile
+
+TARGETS = {
+    'gevent': (['wsgi:app'], '/api/me/week'),
+    'asgi': (['-k', 'uvicorn.workers.UvicornWorker', 'asgi:app'], '/async/api/me/week')
+}
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+async def get(connection, port, path, token):
+    """Send one keep-alive GET; reconnects when the server closed the connection. Returns the status."""
+    for attempt in range(2):
+        if connection[0] is None:
+            connection[:] = await asyncio.open_connection('127.0.0.1', port)
+        reader, writer = connection
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: bench\r\nAuthorization: Bearer {token}\r\n\r\n".encode())
+        try:
+            await writer.drain()
+            status = await reader.readline()
+            if not status:
+                raise ConnectionResetError
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.strip().lower() == 'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+            return int(status.split()[1])
+        except (ConnectionError, asyncio.IncompleteReadError):
+            writer.close()
+            connection[:] = [None, None]
+    raise ConnectionError(f"GET {path} failed twice")
+
+
+async def load(port, path, tokens, requests, concurrency):
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def client(index):
+        nonlocal errors
+        connection = [None, None]
+        token = tokens[index % len(tokens)]
+        for _ in remaining:
+            started = time.perf_counter()
+            status = await get(connection, port, path, token)
+            latencies.append(time.perf_counter() - started)
+            errors += status != 200
+        if connection[1] is not None:
+            connection[1].close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(index) for index in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def wait_until_serving(port, path, token, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit(f"server exited with {process.returncode}")
+        try:
+            if await get([None, None], port, path, token) == 200:
+                return
+        except OSError:
+            pass
+        await asyncio.sleep(0.2)
+    sys.exit("server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--staff', type=int, default=200)
+    parser.add_argument('--weeks', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers for each target')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--database-url', default=None, help='database to fill and read; it is replaced')
+    parser.add_argument('--target', action='append', choices=list(TARGETS), help='default: all targets')
+    args = parser.parse_args()
+
+    url = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/async-bench.db"
+    app = create_app({'SQLALCHEMY_DATABASE_URI': url})
+    data = generate_bench_data(args.staff, args.weeks)
+    now = datetime.datetime.combine(datetime.date.today(), datetime.time(8))
+    db.session.add_all([
+        AttendanceRecord(shiftID=data.burst_shifts[user_id], userID=user_id, timeIn=now, timeout=None)
+        for user_id, _ in data.staff[::2]
+    ])
+    db.session.commit()
+    tokens = [create_access_token(identity=str(user_id)) for user_id, _ in data.staff]
+    db.session.remove()
+    env = dict(os.environ, FLASK_SQLALCHEMY_DATABASE_URI=url)
+    env.pop('FLASK_APP', None)
+
+    print(f"{args.requests} requests from {args.concurrency} connections, {args.workers} workers, "
+          f"{args.staff} staff, {args.weeks} weeks")
+    for name in args.target or TARGETS:
+        server_args, path = TARGETS[name]
+        port = free_port()
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn_config.py', '-b', f"127.0.0.1:{port}",
+                   '-w', str(args.workers), '--access-logfile', '/dev/null', *server_args]
+        process = subprocess.Popen(command, cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            asyncio.run(wait_until_serving(port, path, tokens[0], process))
+            asyncio.run(load(port, path, tokens, args.concurrency * 4, args.concurrency))  # warm every worker
+            latencies, errors, elapsed = asyncio.run(load(port, path, tokens, args.requests, args.concurrency))
+        finally:
+            process.terminate()
+            process.wait()
+        print(f"{name:>8}: {len(latencies) / elapsed:8.1f} req/s  p50 {percentile(latencies, 50) * 1000:7.2f} ms  "
+              f"p95 {percentile(latencies, 95) * 1000:7.2f} ms  p99 {percentile(latencies, 99) * 1000:7.2f} ms  "
+              f"mean {statistics.mean(latencies) * 1000:7.2f} ms  errors {errors}")
+
+
+if __name__ == '__main__':
+    main()
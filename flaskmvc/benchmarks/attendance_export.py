@@ -0,0 +1,127 @@
+"""
+Benchmark the memory use of the streaming attendance export.
+
+Seeds a database with ROWS attendance records, exports all of them to
+/dev/null and prints the process's resident memory every tenth of the
+way through. A streaming export should stay flat however many rows it
+writes. With --naive the same rows are first loaded in one .all() for
+comparison (the way generate-shift-report used to hold every record).
+
+Usage (from the flaskmvc folder):
+    python benchmarks/attendance_export.py [--rows 10000000] [--staff 5000] [--format csv|parquet]
+                                           [--chunk-size 5000] [--naive]
+                                           [--database-url sqlite:////tmp/bench.db]
+"""
+import argparse, datetime, os, resource, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash
+
+from App.main import create_app
+from App.database import db
+from App.models.user import User
+from App.models.staff import Staff
+from App.models.Shift import Shift
+from App.models.attendance_record import AttendanceRecord
+from App.controllers.export import _export_query, export_attendance
+
+FIRST_DAY = datetime.date(2024, 1, 1)
+CHUNK = 50000
+
+
+def rss_mb():
+    """Current resident set size, from /proc where available, else the peak."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def seed(rows, staff_count):
+    password = generate_password_hash("benchpass")
+    db.session.execute(db.insert(User), [
+        {'user_id': i, 'name': f"Staff {i}", 'email': f"staff{i}@example.com", 'password': password, 'type': 'staff'}
+        for i in range(1, staff_count + 1)
+    ])
+    db.session.execute(db.insert(Staff.__table__), [
+        {'user_id': i, 'role': 'staff'} for i in range(1, staff_count + 1)
+    ])
+    for offset in range(0, rows, CHUNK):
+        ids = range(offset + 1, min(offset + CHUNK, rows) + 1)
+        shifts, records = [], []
+        for shift_id in ids:
+            user_id = (shift_id - 1) % staff_count + 1
+            day = FIRST_DAY + datetime.timedelta(days=(shift_id - 1) // staff_count)
+            time_in = datetime.datetime.combine(day, datetime.time(8, shift_id % 30))
+            shifts.append({'id': shift_id, 'user_id': user_id, 'weekStart': day, 'weekEnd': day})
+            records.append({
+                'shiftID': shift_id, 'userID': user_id, 'timeIn': time_in,
+                'timeout': time_in + datetime.timedelta(hours=8)
+            })
+        db.session.execute(db.insert(Shift.__table__), shifts)
+        db.session.execute(db.insert(AttendanceRecord.__table__), records)
+        db.session.commit()
+        print(f"  seeded {ids[-1]} rows", end="\r")
+    print()
+    return FIRST_DAY + datetime.timedelta(days=(rows - 1) // staff_count)
+
+
+def streamed(rows, last_day, output_format, chunk_size):
+    marks = iter(range(1, 11))
+    next_mark = next(marks)
+    start_rss = rss_mb()
+    peak = start_rss
+
+    def progress(done, cursor):
+        nonlocal next_mark, peak
+        peak = max(peak, rss_mb())
+        while next_mark is not None and done >= rows * next_mark / 10:
+            print(f"  {done:>10} rows  rss {rss_mb():8.1f} MB")
+            next_mark = next(marks, None)
+
+    start = time.perf_counter()
+    with open(os.devnull, 'wb') as sink:
+        for data in export_attendance(FIRST_DAY, last_day, output_format, chunk_size=chunk_size, progress=progress):
+            sink.write(data)
+    elapsed = time.perf_counter() - start
+    print(f"streamed: {rows} rows in {elapsed:.1f} s ({rows / elapsed:,.0f} rows/s), "
+          f"rss {start_rss:.1f} MB at start, {peak:.1f} MB peak")
+
+
+def naive(last_day):
+    start_rss = rss_mb()
+    start = time.perf_counter()
+    rows = db.session.execute(_export_query(FIRST_DAY, last_day)).all()
+    elapsed = time.perf_counter() - start
+    print(f"naive: loaded {len(rows)} rows in {elapsed:.1f} s, rss {start_rss:.1f} MB -> {rss_mb():.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000000, help='attendance records to seed')
+    parser.add_argument('--staff', type=int, default=5000, help='staff members to spread rows across')
+    parser.add_argument('--format', default='csv', choices=['csv', 'parquet'])
+    parser.add_argument('--chunk-size', type=int, default=5000, help='rows read per round trip')
+    parser.add_argument('--naive', action='store_true', help='also load every row at once for comparison')
+    parser.add_argument('--database-url', default=None, help='defaults to a temporary SQLite file')
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/export-bench.db"
+    create_app({'SQLALCHEMY_DATABASE_URI': database_url})
+    db.drop_all()
+    db.create_all()
+
+    print(f"Seeding {args.rows} attendance records for {args.staff} staff into {database_url}")
+    last_day = seed(args.rows, args.staff)
+    db.session.remove()
+
+    print(f"\nExporting as {args.format}, {args.chunk_size} rows per chunk")
+    streamed(args.rows, last_day, args.format, args.chunk_size)
+    if args.naive:
+        naive(last_day)
+
+
+if __name__ == '__main__':
+    main()
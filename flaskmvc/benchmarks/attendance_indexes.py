@@ -0,0 +1,142 @@
+"""
+Benchmark the shift/attendance hot path queries with and without the
+indexes added in migration 3f1c2a9d7b10.
+
+Seeds a database with ROWS attendance records (one per shift), prints the
+query plan and the median timing of each hot path query, then builds the
+indexes and repeats.
+
+Usage (from the flaskmvc folder):
+    python benchmarks/attendance_indexes.py [--rows 1000000] [--staff 2000]
+                                            [--database-url sqlite:////tmp/bench.db]
+"""
+import argparse, datetime, os, statistics, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from werkzeug.security import generate_password_hash
+
+from App.main import create_app
+from App.database import db
+from App.models.user import User
+from App.models.staff import Staff
+from App.models.Shift import Shift
+from App.models.Roster import Roster
+from App.models.attendance_record import AttendanceRecord
+from App.controllers.report import _shift_report_query
+
+INDEXED_TABLES = [Shift.__table__, AttendanceRecord.__table__, Roster.__table__]
+FIRST_DAY = datetime.date(2024, 1, 1)
+CHUNK = 50000
+
+
+def seed(rows, staff_count):
+    password = generate_password_hash("benchpass")
+    db.session.execute(db.insert(User), [
+        {'user_id': i, 'name': f"Staff {i}", 'email': f"staff{i}@example.com", 'password': password, 'type': 'staff'}
+        for i in range(1, staff_count + 1)
+    ])
+    db.session.execute(db.insert(Staff.__table__), [
+        {'user_id': i, 'role': 'staff'} for i in range(1, staff_count + 1)
+    ])
+    for offset in range(0, rows, CHUNK):
+        ids = range(offset + 1, min(offset + CHUNK, rows) + 1)
+        shifts, rosters, records = [], [], []
+        for shift_id in ids:
+            user_id = (shift_id - 1) % staff_count + 1
+            day = FIRST_DAY + datetime.timedelta(days=(shift_id - 1) // staff_count)
+            time_in = datetime.datetime.combine(day, datetime.time(8, shift_id % 30))
+            shifts.append({'id': shift_id, 'user_id': user_id, 'weekStart': day, 'weekEnd': day})
+            rosters.append({'shiftID': shift_id, 'userID': user_id})
+            # leave roughly one record in a thousand open
+            records.append({
+                'shiftID': shift_id, 'userID': user_id, 'timeIn': time_in,
+                'timeout': None if shift_id % 1000 == 0 else time_in + datetime.timedelta(hours=8)
+            })
+        db.session.execute(db.insert(Shift.__table__), shifts)
+        db.session.execute(db.insert(Roster.__table__), rosters)
+        db.session.execute(db.insert(AttendanceRecord.__table__), records)
+        db.session.commit()
+        print(f"  seeded {ids[-1]} rows", end="\r")
+    print()
+
+
+def hot_path_queries(rows, staff_count):
+    user_id = staff_count // 2
+    last_day = FIRST_DAY + datetime.timedelta(days=(rows - 1) // staff_count)
+    week_start = last_day - datetime.timedelta(days=last_day.weekday())
+    week_end = week_start + datetime.timedelta(days=6)
+    open_shift = 1000
+    return {
+        'clock-out open record': db.select(AttendanceRecord).filter_by(
+            shiftID=open_shift, userID=(open_shift - 1) % staff_count + 1, timeout=None),
+        'viewRoster': db.select(Roster.shiftID, Roster.userID, Shift.weekStart, Shift.weekEnd)
+            .join(Shift, Shift.id == Roster.shiftID).filter(Shift.user_id == user_id)
+            .filter(Shift.weekStart >= week_start).order_by(Shift.weekStart, Shift.id).limit(50),
+        'weekly roster shifts': db.select(Shift).filter(Shift.weekStart >= week_start, Shift.weekEnd <= week_end),
+        'staff attendance in week': db.select(AttendanceRecord).filter(
+            AttendanceRecord.userID == user_id,
+            AttendanceRecord.timeIn >= datetime.datetime.combine(week_start, datetime.time.min),
+            AttendanceRecord.timeIn <= datetime.datetime.combine(week_end, datetime.time.max)),
+        'shift report': _shift_report_query(week_start, week_end),
+    }
+
+
+def explain(statement):
+    compiled = statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+    if db.engine.dialect.name == 'sqlite':
+        plan = db.session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+        return [row[-1] for row in plan]
+    plan = db.session.execute(text(f"EXPLAIN {compiled}")).all()
+    return [row[0] for row in plan]
+
+
+def run_queries(queries, repeat):
+    for name, statement in queries.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            db.session.execute(statement).all()
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{name}: median {statistics.median(timings):.2f} ms over {repeat} runs")
+        for line in explain(statement):
+            print(f"    {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000, help='attendance records to seed')
+    parser.add_argument('--staff', type=int, default=2000, help='staff members to spread rows across')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per query')
+    parser.add_argument('--database-url', default=None, help='defaults to a temporary SQLite file')
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/attendance-bench.db"
+    create_app({'SQLALCHEMY_DATABASE_URI': database_url})
+    db.drop_all()
+    db.create_all()
+    for table in INDEXED_TABLES:
+        for index in table.indexes:
+            index.drop(db.engine)
+
+    print(f"Seeding {args.rows} attendance records for {args.staff} staff into {database_url}")
+    seed(args.rows, args.staff)
+    queries = hot_path_queries(args.rows, args.staff)
+
+    print("\n== Before indexes ==")
+    run_queries(queries, args.repeat)
+
+    start = time.perf_counter()
+    for table in INDEXED_TABLES:
+        for index in table.indexes:
+            index.create(db.engine)
+    db.session.execute(text("ANALYZE"))
+    print(f"\nBuilt indexes in {time.perf_counter() - start:.1f} s")
+
+    print("\n== After indexes ==")
+    run_queries(queries, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark cold-start latency of the CLI and of a gunicorn worker boot.
+
+Each target is started --runs times in a fresh interpreter and its wall
+time recorded; one more run under `python -X importtime` breaks the
+import time down by top-level package. Targets:
+
+    flask-cli     flask --app wsgi hello           (lite app)
+    direct-cli    python wsgi.py hello             (lite app, no flask plugin commands)
+    worker-boot   import wsgi:app as gunicorn does (full app)
+
+With --save the results are written as JSON; with --compare they are
+printed next to a saved run.
+
+Usage (from the flaskmvc folder):
+    python benchmarks/cli_startup.py [--runs 10] [--top 8] [--save startup.json] [--compare startup.json]
+"""
+import argparse, json, os, statistics, subprocess, sys, time
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    'flask-cli': [sys.executable, '-m', 'flask', '--app', 'wsgi', 'hello'],
+    'direct-cli': [sys.executable, 'wsgi.py', 'hello'],
+    'worker-boot': [sys.executable, '-c', 'from wsgi import app']
+}
+
+
+def with_importtime(command):
+    return [command[0], '-X', 'importtime'] + command[1:]
+
+
+def run(command, env):
+    started = time.perf_counter()
+    result = subprocess.run(command, cwd=HERE, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if result.returncode:
+        sys.exit(f"{' '.join(command)} failed:\n{result.stderr}")
+    return elapsed, result.stderr
+
+
+def import_breakdown(stderr):
+    """Total import time and the time spent importing each top-level package, in ms."""
+    total, packages = 0, {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, _, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        total += int(own)
+        packages[package] = packages.get(package, 0) + int(own)
+    return total / 1000, {package: us / 1000 for package, us in packages.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10, help='cold starts timed per target')
+    parser.add_argument('--top', type=int, default=8, help='slowest packages to list')
+    parser.add_argument('--save', default=None, help='write the results to this JSON file')
+    parser.add_argument('--compare', default=None, help='JSON file from an earlier --save')
+    args = parser.parse_args()
+
+    env = dict(os.environ, FLASK_SQLALCHEMY_DATABASE_URI='sqlite://')
+    env.pop('FLASK_APP', None)
+    before = {}
+    if args.compare:
+        with open(args.compare) as saved:
+            before = json.load(saved)
+    results = {}
+    for name, command in TARGETS.items():
+        run(command, env)  # warm the filesystem cache and .pyc files
+        times = [run(command, env)[0] for _ in range(args.runs)]
+        imports, top = import_breakdown(run(with_importtime(command), env)[1])
+        results[name] = {
+            'median_ms': round(statistics.median(times) * 1000, 1),
+            'min_ms': round(min(times) * 1000, 1),
+            'imports_ms': round(imports, 1)
+        }
+        line = f"{name:>12}: median {results[name]['median_ms']:7.1f} ms  min {results[name]['min_ms']:7.1f} ms  " \
+               f"imports {results[name]['imports_ms']:7.1f} ms"
+        if name in before:
+            line += f"  (was median {before[name]['median_ms']:.1f} ms, imports {before[name]['imports_ms']:.1f} ms)"
+        print(line)
+        for module, ms in sorted(top.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"{'':>14}{ms:8.1f} ms  {module}")
+    if args.save:
+        with open(args.save, 'w') as saved:
+            json.dump(results, saved, indent=2)
+
+
+if __name__ == '__main__':
+    main()
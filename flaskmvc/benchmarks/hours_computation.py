@@ -0,0 +1,130 @@
+"""
+Benchmark per-staff hours (worked time, weekly overtime, late clock-ins,
+open records) computed three ways over the same attendance records:
+
+    orm-loop        load AttendanceRecord objects and loop over
+                    record.timeout - record.timeIn in Python
+    columns-python  load_hours_columns (one query of integers) and the
+                    pure Python fallback of compute_hours
+    columns-numpy   load_hours_columns into NumPy arrays and the
+                    vectorised compute_hours (skipped without numpy)
+
+Each size is seeded into a fresh database and every method must produce
+the same totals.
+
+Usage (from the flaskmvc folder):
+    python benchmarks/hours_computation.py [--rows 100000 1000000] [--staff 2000]
+                                           [--database-url sqlite:////tmp/bench.db]
+"""
+import argparse, datetime, os, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash
+
+from App.main import create_app
+from App.database import db
+from App.models.user import User
+from App.models.staff import Staff
+from App.models.Shift import Shift
+from App.models.attendance_record import AttendanceRecord
+from App.controllers.hours import HOURS_FIELDS, WEEK_SECONDS, compute_hours, load_hours_columns, numpy_module
+from App.controllers.rollup import week_of
+
+FIRST_DAY = datetime.date(2024, 1, 1)
+CHUNK = 50000
+numpy = numpy_module()
+SETTINGS = {'overtime_threshold': 40 * 3600, 'shift_start': 8 * 3600, 'late_grace': 5 * 60}
+
+
+def seed(rows, staff_count):
+    password = generate_password_hash("benchpass")
+    db.session.execute(db.insert(User), [
+        {'user_id': i, 'name': f"Staff {i}", 'email': f"staff{i}@example.com", 'password': password, 'type': 'staff'}
+        for i in range(1, staff_count + 1)
+    ])
+    db.session.execute(db.insert(Staff.__table__), [
+        {'user_id': i, 'role': 'staff'} for i in range(1, staff_count + 1)
+    ])
+    for offset in range(0, rows, CHUNK):
+        ids = range(offset + 1, min(offset + CHUNK, rows) + 1)
+        shifts, records = [], []
+        for shift_id in ids:
+            user_id = (shift_id - 1) % staff_count + 1
+            day = FIRST_DAY + datetime.timedelta(days=(shift_id - 1) // staff_count)
+            # clock-ins spread from 07:45 to 08:14, shifts of 8 to 11 hours, one in 500 left open
+            time_in = datetime.datetime.combine(day, datetime.time(7, 45)) + datetime.timedelta(minutes=shift_id % 30)
+            time_out = None if shift_id % 500 == 0 else time_in + datetime.timedelta(hours=8 + shift_id % 4)
+            shifts.append({'id': shift_id, 'user_id': user_id, 'weekStart': day, 'weekEnd': day})
+            records.append({'shiftID': shift_id, 'userID': user_id, 'timeIn': time_in, 'timeout': time_out})
+        db.session.execute(db.insert(Shift.__table__), shifts)
+        db.session.execute(db.insert(AttendanceRecord.__table__), records)
+        db.session.commit()
+    return FIRST_DAY + datetime.timedelta(days=(rows - 1) // staff_count)
+
+
+def orm_loop(start, end):
+    origin = datetime.datetime.combine(week_of(start), datetime.time.min)
+    records = db.session.query(AttendanceRecord, Shift.weekStart).join(Shift, Shift.id == AttendanceRecord.shiftID).filter(
+        AttendanceRecord.timeIn >= datetime.datetime.combine(start, datetime.time.min),
+        AttendanceRecord.timeIn <= datetime.datetime.combine(end, datetime.time.max)
+    ).all()
+    totals, weekly = {}, {}
+    for record, shift_date in records:
+        row = totals.setdefault(record.userID, [0, 0, 0, 0, 0])
+        worked = int((record.timeout - record.timeIn).total_seconds()) if record.timeout else 0
+        row[0] += worked
+        scheduled = datetime.datetime.combine(shift_date, datetime.time.min) + datetime.timedelta(seconds=SETTINGS['shift_start'])
+        late = int((record.timeIn - scheduled).total_seconds())
+        if late > SETTINGS['late_grace']:
+            row[2] += 1
+            row[3] += late
+        row[4] += record.timeout is None
+        key = (record.userID, int((record.timeIn - origin).total_seconds()) // WEEK_SECONDS)
+        weekly[key] = weekly.get(key, 0) + worked
+    for (user_id, _), worked in weekly.items():
+        totals[user_id][1] += max(worked - SETTINGS['overtime_threshold'], 0)
+    db.session.expunge_all()
+    return {user_id: dict(zip(HOURS_FIELDS, row)) for user_id, row in totals.items()}
+
+
+def columns(start, end, use_numpy):
+    return compute_hours(load_hours_columns(start, end, use_numpy=use_numpy), use_numpy=use_numpy, **SETTINGS)
+
+
+def run(rows, staff_count, database_url):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': database_url})
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        last_day = seed(rows, staff_count)
+        methods = [('orm-loop', lambda: orm_loop(FIRST_DAY, last_day)),
+                   ('columns-python', lambda: columns(FIRST_DAY, last_day, False))]
+        if numpy is not None:
+            methods.append(('columns-numpy', lambda: columns(FIRST_DAY, last_day, True)))
+        print(f"\n== {rows} records, {staff_count} staff ==")
+        expected = None
+        for name, method in methods:
+            start = time.perf_counter()
+            result = method()
+            elapsed = time.perf_counter() - start
+            expected = expected or result
+            assert result == expected, f"{name} disagrees with orm-loop"
+            print(f"{name:>15}: {elapsed * 1000:9.1f} ms")
+        db.session.remove()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000], help='attendance records per run')
+    parser.add_argument('--staff', type=int, default=2000, help='staff members to spread rows across')
+    parser.add_argument('--database-url', default=None, help='defaults to a temporary SQLite file per run')
+    args = parser.parse_args()
+    if numpy is None:
+        print("numpy is not installed; skipping the vectorised method")
+    for rows in args.rows:
+        run(rows, args.staff, args.database_url or f"sqlite:///{tempfile.mkdtemp()}/hours-bench.db")
+
+
+if __name__ == '__main__':
+    main()
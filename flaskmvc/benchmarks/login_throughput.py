@@ -0,0 +1,108 @@
+"""
+Measure login throughput of a single worker process.
+
+Fires --requests POST /api/login calls from --concurrency concurrent
+clients at one app instance and reports logins per second and latency
+percentiles. With --gevent the process is monkey patched first, the same
+way gunicorn's gevent worker class does, and clients run as greenlets. A
+/health probe runs alongside to show whether other requests stall while
+the KDF work is going on.
+
+Usage (from the flaskmvc folder):
+    python benchmarks/login_throughput.py [--gevent] [--concurrency 50] [--requests 200]
+        [--method scrypt:32768:8:1] [--workers 4]
+"""
+import sys
+
+if '--gevent' in sys.argv:
+    from gevent import monkey
+    monkey.patch_all()
+
+import argparse, os, statistics, tempfile, threading, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from App.main import create_app
+from App.database import db
+from App.models.staff import Staff
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(int(len(values) * pct / 100), len(values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--gevent', action='store_true', help='monkey patch and run clients as greenlets')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--method', default=None, help='PASSWORD_HASH_METHOD, e.g. pbkdf2:sha256:600000')
+    parser.add_argument('--workers', type=int, default=4, help='PASSWORD_HASH_WORKERS; 0 hashes inline')
+    args = parser.parse_args()
+
+    overrides = {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tempfile.mkdtemp()}/login-bench.db",
+        'PASSWORD_HASH_WORKERS': args.workers
+    }
+    if args.method:
+        overrides['PASSWORD_HASH_METHOD'] = args.method
+    app = create_app(overrides)
+    db.create_all()
+    db.session.add_all([
+        Staff(name=f"Staff {i}", email=f"login{i}@example.com", password=f"pass{i}") for i in range(args.users)
+    ])
+    db.session.commit()
+
+    latencies, probes = [], []
+    remaining = iter(range(args.requests))
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def client():
+        with app.test_client() as http:
+            while True:
+                with lock:
+                    n = next(remaining, None)
+                if n is None:
+                    return
+                i = n % args.users
+                start = time.perf_counter()
+                response = http.post('/api/login', json={'username': f"login{i}@example.com", 'password': f"pass{i}"})
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.data
+
+    def probe():
+        with app.test_client() as http:
+            while not done.is_set():
+                start = time.perf_counter()
+                http.get('/health')
+                probes.append(time.perf_counter() - start)
+                time.sleep(0.01)
+
+    prober = threading.Thread(target=probe)
+    prober.start()
+    started = time.perf_counter()
+    clients = [threading.Thread(target=client) for _ in range(args.concurrency)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    prober.join()
+
+    mode = 'gevent' if args.gevent else 'threads'
+    print(f"{args.requests} logins, {args.concurrency} concurrent clients ({mode}), "
+          f"method {app.config.get('PASSWORD_HASH_METHOD', 'default')}, KDF workers {args.workers}")
+    print(f"  throughput: {args.requests / elapsed:.1f} logins/s")
+    print(f"  login latency: p50 {percentile(latencies, 50) * 1000:.1f} ms, "
+          f"p95 {percentile(latencies, 95) * 1000:.1f} ms, max {max(latencies) * 1000:.1f} ms")
+    print(f"  /health latency during burst: p50 {percentile(probes, 50) * 1000:.1f} ms, "
+          f"max {max(probes) * 1000:.1f} ms over {len(probes)} probes")
+    print(f"  mean: {statistics.mean(latencies) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Compare ways of loading a mixed list of users and reading their role.
+
+Each strategy gets its own mirror of the User/Admin/Staff mapping on a
+separate SQLite database seeded with --users users (mostly staff, some
+admins), loads every user through the base User class, touches .role on
+each one and reports the number of statements and the median time:
+
+  joined-lazy       joined-table inheritance with the default loader; role
+                    is fetched with one SELECT per object on first access
+  joined-selectin   same tables queried with selectin_polymorphic (what
+                    user listings use); one extra SELECT .. IN per subclass
+                    per 500 rows
+  with-polymorphic  same tables queried with with_polymorphic(User, '*')
+                    (what single user lookups use); one SELECT with an
+                    outer join per subclass table
+  single-table      role moved onto the users table; one plain SELECT
+
+Migration path: selectin loading is a query option only, so moving to it
+needs no schema change. It is applied per query rather than with
+polymorphic_load='selectin' on the mappers, because the mapper setting
+also makes with_polymorphic() lookups emit the extra SELECT .. IN.
+Moving to single-table inheritance would need a migration that adds a
+nullable users.role column, copies role from the admin and staff tables
+(UPDATE users SET role = (SELECT role FROM staff WHERE staff.user_id =
+users.user_id) and the same for admin), points the foreign keys that
+reference those tables at users, and drops them once Admin and Staff no
+longer declare a __tablename__.
+
+Usage (from the flaskmvc folder):
+    python benchmarks/polymorphic_loading.py [--users 10000] [--repeat 5]
+"""
+import argparse, os, statistics, tempfile, time
+
+from sqlalchemy import ForeignKey, Integer, String, create_engine, event, insert, select
+from sqlalchemy.orm import DeclarativeBase, Session, mapped_column, selectin_polymorphic, with_polymorphic
+
+
+def joined_models():
+    class Base(DeclarativeBase):
+        pass
+
+    class User(Base):
+        __tablename__ = 'users'
+        user_id = mapped_column(Integer, primary_key=True)
+        name = mapped_column(String(100), nullable=False)
+        email = mapped_column(String(100), nullable=False, unique=True)
+        password = mapped_column(String(256), nullable=False)
+        type = mapped_column(String(50))
+        __mapper_args__ = {'polymorphic_identity': 'user', 'polymorphic_on': type}
+
+    class Admin(User):
+        __tablename__ = 'admin'
+        user_id = mapped_column(ForeignKey('users.user_id'), primary_key=True)
+        role = mapped_column(String(100), nullable=False)
+        __mapper_args__ = {'polymorphic_identity': 'admin'}
+
+    class Staff(User):
+        __tablename__ = 'staff'
+        user_id = mapped_column(ForeignKey('users.user_id'), primary_key=True)
+        role = mapped_column(String(100), nullable=False)
+        __mapper_args__ = {'polymorphic_identity': 'staff'}
+
+    return Base, User, Admin, Staff
+
+
+def single_table_models():
+    class Base(DeclarativeBase):
+        pass
+
+    class User(Base):
+        __tablename__ = 'users'
+        user_id = mapped_column(Integer, primary_key=True)
+        name = mapped_column(String(100), nullable=False)
+        email = mapped_column(String(100), nullable=False, unique=True)
+        password = mapped_column(String(256), nullable=False)
+        type = mapped_column(String(50))
+        role = mapped_column(String(100))
+        __mapper_args__ = {'polymorphic_identity': 'user', 'polymorphic_on': type}
+
+    class Admin(User):
+        __mapper_args__ = {'polymorphic_identity': 'admin'}
+
+    class Staff(User):
+        __mapper_args__ = {'polymorphic_identity': 'staff'}
+
+    return Base, User, Admin, Staff
+
+
+def seed(engine, models, users):
+    Base, User, Admin, Staff = models
+    Base.metadata.create_all(engine)
+    rows = [
+        {'user_id': i, 'name': f"User {i}", 'email': f"user{i}@example.com", 'password': 'x',
+         'type': 'admin' if i % 20 == 0 else 'staff'}
+        for i in range(1, users + 1)
+    ]
+    with engine.begin() as connection:
+        if 'role' in User.__table__.c:
+            connection.execute(insert(User.__table__), [dict(row, role=row['type']) for row in rows])
+            return
+        connection.execute(insert(User.__table__), rows)
+        for model in (Admin, Staff):
+            identity = model.__mapper__.polymorphic_identity
+            connection.execute(insert(model.__table__), [
+                {'user_id': row['user_id'], 'role': identity} for row in rows if row['type'] == identity
+            ])
+
+
+def run(engine, statement):
+    statements = [0]
+
+    def count(*args):
+        statements[0] += 1
+
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        start = time.perf_counter()
+        with Session(engine) as session:
+            users = session.scalars(statement).all()
+            roles = {user.role for user in users}
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    assert roles == {'admin', 'staff'}, roles
+    return statements[0], elapsed
+
+
+def select_users(models):
+    return select(models[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp()
+    strategies = [
+        ('joined-lazy', joined_models(), select_users),
+        ('joined-selectin', joined_models(),
+         lambda models: select(models[1]).options(selectin_polymorphic(models[1], models[2:]))),
+        ('with-polymorphic', joined_models(), lambda models: select(with_polymorphic(models[1], '*'))),
+        ('single-table', single_table_models(), select_users),
+    ]
+    print(f"{args.users} users, median of {args.repeat} runs")
+    for name, models, build in strategies:
+        engine = create_engine(f"sqlite:///{os.path.join(folder, name)}.db")
+        seed(engine, models, args.users)
+        runs = [run(engine, build(models)) for _ in range(args.repeat)]
+        print(f"  {name:<18} {runs[0][0]:>6} statements  {statistics.median(t for _, t in runs) * 1000:9.1f} ms")
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark overlap detection for bulk scheduling.
+
+Seeds a database with DAYS days of daily shifts for STAFF staff members,
+then validates a bulk schedule of BATCH_DAYS days for every staff member
+(starting a week before the seeded data ends, so that week conflicts) in
+two ways:
+
+    per-shift   one indexed existence query per new shift
+    batched     find_conflicts: one range query per 500 staff, then a
+                binary search per new shift
+
+Usage (from the flaskmvc folder):
+    python benchmarks/schedule_conflicts.py [--staff 5000] [--days 365] [--batch-days 14]
+                                            [--database-url sqlite:////tmp/bench.db]
+"""
+import argparse, datetime, os, sys, tempfile, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, text
+from werkzeug.security import generate_password_hash
+
+from App.main import create_app
+from App.database import db
+from App.models.user import User
+from App.models.staff import Staff
+from App.models.Shift import Shift
+from App.controllers.schedule import _plan_entries, find_conflicts
+
+FIRST_DAY = datetime.date(2025, 1, 1)
+CHUNK = 50000
+
+
+def seed(staff_count, days):
+    password = generate_password_hash("benchpass")
+    db.session.execute(db.insert(User), [
+        {'user_id': i, 'name': f"Staff {i}", 'email': f"staff{i}@example.com", 'password': password, 'type': 'staff'}
+        for i in range(1, staff_count + 1)
+    ])
+    db.session.execute(db.insert(Staff.__table__), [
+        {'user_id': i, 'role': 'staff'} for i in range(1, staff_count + 1)
+    ])
+    rows = staff_count * days
+    for offset in range(0, rows, CHUNK):
+        shifts = []
+        for n in range(offset, min(offset + CHUNK, rows)):
+            day = FIRST_DAY + datetime.timedelta(days=n // staff_count)
+            shifts.append({'user_id': n % staff_count + 1, 'weekStart': day, 'weekEnd': day})
+        db.session.execute(db.insert(Shift.__table__), shifts)
+        db.session.commit()
+        print(f"  seeded {offset + len(shifts)} shifts", end="\r")
+    print()
+    db.session.execute(text("ANALYZE"))
+
+
+def per_shift(planned):
+    conflicts = 0
+    for plan in planned:
+        for day in plan['dates']:
+            found = db.session.scalar(
+                db.select(Shift.id).filter(
+                    Shift.user_id == plan['user_id'], Shift.weekStart <= day, Shift.weekEnd >= day
+                ).limit(1)
+            )
+            conflicts += found is not None
+    return conflicts
+
+
+def batched(planned):
+    return len(find_conflicts(planned))
+
+
+def timed(name, check, entries):
+    statements = 0
+
+    def count(*args):
+        nonlocal statements
+        statements += 1
+
+    planned, errors = _plan_entries(entries)
+    assert not errors, errors[:3]
+    shifts = sum(len(plan['dates']) for plan in planned)
+    event.listen(db.engine, "before_cursor_execute", count)
+    start = time.perf_counter()
+    conflicts = check(planned)
+    elapsed = time.perf_counter() - start
+    event.remove(db.engine, "before_cursor_execute", count)
+    db.session.rollback()
+    print(f"{name:>10}: {elapsed * 1000:9.1f} ms, {statements:6d} statements, "
+          f"{conflicts} of {shifts} new shifts rejected")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--staff', type=int, default=5000, help='staff members to seed')
+    parser.add_argument('--days', type=int, default=365, help='days of daily shifts to seed per staff member')
+    parser.add_argument('--batch-days', type=int, default=14, help='days each bulk entry covers')
+    parser.add_argument('--database-url', default=None, help='defaults to a temporary SQLite file')
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/schedule-bench.db"
+    create_app({'SQLALCHEMY_DATABASE_URI': database_url})
+    db.drop_all()
+    db.create_all()
+
+    print(f"Seeding {args.staff * args.days} shifts for {args.staff} staff into {database_url}")
+    seed(args.staff, args.days)
+
+    start = FIRST_DAY + datetime.timedelta(days=args.days - 7)
+    end = start + datetime.timedelta(days=args.batch_days - 1)
+    entries = [
+        {'staff': str(user_id), 'start': start, 'end': end, 'pattern': 'daily'}
+        for user_id in range(1, args.staff + 1)
+    ]
+    print(f"\nValidating {len(entries)} entries from {start} to {end}")
+    timed('per-shift', per_shift, entries)
+    timed('batched', batched, entries)
+
+
+if __name__ == '__main__':
+    main()
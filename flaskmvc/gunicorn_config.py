@@ -16,4 +16,19 @@ loglevel = 'info'
 
 # Where to log to
 accesslog = '-'  # '-' means log to stdout
-errorlog = '-'  # '-' means log to stderr
\ No newline at end of file
+errorlog = '-'  # '-' means log to stderr
+
+# Each worker has its own connection pool of up to
+# FLASK_DB_POOL_SIZE + FLASK_DB_MAX_OVERFLOW connections, so keep
+# workers * (pool size + overflow) below Postgres max_connections.
+def post_fork(server, worker):
+    # psycopg2 blocks the whole gevent worker while it waits on Postgres
+    # unless its wait callback is made cooperative. Checked against the
+    # worker class in use, since -k can override it (see asgi.py).
+    if server.cfg.worker_class_str == 'gevent':
+        try:
+            from psycogreen.gevent import patch_psycopg
+        except ImportError:
+            server.log.warning("psycogreen is not installed; Postgres queries will block other greenlets")
+        else:
+            patch_psycopg()
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""add hot path indexes for shifts, attendance and rosters
+
+Databases created with `flask init` before this revision have the tables
+but none of the indexes; run `flask db upgrade` to add them. Databases
+created with `flask init` after it already have them and only need
+`flask db stamp head`.
+
+Revision ID: 3f1c2a9d7b10
+Revises:
+Create Date: 2026-10-18 16:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_shifts_user_week', 'shifts', ['user_id', 'weekStart', 'weekEnd'], if_not_exists=True)
+    op.create_index('ix_shifts_week', 'shifts', ['weekStart', 'weekEnd'], if_not_exists=True)
+    op.create_index('ix_attendance_user_timein', 'attendance_records', ['userID', 'timeIn'], if_not_exists=True)
+    op.create_index('ix_attendance_timein', 'attendance_records', ['timeIn'], if_not_exists=True)
+    op.create_index('ix_attendance_shift_user_timeout', 'attendance_records',
+                    ['shiftID', 'userID', 'timeout'], if_not_exists=True)
+    # partial index on open records; dialects without partial index
+    # support ignore the where clause and build a plain index
+    op.create_index('ix_attendance_open', 'attendance_records', ['shiftID', 'userID'],
+                    postgresql_where=sa.text('timeout IS NULL'),
+                    sqlite_where=sa.text('timeout IS NULL'),
+                    if_not_exists=True)
+    op.create_index('ix_rosters_user', 'rosters', ['userID'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_rosters_user', table_name='rosters')
+    op.drop_index('ix_attendance_open', table_name='attendance_records')
+    op.drop_index('ix_attendance_shift_user_timeout', table_name='attendance_records')
+    op.drop_index('ix_attendance_timein', table_name='attendance_records')
+    op.drop_index('ix_attendance_user_timein', table_name='attendance_records')
+    op.drop_index('ix_shifts_week', table_name='shifts')
+    op.drop_index('ix_shifts_user_week', table_name='shifts')
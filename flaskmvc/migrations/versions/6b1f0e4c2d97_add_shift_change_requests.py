@@ -0,0 +1,115 @@
+"""move shift change requests into their own table
+
+Shift.changeRequest held the request text, with "APPROVED: " or "DENIED: "
+prepended once an admin decided it (again on every later decision). Each
+non-empty value becomes one shift_change_requests row whose status is taken
+from the outermost prefix, with every prefix stripped from its details.
+The original times are unknown, so converted rows are created (and, when
+decided, decided) at upgrade time. The column is then dropped.
+
+Revision ID: 6b1f0e4c2d97
+Revises: 8c4e1d2b6a53
+Create Date: 2026-10-18 21:05:00.000000
+
+"""
+import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b1f0e4c2d97'
+down_revision = '8c4e1d2b6a53'
+branch_labels = None
+depends_on = None
+
+PREFIXES = {'APPROVED: ': 'approved', 'DENIED: ': 'denied'}
+
+shifts = sa.table(
+    'shifts',
+    sa.column('id', sa.Integer),
+    sa.column('user_id', sa.Integer),
+    sa.column('changeRequest', sa.String(200))
+)
+requests = sa.table(
+    'shift_change_requests',
+    sa.column('id', sa.Integer),
+    sa.column('shiftID', sa.Integer),
+    sa.column('userID', sa.Integer),
+    sa.column('details', sa.String(200)),
+    sa.column('status', sa.String(10)),
+    sa.column('created', sa.DateTime),
+    sa.column('decided', sa.DateTime)
+)
+
+
+def parse_change_request(value):
+    """(status, details) of a string-encoded Shift.changeRequest."""
+    status, details = 'pending', value
+    while True:
+        prefix = next((prefix for prefix in PREFIXES if details.startswith(prefix)), None)
+        if prefix is None:
+            return status, details
+        if status == 'pending':
+            status = PREFIXES[prefix]
+        details = details[len(prefix):]
+
+
+def upgrade():
+    op.create_table(
+        'shift_change_requests',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('shiftID', sa.Integer(), sa.ForeignKey('shifts.id'), nullable=False),
+        sa.Column('userID', sa.Integer(), sa.ForeignKey('users.user_id'), nullable=False),
+        sa.Column('details', sa.String(200), nullable=False),
+        sa.Column('status', sa.String(10), nullable=False),
+        sa.Column('created', sa.DateTime(), nullable=False),
+        sa.Column('decided', sa.DateTime()),
+        sa.Column('decidedBy', sa.Integer(), sa.ForeignKey('users.user_id')),
+        if_not_exists=True
+    )
+    op.create_index('ix_change_requests_status_created', 'shift_change_requests', ['status', 'created'],
+                    if_not_exists=True)
+    op.create_index('ix_change_requests_shift_status', 'shift_change_requests', ['shiftID', 'status'],
+                    if_not_exists=True)
+
+    connection = op.get_bind()
+    now = datetime.datetime.now()
+    rows = []
+    for shift in connection.execute(
+        sa.select(shifts.c.id, shifts.c.user_id, shifts.c.changeRequest)
+        .where(shifts.c.changeRequest.is_not(None), shifts.c.changeRequest != '')
+        .order_by(shifts.c.id)
+    ):
+        status, details = parse_change_request(shift.changeRequest)
+        rows.append({
+            'shiftID': shift.id, 'userID': shift.user_id, 'details': details, 'status': status,
+            'created': now, 'decided': None if status == 'pending' else now
+        })
+    if rows:
+        op.bulk_insert(requests, rows)
+
+    # batch mode copies the table on SQLite, which cannot drop columns in place
+    with op.batch_alter_table('shifts') as batch:
+        batch.drop_column('changeRequest')
+
+
+def downgrade():
+    with op.batch_alter_table('shifts') as batch:
+        batch.add_column(sa.Column('changeRequest', sa.String(200)))
+
+    # each shift keeps its latest request, encoded the old way
+    connection = op.get_bind()
+    prefixes = {status: prefix for prefix, status in PREFIXES.items()}
+    latest = {}
+    for row in connection.execute(
+        sa.select(requests.c.shiftID, requests.c.details, requests.c.status).order_by(requests.c.id)
+    ):
+        latest[row.shiftID] = prefixes.get(row.status, '') + row.details
+    for shift_id, value in latest.items():
+        connection.execute(shifts.update().where(shifts.c.id == shift_id).values(changeRequest=value[:200]))
+
+    op.drop_index('ix_change_requests_shift_status', table_name='shift_change_requests')
+    op.drop_index('ix_change_requests_status_created', table_name='shift_change_requests')
+    op.drop_table('shift_change_requests')
@@ -0,0 +1,45 @@
+"""add weekly attendance summary rollup
+
+The summary starts empty and is only read by reports once it has been
+backfilled; run `flask reports rebuild-rollups` after upgrading.
+
+Revision ID: 8c4e1d2b6a53
+Revises: 3f1c2a9d7b10
+Create Date: 2026-10-18 18:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4e1d2b6a53'
+down_revision = '3f1c2a9d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'weekly_attendance_summary',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.user_id'), primary_key=True),
+        sa.Column('week_start', sa.Date(), primary_key=True),
+        sa.Column('scheduled_shifts', sa.Integer(), nullable=False),
+        sa.Column('completed_records', sa.Integer(), nullable=False),
+        sa.Column('total_seconds', sa.Integer(), nullable=False),
+        if_not_exists=True
+    )
+    op.create_index('ix_weekly_summary_week', 'weekly_attendance_summary', ['week_start'], if_not_exists=True)
+    op.create_table(
+        'rollup_status',
+        sa.Column('name', sa.String(50), primary_key=True),
+        sa.Column('built_at', sa.DateTime()),
+        sa.Column('stale', sa.Boolean(), nullable=False),
+        if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('rollup_status')
+    op.drop_index('ix_weekly_summary_week', table_name='weekly_attendance_summary')
+    op.drop_table('weekly_attendance_summary')
@@ -0,0 +1,52 @@
+"""add recurring shift templates
+
+Existing shifts are left as they are; templates only add occurrences
+that have no Shift row until they are clocked against or overridden.
+
+Revision ID: a4e9c7f2b318
+Revises: 6b1f0e4c2d97
+Create Date: 2026-10-18 23:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4e9c7f2b318'
+down_revision = '6b1f0e4c2d97'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'shift_templates',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.user_id'), nullable=False),
+        sa.Column('weekdays', sa.Integer(), nullable=False),
+        sa.Column('start_time', sa.Time(), nullable=False),
+        sa.Column('end_time', sa.Time(), nullable=False),
+        sa.Column('valid_from', sa.Date(), nullable=False),
+        sa.Column('valid_until', sa.Date()),
+        if_not_exists=True
+    )
+    op.create_index('ix_shift_templates_user_from', 'shift_templates', ['user_id', 'valid_from'], if_not_exists=True)
+    op.create_index('ix_shift_templates_valid', 'shift_templates', ['valid_from', 'valid_until'], if_not_exists=True)
+    # batch mode copies the table on SQLite, which cannot add constraints in place
+    with op.batch_alter_table('shifts') as batch:
+        batch.add_column(sa.Column('template_id', sa.Integer()))
+        batch.add_column(sa.Column('template_date', sa.Date()))
+        batch.create_foreign_key('fk_shifts_template_id', 'shift_templates', ['template_id'], ['id'])
+        batch.create_unique_constraint('uq_shifts_template_date', ['template_date', 'template_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('shifts') as batch:
+        batch.drop_constraint('uq_shifts_template_date', type_='unique')
+        batch.drop_constraint('fk_shifts_template_id', type_='foreignkey')
+        batch.drop_column('template_date')
+        batch.drop_column('template_id')
+    op.drop_index('ix_shift_templates_valid', table_name='shift_templates')
+    op.drop_index('ix_shift_templates_user_from', table_name='shift_templates')
+    op.drop_table('shift_templates')
@@ -1,9 +1,9 @@
-import click, pytest, sys
+import click, sys
 from flask.cli import with_appcontext, AppGroup
 
 from App.database import db, get_migrate
 from App.models import User
-from App.main import create_app
+from App.main import WEB_COMMANDS, cli_command, create_app
 from App.controllers import ( create_user, get_all_users_json, get_all_users, initialize )
 from App.models.staff import Staff
 from App.models.admin import Admin
@@ -11,20 +11,25 @@ from App.models.admin import Admin
 
 # This commands file allow you to create convenient CLI commands for testing controllers
 
-app = create_app()
-migrate = get_migrate(app)
+# Commands run from the flask CLI that do not serve requests get a lite
+# app without the web layer; gunicorn workers and `flask run` get it all.
+command = cli_command(['flask'] + sys.argv[1:] if __name__ == '__main__' else None)
+app = create_app(lite=command is not None and command not in WEB_COMMANDS)
+if command == 'db':
+    # alembic is only needed by Flask-Migrate's `flask db` commands
+    migrate = get_migrate(app)
 
 # This command creates and initializes the database
 @app.cli.command("init", help="Creates and initializes the database")
 def init():
-    """Initialize the database with sample users, shifts, and roster entries."""
+    """Initialize the database with sample users and a recurring weekday shift for each staff member."""
     from App.database import db
     from App.models.user import User
     from App.models.admin import Admin
     from App.models.staff import Staff
-    from App.models.Shift import Shift
-    from App.models.Roster import Roster
+    from App.models.shift_template import ShiftTemplate
     from App.models.attendance_record import AttendanceRecord  # <-- Ensure this import is present
+    from App.controllers import weekday_mask, parse_pattern
     import datetime
 
     db.drop_all()
@@ -48,29 +53,23 @@ def init():
     db.session.add_all(users)
     db.session.commit()
 
-    # Remove the separate admin and staff creation since they're created above
-    shifts = []
-    for i, staff in enumerate(users[2:]):  # Skip first two users (admins)
-        for day in range(5):
-            shift = Shift(
-                user_id=staff.user_id,
-                changeRequest=None,
-                weekStart=week_start + datetime.timedelta(days=day),
-                weekEnd=week_start + datetime.timedelta(days=day)
-            )
-            shifts.append(shift)
-    db.session.add_all(shifts)
-    db.session.commit()
-
-    # Create roster entries: assign each shift to the corresponding staff
-    rosters = []
-    for shift in shifts:
-        roster = Roster(shiftID=shift.id, userID=shift.user_id)
-        rosters.append(roster)
-    db.session.add_all(rosters)
+    # One recurring Monday to Friday shift per staff member for this week;
+    # its days are expanded when rosters are read and get a Shift row when
+    # clocked against
+    db.session.add_all([
+        ShiftTemplate(
+            user_id=staff.user_id,
+            weekdays=weekday_mask(parse_pattern('weekdays')),
+            start_time=datetime.time(8, 0),
+            end_time=datetime.time(16, 0),
+            valid_from=week_start,
+            valid_until=week_end
+        )
+        for staff in users[2:]  # Skip first two users (admins)
+    ])
     db.session.commit()
 
-    print("Database initialized with 2 admins, 5 staff, sample shifts, and roster entries.")
+    print("Database initialized with 2 admins, 5 staff and a recurring weekday shift for each staff member.")
 
 '''
 User Commands
@@ -94,14 +93,202 @@ def create_user_command(username, password):
 
 @user_cli.command("list", help="Lists users in the database")
 @click.argument("format", default="string")
-def list_user_command(format):
-    if format == 'string':
-        print(get_all_users())
-    else:
-        print(get_all_users_json())
+@click.option("--type", "user_type", default=None, help="Only users of this type (admin or staff)")
+@click.option("--name", default=None, help="Only users whose name starts with this")
+@click.option("--email", default=None, help="Only the user with this email")
+def list_user_command(format, user_type, name, email):
+    import json
+    from App.controllers import iter_users
+
+    # streamed in chunks, one user per line
+    for user in iter_users(type=user_type, name_prefix=name, email=email):
+        if format == 'string':
+            print(f"{user['user_id']}: {user['name']} <{user['email']}> ({user['type']})")
+        else:
+            print(json.dumps(user))
 
 app.cli.add_command(user_cli) # add the group to the cli
 
+'''
+Roster Commands
+'''
+
+roster_cli = AppGroup('roster', help='Roster and scheduling commands')
+
+@roster_cli.command("bulk-schedule", help="Schedules shifts from a CSV or JSON file of (staff, start, end, pattern) entries")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--skip-conflicts", is_flag=True, help="Schedule the rest when some shifts overlap existing ones")
+def bulk_schedule_command(path, skip_conflicts):
+    from App.controllers import ScheduleError, bulk_schedule_shifts, read_schedule_file
+
+    try:
+        results = bulk_schedule_shifts(read_schedule_file(path), skip_conflicts=skip_conflicts)
+    except ScheduleError as e:
+        print(f"{e}; nothing was scheduled:")
+        for error in e.errors:
+            print(f"  entry {error['index']}: {error['error']}")
+        sys.exit(1)
+    total = sum(len(result['shift_ids']) for result in results)
+    print(f"Scheduled {total} shifts for {len(results)} entries.")
+    for result in results:
+        for error in result['rejected']:
+            print(f"  skipped entry {error['index']}: {error['error']}")
+
+@roster_cli.command("add-template", help="Schedules a recurring shift, expanded on read instead of stored per day")
+@click.argument("staff")
+@click.option("--pattern", default="weekdays", show_default=True, help="weekdays, weekends, daily or e.g. mon,wed,fri")
+@click.option("--start-time", default="08:00", show_default=True, help="HH:MM")
+@click.option("--end-time", default="16:00", show_default=True, help="HH:MM")
+@click.option("--from", "valid_from", default=None, help="First date (YYYY-MM-DD); defaults to today")
+@click.option("--until", "valid_until", default=None, help="Last date (YYYY-MM-DD); open-ended when left out")
+def add_template_command(staff, pattern, start_time, end_time, valid_from, valid_until):
+    from App.controllers import ScheduleError, create_shift_template, template_json
+    import datetime
+
+    try:
+        template = create_shift_template(staff, pattern, start_time, end_time,
+                                         valid_from or datetime.date.today(), valid_until)
+    except ScheduleError as e:
+        for error in e.errors:
+            print(error['error'])
+        sys.exit(1)
+    details = template_json(template)
+    print(f"Recurring shift {details['id']} for staff {details['user_id']}: {','.join(details['weekdays'])} "
+          f"{details['start_time']}-{details['end_time']} from {details['valid_from']} until {details['valid_until'] or 'further notice'}.")
+
+app.cli.add_command(roster_cli)
+
+'''
+Report Commands
+'''
+
+report_cli = AppGroup('reports', help='Report commands')
+
+@report_cli.command("rebuild-rollups", help="Backfills the weekly attendance summary read by generate-shift-report")
+@click.option("--chunk-size", default=500, show_default=True, help="Users recomputed per transaction")
+def rebuild_rollups_command(chunk_size):
+    from App.controllers import rebuild_rollups
+
+    rows = rebuild_rollups(chunk_size=chunk_size, progress=lambda done: print(f"  {done} users done"))
+    print(f"Weekly attendance summary rebuilt with {rows} rows.")
+
+app.cli.add_command(report_cli)
+
+'''
+Attendance Commands
+'''
+
+attendance_cli = AppGroup('attendance', help='Attendance commands')
+
+@attendance_cli.command("export", help="Streams attendance records for payroll as CSV or Parquet")
+@click.argument("start")
+@click.argument("end")
+@click.option("--format", "output_format", type=click.Choice(["csv", "parquet"]), default="csv", show_default=True)
+@click.option("--staff", multiple=True, help="Only this staff email or user id (repeatable)")
+@click.option("--output", type=click.Path(dir_okay=False), default=None, help="File to write instead of stdout")
+@click.option("--after", default=None, help="Resume a CSV export from the cursor it printed")
+@click.option("--chunk-size", default=5000, show_default=True, help="Rows read per round trip")
+def export_attendance_command(start, end, output_format, staff, output, after, chunk_size):
+    from App.controllers import export_attendance
+    import datetime
+
+    try:
+        start_date = datetime.datetime.strptime(start, "%Y-%m-%d").date()
+        end_date = datetime.datetime.strptime(end, "%Y-%m-%d").date()
+    except ValueError:
+        print("Invalid date format. Use YYYY-MM-DD.", file=sys.stderr)
+        sys.exit(1)
+    state = {'rows': 0, 'cursor': after}
+
+    def progress(rows, cursor):
+        state.update(rows=rows, cursor=cursor)
+
+    try:
+        body = export_attendance(start_date, end_date, output_format, list(staff), after, chunk_size, progress)
+    except (ValueError, RuntimeError) as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    # a resumed CSV export is appended to the interrupted one
+    target = open(output, "ab" if after and output_format == "csv" else "wb") if output else sys.stdout.buffer
+    try:
+        for data in body:
+            target.write(data)
+    except BaseException:
+        if output_format == "csv" and state['cursor']:
+            print(f"Export stopped after {state['rows']} rows; resume with --after '{state['cursor']}'", file=sys.stderr)
+        raise
+    finally:
+        if output:
+            target.close()
+    print(f"Exported {state['rows']} attendance records.", file=sys.stderr)
+
+app.cli.add_command(attendance_cli)
+
+'''
+Benchmark Commands
+'''
+
+bench_cli = AppGroup('bench', help='Synthetic data and load benchmarks')
+
+@bench_cli.command("generate", help="Replaces the database with init's sample data scaled to STAFF staff and WEEKS weeks")
+@click.option("--staff", default=200, show_default=True, help="Staff members to create")
+@click.option("--weeks", default=4, show_default=True, help="Weeks of weekday shifts; all but the last are attended")
+def bench_generate_command(staff, weeks):
+    from App.bench import ADMIN_COUNT, BENCH_PASSWORD, generate_bench_data
+
+    data = generate_bench_data(staff, weeks)
+    print(f"Database filled with {ADMIN_COUNT} admins and {staff} staff (password '{BENCH_PASSWORD}') "
+          f"and {staff * 5 * weeks} shifts from {data.first_week}.")
+
+@bench_cli.command("run", help="Times scripted scenarios through the in-process test client on generated data")
+@click.option("--scenario", "scenarios", multiple=True, help="Scenario to run (repeatable); all by default")
+@click.option("--staff", default=200, show_default=True, help="Staff members to generate")
+@click.option("--weeks", default=4, show_default=True, help="Weeks of shifts to generate")
+@click.option("--requests", type=int, default=None, help="Timed requests per scenario instead of each one's default")
+@click.option("--database-url", default=None, help="Database to generate into (replaced); a temporary SQLite file by default")
+@click.option("--response-cache/--no-response-cache", default=False, show_default=True,
+              help="Serve roster and report requests from the response cache")
+@click.option("--baseline", type=click.Path(exists=True, dir_okay=False), default=None,
+              help="Saved results to compare against; exits with status 1 on a regression")
+@click.option("--tolerance", default=0.2, show_default=True, help="Allowed p95 growth or throughput drop, as a fraction")
+@click.option("--save-baseline", type=click.Path(dir_okay=False), default=None, help="Write the results here as a baseline")
+def bench_run_command(scenarios, staff, weeks, requests, database_url, response_cache, baseline, tolerance, save_baseline):
+    import tempfile
+    from App.bench import SCENARIOS, compare_to_baseline, generate_bench_data, load_baseline, run_scenario, save_baseline as save
+
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        print(f"Unknown scenario(s) {', '.join(unknown)}; choose from {', '.join(SCENARIOS)}.")
+        sys.exit(1)
+    bench_app = create_app({
+        'SQLALCHEMY_DATABASE_URI': database_url or f"sqlite:///{tempfile.mkdtemp()}/bench.db",
+        'RESPONSE_CACHE_BACKEND': 'local' if response_cache else 'none'
+    })
+    results = {}
+    with bench_app.app_context():
+        print(f"Generating {staff} staff and {weeks} weeks of shifts...")
+        data = generate_bench_data(staff, weeks)
+        # every request sends its own token; a login cookie would override it
+        client = bench_app.test_client(use_cookies=False)
+        print(f"{'Scenario':<16}{'Requests':>9}{'Errors':>8}{'Req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name in scenarios or SCENARIOS:
+            result = results[name] = run_scenario(client, data, name, requests)
+            print(f"{name:<16}{result['requests']:>9}{result['errors']:>8}{result['throughput']:>10}"
+                  f"{result['p50_ms']:>10}{result['p95_ms']:>10}{result['p99_ms']:>10}")
+        db.session.remove()
+    if save_baseline:
+        save(save_baseline, results, staff, weeks)
+        print(f"Baseline saved to {save_baseline}.")
+    if baseline:
+        regressions = compare_to_baseline(results, load_baseline(baseline), tolerance)
+        for name, metric, before, now in regressions:
+            print(f"REGRESSION {name} {metric}: {before} -> {now}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {tolerance:.0%} against {baseline}.")
+
+app.cli.add_command(bench_cli)
+
 '''
 Test Commands
 '''
@@ -111,6 +298,8 @@ test = AppGroup('test', help='Testing commands')
 @test.command("user", help="Run User tests")
 @click.argument("type", default="all")
 def user_tests_command(type):
+    import pytest
+
     if type == "unit":
         sys.exit(pytest.main(["-k", "UserUnitTests"]))
     elif type == "int":
@@ -129,22 +318,13 @@ def hello():
 @app.cli.command("view-weekly-roster")
 def view_weekly_roster():
     """Display the weekly roster with shifts and assigned users."""
-    from App.database import db
-    from App.models.Shift import Shift
-    from App.models.Roster import Roster
-    from App.models.user import User
-    import datetime
+    from App.controllers import get_current_week, get_weekly_roster
 
     # Get current week range
-    today = datetime.date.today()
-    week_start = today - datetime.timedelta(days=today.weekday())
-    week_end = week_start + datetime.timedelta(days=6)
+    week_start, week_end = get_current_week()
 
-    # Query all shifts in the current week
-    shifts = db.session.query(Shift).filter(
-        Shift.weekStart >= week_start,
-        Shift.weekEnd <= week_end
-    ).all()
+    # Shifts, roster entries and users for the week in a single query
+    shifts = get_weekly_roster(week_start, week_end)
 
     if not shifts:
         print("No shifts scheduled for this week.")
@@ -152,9 +332,7 @@ def view_weekly_roster():
 
     print(f"Weekly Roster ({week_start} to {week_end}):")
     for shift in shifts:
-        roster = db.session.query(Roster).filter_by(shiftID=shift.id).first()
-        user = db.session.query(User).filter_by(user_id=shift.user_id).first()
-        user_info = f"{user.name} ({user.email})" if user else "Unassigned"
+        user_info = f"{shift.name} ({shift.email})" if shift.email else "Unassigned"
         print(f"Shift ID: {shift.id}, Date: {shift.weekStart}, Assigned to: {user_info}")
 
 @app.cli.command("schedule-shift")
@@ -165,12 +343,7 @@ def schedule_shift(admin_email, staff_email):
     Schedule a staff member's shifts for the current week using an admin.
     Usage: flask schedule-shift <admin_email> <staff_email>
     """
-    from App.models.user import User
-    from App.models.admin import Admin
-    from App.models.staff import Staff
-    from App.models.Shift import Shift
-    from App.models.Roster import Roster
-    import datetime
+    from App.controllers import ScheduleError, create_shift_template, get_current_week
 
     admin = db.session.query(Admin).filter_by(email=admin_email).first()
     staff = db.session.query(Staff).filter_by(email=staff_email).first()
@@ -181,25 +354,14 @@ def schedule_shift(admin_email, staff_email):
         print(f"Staff with email '{staff_email}' not found.")
         return
 
-    today = datetime.date.today()
-    week_start = today - datetime.timedelta(days=today.weekday())
-    # Schedule shifts for Monday to Friday
-    shift_ids = []
-    for day in range(5):
-        shift_date = week_start + datetime.timedelta(days=day)
-        shift = Shift(
-            user_id=staff.user_id,
-            changeRequest=None,
-            weekStart=shift_date,
-            weekEnd=shift_date
-        )
-        db.session.add(shift)
-        db.session.flush()  # Get shift.id before commit
-        shift_ids.append(shift.id)
-    db.session.commit()
-
-    # Use admin's scheduleShift method to create roster entries
-    admin.scheduleShift(db.session, staff.user_id, shift_ids)
+    # One recurring Monday to Friday shift; no Shift rows until clocked against
+    week_start, week_end = get_current_week()
+    try:
+        create_shift_template(staff.user_id, 'weekdays', '08:00', '16:00', week_start, week_end)
+    except ScheduleError as e:
+        for error in e.errors:
+            print(error['error'])
+        return
     print(f"Scheduled shifts for {staff.name} ({staff.email}) for the week.")
 
 @app.cli.command("manual-schedule-shift")
@@ -212,8 +374,7 @@ def manual_schedule_shift(staff_email, date, change_request):
     Usage: flask manual-schedule-shift <staff_email> <date:YYYY-MM-DD> [--change-request <text>]
     """
     from App.models.staff import Staff
-    from App.models.Shift import Shift
-    from App.models.Roster import Roster
+    from App.controllers import ScheduleError, bulk_schedule_shifts
     import datetime
 
     staff = db.session.query(Staff).filter_by(email=staff_email).first()
@@ -227,20 +388,16 @@ def manual_schedule_shift(staff_email, date, change_request):
         print("Invalid date format. Use YYYY-MM-DD.")
         return
 
-    # Create the shift
-    shift = Shift(
-        user_id=staff.user_id,
-        changeRequest=change_request,
-        weekStart=shift_date,
-        weekEnd=shift_date
-    )
-    db.session.add(shift)
-    db.session.flush()  # Get shift.id before commit
-
-    # Create the roster entry
-    roster = Roster(shiftID=shift.id, userID=staff.user_id)
-    db.session.add(roster)
-    db.session.commit()
+    # Create the shift and its roster entry, unless it overlaps another shift
+    try:
+        bulk_schedule_shifts([{
+            'staff': staff.user_id, 'start': shift_date, 'end': shift_date,
+            'pattern': 'daily', 'change_request': change_request
+        }])
+    except ScheduleError as e:
+        for error in e.errors:
+            print(error['error'])
+        return
 
     print(f"Shift scheduled for {staff.name} on {shift_date}.")
 
@@ -253,35 +410,20 @@ def clock_in(staff_email, shift_id, time_in):
     Staff clocks in for a shift.
     Usage: flask clock-in <staff_email> <shift_id> <time_in:YYYY-MM-DDTHH:MM>
     """
-    from App.models.staff import Staff
-    from App.models.Shift import Shift
-    from App.models.attendance_record import AttendanceRecord
+    from App.controllers import clock_in
     import datetime
 
-    staff = db.session.query(Staff).filter_by(email=staff_email).first()
-    shift = db.session.query(Shift).filter_by(id=shift_id, user_id=staff.user_id).first() if staff else None
-    if not staff:
-        print(f"Staff with email '{staff_email}' not found.")
-        return
-    if not shift:
-        print(f"Shift with ID '{shift_id}' for staff '{staff_email}' not found.")
-        return
-
     try:
         time_in_dt = datetime.datetime.strptime(time_in, "%Y-%m-%dT%H:%M")
     except ValueError:
         print("Invalid time format. Use YYYY-MM-DDTHH:MM.")
         return
 
-    attendance = AttendanceRecord(
-        shiftID=shift.id,
-        userID=staff.user_id,
-        timeIn=time_in_dt,
-        timeout=None
-    )
-    db.session.add(attendance)
-    db.session.commit()
-    print(f"{staff.name} clocked in for shift {shift_id} at {time_in_dt}.")
+    result = clock_in(staff_email, shift_id, time_in_dt)
+    if result['status'] != 'ok':
+        print(result['error'])
+        return
+    print(f"{result['name']} clocked in for shift {result['shift_id']} at {time_in_dt}.")
 
 @app.cli.command("clock-out")
 @click.argument("staff_email")
@@ -292,51 +434,62 @@ def clock_out(staff_email, shift_id, time_out):
     Staff clocks out for a shift.
     Usage: flask clock-out <staff_email> <shift_id> <time_out:YYYY-MM-DDTHH:MM>
     """
-    from App.models.staff import Staff
-    from App.models.Shift import Shift
-    from App.models.attendance_record import AttendanceRecord
+    from App.controllers import clock_out
     import datetime
 
-    staff = db.session.query(Staff).filter_by(email=staff_email).first()
-    shift = db.session.query(Shift).filter_by(id=shift_id, user_id=staff.user_id).first() if staff else None
-    if not staff:
-        print(f"Staff with email '{staff_email}' not found.")
-        return
-    if not shift:
-        print(f"Shift with ID '{shift_id}' for staff '{staff_email}' not found.")
-        return
-
     try:
         time_out_dt = datetime.datetime.strptime(time_out, "%Y-%m-%dT%H:%M")
     except ValueError:
         print("Invalid time format. Use YYYY-MM-DDTHH:MM.")
         return
 
-    attendance = db.session.query(AttendanceRecord).filter_by(
-        shiftID=shift.id,
-        userID=staff.user_id,
-        timeout=None
-    ).first()
-    if not attendance:
-        print(f"No active attendance record found for shift {shift_id} and staff {staff_email}.")
+    result = clock_out(staff_email, shift_id, time_out_dt)
+    if result['status'] != 'ok':
+        print(result['error'])
         return
+    print(f"{result['name']} clocked out for shift {result['shift_id']} at {time_out_dt}.")
 
-    attendance.timeout = time_out_dt
-    db.session.commit()
-    print(f"{staff.name} clocked out for shift {shift_id} at {time_out_dt}.")
+@app.cli.command("command-server")
+@click.option("--socket", "path", default=None,
+              help="Unix socket to listen on; defaults to $FLASK_COMMAND_SOCKET or instance/commands.sock")
+def command_server(path):
+    """
+    Keep the app warm and run clock-in, clock-out, schedule-shift and
+    manual-schedule-shift for `python -m App.command_server` clients.
+    Usage: flask command-server [--socket <path>]
+    """
+    from App.command_server import SERVED_COMMANDS, CommandServer
+    import signal
+
+    try:
+        server = CommandServer(app, path)
+    except RuntimeError as e:
+        print(e)
+        sys.exit(1)
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    print(f"Serving {', '.join(SERVED_COMMANDS)} on {server.server_address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
 
 @app.cli.command("generate-shift-report")
 @click.argument("week_start")
 @click.argument("week_end")
-def generate_shift_report(week_start, week_end):
+@click.option("--format", "output_format", default="text", type=click.Choice(["text", "csv", "json"]), help="Output format")
+def generate_shift_report(week_start, week_end, output_format):
     """
     Generate a weekly shift report for all staff.
-    Usage: flask generate-shift-report <week_start:YYYY-MM-DD> <week_end:YYYY-MM-DD>
+    Usage: flask generate-shift-report <week_start:YYYY-MM-DD> <week_end:YYYY-MM-DD> [--format text|csv|json]
     """
-    from App.models.staff import Staff
-    from App.models.Shift import Shift
-    from App.models.attendance_record import AttendanceRecord
-    import datetime
+    from App.controllers import generate_shift_report, shift_report_csv
+    import datetime, json
 
     try:
         week_start_date = datetime.datetime.strptime(week_start, "%Y-%m-%d").date()
@@ -345,35 +498,24 @@ def generate_shift_report(week_start, week_end):
         print("Invalid date format. Use YYYY-MM-DD.")
         return
 
-    staff_members = db.session.query(Staff).all()
+    report = generate_shift_report(week_start_date, week_end_date, with_hours=True)
+    if output_format == "csv":
+        print(shift_report_csv(report), end="")
+        return
+    if output_format == "json":
+        print(json.dumps(report, indent=2))
+        return
+
     print(f"Shift Report ({week_start_date} to {week_end_date}):")
     print("-" * 60)
-    for staff in staff_members:
-        # Scheduled shifts for the week
-        scheduled_shifts = db.session.query(Shift).filter(
-            Shift.user_id == staff.user_id,
-            Shift.weekStart >= week_start_date,
-            Shift.weekEnd <= week_end_date
-        ).all()
-        num_shifts = len(scheduled_shifts)
-
-        # Attendance records for the week
-        attendance_records = db.session.query(AttendanceRecord).filter(
-            AttendanceRecord.userID == staff.user_id,
-            AttendanceRecord.timeIn >= datetime.datetime.combine(week_start_date, datetime.time.min),
-            AttendanceRecord.timeIn <= datetime.datetime.combine(week_end_date, datetime.time.max)
-        ).all()
-
-        total_hours = 0.0
-        for record in attendance_records:
-            if record.timeout and record.timeIn:
-                duration = record.timeout - record.timeIn
-                total_hours += duration.total_seconds() / 3600.0
-
-        print(f"Staff: {staff.name} ({staff.email})")
-        print(f"  Scheduled Shifts: {num_shifts}")
-        print(f"  Total Hours Clocked In: {total_hours:.2f}")
-        print(f"  Attendance Records: {len(attendance_records)}")
+    for row in report:
+        print(f"Staff: {row['name']} ({row['email']})")
+        print(f"  Scheduled Shifts: {row['scheduled_shifts']}")
+        print(f"  Total Hours Clocked In: {row['total_seconds'] / 3600.0:.2f}")
+        print(f"  Attendance Records: {row['attendance_records']}")
+        print(f"  Overtime Hours: {row['overtime_hours']:.2f}")
+        print(f"  Late Clock-ins: {row['late_records']} ({row['late_minutes']:.1f} minutes)")
+        print(f"  Open Records: {row['open_records']}")
         print("-" * 60)
 
 @app.cli.command("generate-sample-attendance")
@@ -383,8 +525,8 @@ def generate_sample_attendance():
     Usage: flask generate-sample-attendance
     """
     from App.models.staff import Staff
-    from App.models.Shift import Shift
     from App.models.attendance_record import AttendanceRecord
+    from App.controllers import get_weekly_roster, materialize_template_shifts
     import datetime
     import random
 
@@ -393,26 +535,36 @@ def generate_sample_attendance():
     week_end = week_start + datetime.timedelta(days=6)
 
     staff_members = db.session.query(Staff).all()
-    shifts = db.session.query(Shift).filter(
-        Shift.weekStart >= week_start,
-        Shift.weekEnd <= week_end
-    ).all()
+    # the week's shifts and recurring shift occurrences; the sampled
+    # occurrences are given Shift rows to clock against
+    shifts = get_weekly_roster(week_start, week_end)
 
     # For each staff, create 2-3 attendance records for their scheduled shifts
+    sampled = []
     for staff in staff_members:
         # staff.name is already set from init
         staff_shifts = [s for s in shifts if s.user_id == staff.user_id]
-        sample_shifts = random.sample(staff_shifts, min(len(staff_shifts), random.randint(2, 3)))
-        for shift in sample_shifts:
-            clock_in_hour = random.randint(7, 9)
-            time_in = datetime.datetime.combine(shift.weekStart, datetime.time(clock_in_hour, 0))
-            time_out = time_in + datetime.timedelta(hours=8)
-            attendance = AttendanceRecord(
-                shiftID=shift.id,
-                userID=staff.user_id,
-                timeIn=time_in,
-                timeout=time_out
-            )
-            db.session.add(attendance)
+        sampled += random.sample(staff_shifts, min(len(staff_shifts), random.randint(2, 3)))
+    shift_ids = materialize_template_shifts({
+        (shift.template_id, shift.weekStart) for shift in sampled if isinstance(shift.id, str)
+    })
+    for shift in sampled:
+        clock_in_hour = random.randint(7, 9)
+        time_in = datetime.datetime.combine(shift.weekStart, datetime.time(clock_in_hour, 0))
+        time_out = time_in + datetime.timedelta(hours=8)
+        attendance = AttendanceRecord(
+            shiftID=shift_ids[(shift.template_id, shift.weekStart)] if isinstance(shift.id, str) else shift.id,
+            userID=shift.user_id,
+            timeIn=time_in,
+            timeout=time_out
+        )
+        db.session.add(attendance)
     db.session.commit()
-    print("Sample attendance records generated for the current week with staff names.")
\ No newline at end of file
+    print("Sample attendance records generated for the current week with staff names.")
+
+
+if __name__ == '__main__':
+    # `python wsgi.py <command> ...` runs the commands above without the
+    # flask CLI, which loads every installed plugin's commands first
+    # (alembic through Flask-Migrate's `flask db`) on each run
+    app.cli.main()